@@ -15,19 +15,10 @@ const UnitDetail = () => {
   useEffect(() => {
     if (typeof window !== "undefined") window.scrollTo(0, 0);
 
-    Promise.all([
-      fetchJSON("/subjects/units/").then((data) => {
-        const unitsArray = Array.isArray(data) ? data : data?.results || [];
-        const foundUnit = unitsArray.find((u) => u.id === Number(id));
-        if (!foundUnit) throw new Error("Unit not found");
-        return foundUnit;
-      }),
-      fetchJSON(`/materials/?unit=${id}`),
-    ])
-      .then(([unitData, materialsData]) => {
-        setUnit(unitData);
-        const materialsArray = Array.isArray(materialsData) ? materialsData : materialsData?.results || [];
-        setMaterials(materialsArray);
+    fetchJSON(`/subjects/units/${id}/`)
+      .then((data) => {
+        setUnit(data.unit);
+        setMaterials(data.materials?.results || []);
       })
       .catch((err) => {
         logger.error("Error fetching unit detail:", err);
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""
+Connection latency and connection count with and without the Postgres pool.
+
+Simulates the Procfile's gunicorn setup against the database configured by
+the DB_* variables (cpa_academy.production): WORKERS worker processes with
+THREADS threads each, every worker exiting after MAX_REQUESTS requests and
+being replaced, like --max-requests recycling. A request runs one query
+between the request_started/request_finished connection handling Django
+does, and records how long the query took including connection setup and
+which backend PID served it.
+
+    persistent   DB_POOL=false: CONN_MAX_AGE persistent connection per thread
+    pool         DB_POOL=true: psycopg_pool connections shared by the threads
+
+"connections" is the number of distinct Postgres backends that served a
+request, i.e. how many connections were opened in total.
+
+Usage: DB_NAME=... DB_USER=... python bench_db_pool.py [--requests 2000]
+       [--workers 2] [--threads 2] [--max-requests 200]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MODES = {"persistent": "false", "pool": "true"}
+
+
+def run_worker(requests, threads):
+    import django
+    django.setup()
+    from django.core.signals import request_finished, request_started
+    from django.db import connection
+
+    latencies, pids = [], set()
+    lock = threading.Lock()
+
+    def handle(_):
+        request_started.send(sender=None)
+        try:
+            start = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_backend_pid()")
+                pid = cursor.fetchone()[0]
+            elapsed = time.perf_counter() - start
+        finally:
+            request_finished.send(sender=None)
+        with lock:
+            latencies.append(elapsed)
+            pids.add(pid)
+
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(handle, range(requests)))
+    print(json.dumps({"latencies": latencies, "pids": sorted(pids)}))
+
+
+def run_mode(mode, args):
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE="cpa_academy.production",
+        DJANGO_SECRET_KEY=os.getenv("DJANGO_SECRET_KEY", "bench"),
+        DB_POOL=MODES[mode],
+        GUNICORN_THREADS=str(args.threads),
+    )
+    latencies, pids, lock = [], set(), threading.Lock()
+    remaining = [args.requests]
+
+    def worker_slot():
+        # One gunicorn worker slot: start a worker, let it serve max_requests, replace it
+        while True:
+            with lock:
+                batch = min(args.max_requests, remaining[0])
+                remaining[0] -= batch
+            if batch <= 0:
+                return
+            out = subprocess.run(
+                [sys.executable, __file__, "--worker", str(batch), "--threads", str(args.threads)],
+                env=env, capture_output=True, text=True, check=True,
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+            )
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            with lock:
+                latencies.extend(result["latencies"])
+                pids.update(result["pids"])
+
+    slots = [threading.Thread(target=worker_slot) for _ in range(args.workers)]
+    for slot in slots:
+        slot.start()
+    for slot in slots:
+        slot.join()
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "max": latencies[-1] * 1000,
+        "connections": len(pids),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=2)
+    parser.add_argument("--max-requests", type=int, default=200)
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.threads)
+        return
+
+    print(f"{args.requests} requests, {args.workers} workers x {args.threads} threads, --max-requests {args.max_requests}")
+    print(f"{'mode':<11} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'connections':>12}")
+    for mode in MODES:
+        r = run_mode(mode, args)
+        print(f"{mode:<11} {r['p50']:>8.2f} {r['p99']:>8.2f} {r['max']:>8.2f} {r['connections']:>12}")
+
+
+if __name__ == "__main__":
+    main()
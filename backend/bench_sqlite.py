@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Read/write throughput of the SQLite database profiles.
+
+Runs the same mixed workload against a scratch database once per profile:
+threads that read materials and threads that, like the download view and
+quiz submission, read a row and then write (counter UPDATE + INSERT) in a
+transaction. Each profile runs in its own process so it gets fresh Django
+connections.
+
+    baseline   stock backend: rollback journal, deferred transactions
+    tuned      cpa_academy.sqlite_backend pragmas, IMMEDIATE transactions
+    queued     tuned plus serialize_writes
+
+Usage: python bench_sqlite.py [--seconds 5] [--readers 6] [--writers 4]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+PROFILES = {
+    "baseline": {"ENGINE": "django.db.backends.sqlite3", "OPTIONS": {"timeout": 5}},
+    "tuned": {"ENGINE": "cpa_academy.sqlite_backend", "OPTIONS": {"timeout": 5, "transaction_mode": "IMMEDIATE"}},
+    "queued": {"ENGINE": "cpa_academy.sqlite_backend", "OPTIONS": {"timeout": 5, "transaction_mode": "IMMEDIATE", "serialize_writes": True}},
+}
+ROWS = 5000
+
+
+def run_profile(name, path, seconds, readers, writers):
+    import django
+    from django.conf import settings
+    settings.configure(DATABASES={"default": {"NAME": path, **PROFILES[name]}}, INSTALLED_APPS=[], USE_TZ=True)
+    django.setup()
+    from django.db import OperationalError, connection, transaction
+
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE TABLE material (id INTEGER PRIMARY KEY, title TEXT, download_count INTEGER)")
+        cursor.execute("CREATE TABLE attempt (id INTEGER PRIMARY KEY, material_id INTEGER, score INTEGER, created REAL)")
+        cursor.executemany("INSERT INTO material VALUES (%s, %s, 0)", [(i, f"Material {i}") for i in range(ROWS)])
+    connection.close()
+
+    stop = time.monotonic() + seconds
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    guard = threading.Lock()
+
+    def read():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT id, title, download_count FROM material WHERE id = %s", [random.randrange(ROWS)])
+            cursor.fetchone()
+            cursor.execute("SELECT COUNT(*), AVG(score) FROM attempt WHERE material_id = %s", [random.randrange(ROWS)])
+            cursor.fetchone()
+        return "reads"
+
+    def write():
+        pk = random.randrange(ROWS)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT download_count FROM material WHERE id = %s", [pk])
+            cursor.fetchone()
+            cursor.execute("UPDATE material SET download_count = download_count + 1 WHERE id = %s", [pk])
+            cursor.execute("INSERT INTO attempt (material_id, score, created) VALUES (%s, %s, %s)", [pk, random.randrange(10), time.time()])
+        return "writes"
+
+    def worker(op):
+        done = {"reads": 0, "writes": 0, "locked": 0}
+        while time.monotonic() < stop:
+            try:
+                done[op()] += 1
+            except OperationalError:
+                done["locked"] += 1
+        connection.close()
+        with guard:
+            for key, value in done.items():
+                counts[key] += value
+
+    threads = [threading.Thread(target=worker, args=(read,)) for _ in range(readers)]
+    threads += [threading.Thread(target=worker, args=(write,)) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(json.dumps({key: value / seconds for key, value in counts.items()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=6)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--profile", choices=PROFILES, help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        run_profile(args.profile, args.path, args.seconds, args.readers, args.writers)
+        return
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s per profile")
+    print(f"{'profile':<10} {'reads/s':>10} {'writes/s':>10} {'locked/s':>10}")
+    for name in PROFILES:
+        with tempfile.TemporaryDirectory() as tmp:
+            out = subprocess.run(
+                [sys.executable, __file__, "--profile", name, "--path", os.path.join(tmp, "bench.sqlite3"),
+                 "--seconds", str(args.seconds), "--readers", str(args.readers), "--writers", str(args.writers)],
+                capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+            )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{name:<10} {result['reads']:>10.0f} {result['writes']:>10.0f} {result['locked']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
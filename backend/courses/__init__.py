@@ -1,2 +1,3 @@
 # Courses app package
 
+default_app_config = 'courses.apps.CoursesConfig'
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class CoursesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'courses'
+
+    def ready(self):
+        """Import signal handlers when the app is ready"""
+        import courses.signals  # noqa
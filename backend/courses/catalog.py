@@ -0,0 +1,115 @@
+"""
+Precompiled course catalog.
+
+Subjects and units with their material, question set and download counters
+(courses.counters) change rarely but are read on every home and units page
+load. The catalog snapshot holds them as plain data plus pre-encoded
+(Brotli and gzip compressed) response bodies for the default subject and
+unit listings. It is published
+in the shared cache under a catalog version counter (quizzes.versions), so
+every worker serves it without queries or serialization; courses.signals
+bumps the version whenever a subject, unit, material or question set
+changes, and the next read rebuilds it once (cpa_academy.singleflight:
+one request across all workers, the others wait for it). Downloads do not
+bump the version, so snapshots are also rebuilt after CATALOG_MAX_AGE
+seconds to pick up download counts.
+"""
+import threading
+import time
+from typing import NamedTuple, Optional
+from rest_framework.settings import api_settings
+from cpa_academy import singleflight
+from cpa_academy.db_routers import use_primary
+from cpa_academy.prerendered import Prerendered, prerender
+from quizzes.versions import get_version, bump_version_on_commit
+from .counters import COUNTER_FIELDS
+from .models import Subject, Unit
+from .serializers import UnitSerializer
+
+CATALOG_MAX_AGE = 60 * 5
+# How long an expired snapshot is still served while another request rebuilds it
+CATALOG_STALE_AGE = 60
+
+_local = {}
+_local_lock = threading.Lock()
+
+
+class CatalogSnapshot(NamedTuple):
+    version: int
+    subjects: list
+    units: list
+    subjects_blob: Optional[Prerendered]
+    units_blob: Prerendered
+
+
+def catalog_version():
+    return get_version("catalog", 0)
+
+
+def bump_catalog_version():
+    # Again on commit: a rebuild before then still reads the old rows
+    return bump_version_on_commit("catalog", 0)
+
+
+def _cache_key(version):
+    return f"courses:catalog:v2:{version}"
+
+
+def build_snapshot(version) -> CatalogSnapshot:
+    units_by_subject, units = {}, []
+    for unit in Unit.objects.select_related("subject").order_by("order", "id"):
+        row = dict(
+            UnitSerializer(unit).data,
+            **{name: getattr(unit, name) for name in COUNTER_FIELDS},
+            subject={"id": unit.subject_id, "name": unit.subject.name, "slug": unit.subject.slug},
+        )
+        units.append(row)
+        units_by_subject.setdefault(unit.subject_id, []).append(row)
+
+    subjects = []
+    for subject in Subject.objects.order_by("id"):
+        subject_units = sorted(units_by_subject.get(subject.id, []), key=lambda row: row["id"])
+        subjects.append({
+            "id": subject.id,
+            "name": subject.name,
+            "slug": subject.slug,
+            "units": [{k: v for k, v in row.items() if k != "subject"} for row in subject_units],
+            **{name: getattr(subject, name) for name in COUNTER_FIELDS},
+        })
+
+    # The paginated subject listing is host-independent only while it fits on one page
+    subjects_blob = None
+    if len(subjects) <= api_settings.PAGE_SIZE:
+        subjects_blob = prerender({"count": len(subjects), "next": None, "previous": None, "results": subjects})
+    return CatalogSnapshot(version, subjects, units, subjects_blob, prerender(units))
+
+
+def get_snapshot() -> CatalogSnapshot:
+    """The current catalog snapshot: one cache read per request when this worker already has it."""
+    version = catalog_version()
+    snapshot, expires = _local.get("snapshot", (None, 0))
+    if snapshot is not None and snapshot.version == version and time.monotonic() < expires:
+        return snapshot
+
+    def build():
+        with use_primary():
+            return tuple(build_snapshot(version)[1:])
+
+    # One worker rebuilds after a version bump; the others wait for its snapshot
+    snapshot = CatalogSnapshot(version, *singleflight.fetch(_cache_key(version), build, CATALOG_MAX_AGE, CATALOG_STALE_AGE))
+    with _local_lock:
+        _local["snapshot"] = (snapshot, time.monotonic() + CATALOG_MAX_AGE)
+    return snapshot
+
+
+def search_units(units, search):
+    """In-memory equivalent of the SearchFilter on the unit list: every term must match some field."""
+    terms = [term.casefold() for term in search.replace(",", " ").split()]
+    if not terms:
+        return units
+
+    def haystack(row):
+        values = (row["title"], row["code"], row["description"], row["subject"]["name"], row["subject"]["slug"])
+        return [str(value).casefold() for value in values]
+
+    return [row for row in units if all(any(term in value for value in haystack(row)) for term in terms)]
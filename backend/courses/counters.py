@@ -0,0 +1,139 @@
+"""
+Denormalized catalog counters on Unit and Subject.
+
+material_count   public materials of the unit / subject
+question_set_count   question sets of the unit / subject
+download_count   downloads of all materials of the unit / subject
+
+Counters are adjusted with relative UPDATEs (F() expressions) from the
+signal handlers in courses.signals, so concurrent writers never overwrite
+each other. Downloads are counted per unit in the shared cache instead
+(cache.incr), and the first download after DOWNLOAD_FLUSH_INTERVAL seconds
+writes them all with one UPDATE per unit and subject, so downloads do not
+queue on the hot Subject rows. The flush_downloads command writes them on
+a timer too, so the last downloads before a quiet spell are not left in the
+cache. recount() rebuilds every counter with set-based SQL to repair drift,
+e.g. after bulk operations that bypass signals or a flush that failed; it
+claims the pending downloads first, since Material.download_count (which
+it sums) already includes them.
+"""
+import logging
+from collections import Counter
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from .models import Subject, Unit
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ("material_count", "question_set_count", "download_count")
+DEFAULT_DOWNLOAD_FLUSH_INTERVAL = 10
+
+
+def adjust(unit_id, **deltas):
+    """Add `deltas` (counter name -> int) to a unit and its subject."""
+    changes = {name: F(name) + delta for name, delta in deltas.items() if delta}
+    if not changes or unit_id is None:
+        return
+    with transaction.atomic():
+        Unit.objects.filter(pk=unit_id).update(**changes)
+        Subject.objects.filter(units__id=unit_id).update(**changes)
+
+
+def _pending_key(unit_id):
+    return f"courses:downloads:{unit_id}"
+
+
+def record_download(unit_id):
+    """Count a download of one of the unit's materials; written to the database by the next flush."""
+    if unit_id is None:
+        return
+    key = _pending_key(unit_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+    # The lease expiring is the flush timer: one download per interval, across all workers, writes
+    interval = getattr(settings, "DOWNLOAD_FLUSH_INTERVAL", DEFAULT_DOWNLOAD_FLUSH_INTERVAL)
+    if cache.add("courses:downloads:flush", True, interval):
+        flush_downloads()
+
+
+def _claim_pending():
+    """Take the downloads counted since the last flush out of the cache. Returns {unit id: downloads}."""
+    keys = {_pending_key(pk): pk for pk in Unit.objects.values_list("id", flat=True)}
+    pending = {keys[key]: n for key, n in cache.get_many(list(keys)).items() if n}
+    for unit_id, n in pending.items():
+        # decr rather than delete keeps downloads counted meanwhile
+        cache.decr(_pending_key(unit_id), n)
+    return pending
+
+
+def _unclaim_pending(pending):
+    for unit_id, n in pending.items():
+        cache.incr(_pending_key(unit_id), n)
+
+
+def flush_downloads():
+    """Write the downloads counted since the last flush. Returns the number of units updated."""
+    pending = _claim_pending()
+    if not pending:
+        return 0
+    try:
+        by_subject = Counter()
+        with transaction.atomic():
+            for unit_id, subject_id in Unit.objects.filter(pk__in=pending).values_list("id", "subject_id"):
+                Unit.objects.filter(pk=unit_id).update(download_count=F("download_count") + pending[unit_id])
+                by_subject[subject_id] += pending[unit_id]
+            for subject_id, n in by_subject.items():
+                Subject.objects.filter(pk=subject_id).update(download_count=F("download_count") + n)
+    except Exception:
+        logger.exception("Writing download counts failed; they are kept for the next flush")
+        _unclaim_pending(pending)
+        return 0
+    return len(pending)
+
+
+def move_unit(unit, from_subject_id, to_subject_id):
+    """Carry a unit's counters over when it moves to another subject."""
+    counts = Unit.objects.filter(pk=unit.pk).values(*COUNTER_FIELDS).first()
+    if not counts:
+        return
+    with transaction.atomic():
+        Subject.objects.filter(pk=from_subject_id).update(**{k: F(k) - v for k, v in counts.items()})
+        Subject.objects.filter(pk=to_subject_id).update(**{k: F(k) + v for k, v in counts.items()})
+
+
+def _total(queryset, key, aggregate):
+    """Correlated subquery aggregating `queryset` rows whose `key` is the outer row's pk (0 when none)."""
+    return Coalesce(
+        Subquery(queryset.filter(**{key: OuterRef("pk")}).order_by().values(key).annotate(n=aggregate).values("n")[:1]),
+        Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def recount():
+    """Recompute all Unit and Subject counters from the source tables. Returns (units, subjects) updated."""
+    from materials.models import Material
+    from quizzes.models import QuestionSet
+
+    # Material.download_count already includes these, so a later flush must not add them again
+    pending = _claim_pending()
+    try:
+        with transaction.atomic():
+            units = Unit.objects.update(
+                material_count=_total(Material.objects.filter(is_public=True), "unit_id", Count("pk")),
+                question_set_count=_total(QuestionSet.objects.all(), "unit_id", Count("pk")),
+                download_count=_total(Material.objects.all(), "unit_id", Sum("download_count")),
+            )
+            subjects = Subject.objects.update(**{
+                name: _total(Unit.objects.all(), "subject_id", Sum(name)) for name in COUNTER_FIELDS
+            })
+    except Exception:
+        _unclaim_pending(pending)
+        raise
+    return units, subjects
@@ -0,0 +1,41 @@
+"""
+Management command to write the download counts buffered in the cache to
+the unit and subject counters. Downloads flush them as they come in; with
+--watch it keeps flushing every SECONDS (the counters worker process), so
+downloads made just before a quiet spell are written as well.
+"""
+import logging
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from courses.counters import flush_downloads
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Write buffered download counts to the unit and subject counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--watch',
+            type=int,
+            metavar='SECONDS',
+            help='Keep running and flush every SECONDS',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            try:
+                units = flush_downloads()
+            except Exception:
+                if not options['watch']:
+                    raise
+                logger.exception('Flushing download counts failed')
+            else:
+                if units or options['verbosity'] > 1:
+                    self.stdout.write(f'Flushed downloads of {units} units')
+            if not options['watch']:
+                return
+            time.sleep(options['watch'])
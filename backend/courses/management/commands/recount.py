@@ -0,0 +1,17 @@
+"""
+Management command to repair drift in the denormalized material, quiz and
+download counters on units and subjects, e.g. after bulk imports or manual
+database edits that bypass signals.
+"""
+from django.core.management.base import BaseCommand
+from courses.counters import recount
+from courses.catalog import bump_catalog_version
+
+
+class Command(BaseCommand):
+    help = 'Recompute unit and subject counters from materials, question sets and downloads'
+
+    def handle(self, *args, **options):
+        units, subjects = recount()
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f'Recounted {units} units and {subjects} subjects'))
@@ -0,0 +1,72 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:49
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    Subject = apps.get_model('courses', 'Subject')
+    Unit = apps.get_model('courses', 'Unit')
+    Material = apps.get_model('materials', 'Material')
+    QuestionSet = apps.get_model('quizzes', 'QuestionSet')
+
+    def total(queryset, key, aggregate):
+        return Coalesce(
+            Subquery(queryset.filter(**{key: OuterRef('pk')}).order_by().values(key).annotate(n=aggregate).values('n')[:1]),
+            Value(0),
+            output_field=IntegerField(),
+        )
+
+    Unit.objects.update(
+        material_count=total(Material.objects.filter(is_public=True), 'unit_id', Count('pk')),
+        question_set_count=total(QuestionSet.objects.all(), 'unit_id', Count('pk')),
+        download_count=total(Material.objects.all(), 'unit_id', Sum('download_count')),
+    )
+    Subject.objects.update(**{
+        name: total(Unit.objects.all(), 'subject_id', Sum(name))
+        for name in ('material_count', 'question_set_count', 'download_count')
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('materials', '0003_material_file_type'),
+        ('quizzes', '0009_quizattempt_client_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subject',
+            name='download_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='subject',
+            name='material_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='subject',
+            name='question_set_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='unit',
+            name='download_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='unit',
+            name='material_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='unit',
+            name='question_set_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
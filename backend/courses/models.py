@@ -4,6 +4,10 @@ from django.utils.text import slugify
 class Subject(models.Model):
     name = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
+    # Denormalized totals over the subject's units, maintained by courses.counters
+    material_count = models.IntegerField(default=0)
+    question_set_count = models.IntegerField(default=0)
+    download_count = models.IntegerField(default=0)
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -19,6 +23,10 @@ class Unit(models.Model):
     code = models.CharField(max_length=50, blank=True)
     description = models.TextField(blank=True)
     order = models.IntegerField(default=0)
+    # Denormalized counters maintained by courses.counters
+    material_count = models.IntegerField(default=0)
+    question_set_count = models.IntegerField(default=0)
+    download_count = models.IntegerField(default=0)
 
     def __str__(self):
         return self.title
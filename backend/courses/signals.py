@@ -0,0 +1,83 @@
+"""
+Signal handlers for the courses app.
+Keep the denormalized Unit/Subject counters up to date and invalidate the
+precompiled catalog whenever something it summarizes changes (once when
+the change is made and once when its transaction commits).
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from materials.models import Material
+from quizzes.models import QuestionSet
+from .models import Subject, Unit
+from .catalog import bump_catalog_version
+from . import counters
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+@receiver(post_save, sender=Unit)
+@receiver(post_delete, sender=Unit)
+@receiver(post_save, sender=Material)
+@receiver(post_delete, sender=Material)
+@receiver(post_save, sender=QuestionSet)
+@receiver(post_delete, sender=QuestionSet)
+def invalidate_catalog(sender, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(pre_save, sender=Unit)
+def remember_previous_subject(sender, instance, **kwargs):
+    instance._previous_subject_id = None
+    if instance.pk:
+        instance._previous_subject_id = (
+            Unit.objects.filter(pk=instance.pk).values_list("subject_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Unit)
+def move_unit_counters(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_subject_id", None)
+    if not created and previous is not None and previous != instance.subject_id:
+        counters.move_unit(instance, previous, instance.subject_id)
+
+
+@receiver(pre_save, sender=Material)
+def remember_counted_material(sender, instance, **kwargs):
+    instance._counted_as = None
+    if instance.pk:
+        instance._counted_as = Material.objects.filter(pk=instance.pk).values_list("unit_id", "is_public").first()
+
+
+@receiver(post_save, sender=Material)
+def count_material(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_counted_as", None)
+    if created or previous is None:
+        counters.adjust(instance.unit_id, material_count=int(instance.is_public), download_count=instance.download_count)
+        return
+    previous_unit, previous_public = previous
+    if previous_unit == instance.unit_id:
+        counters.adjust(instance.unit_id, material_count=int(instance.is_public) - int(previous_public))
+    else:
+        counters.adjust(previous_unit, material_count=-int(previous_public), download_count=-instance.download_count)
+        counters.adjust(instance.unit_id, material_count=int(instance.is_public), download_count=instance.download_count)
+
+
+@receiver(post_delete, sender=Material)
+def uncount_material(sender, instance, **kwargs):
+    counters.adjust(instance.unit_id, material_count=-int(instance.is_public), download_count=-instance.download_count)
+
+
+@receiver(post_save, sender=QuestionSet)
+def count_question_set(sender, instance, created, **kwargs):
+    # quizzes.signals records the unit the set was in before this save
+    previous = getattr(instance, "_previous_unit_id", None)
+    if created:
+        counters.adjust(instance.unit_id, question_set_count=1)
+    elif previous is not None and previous != instance.unit_id:
+        counters.adjust(previous, question_set_count=-1)
+        counters.adjust(instance.unit_id, question_set_count=1)
+
+
+@receiver(post_delete, sender=QuestionSet)
+def uncount_question_set(sender, instance, **kwargs):
+    counters.adjust(instance.unit_id, question_set_count=-1)
@@ -0,0 +1,53 @@
+import gzip
+import json
+from unittest import mock
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from courses import catalog
+from courses.models import Subject, Unit
+from materials.models import Material
+from quizzes.models import QuestionSet
+
+
+class CatalogSnapshotTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.subject = Subject.objects.create(name="Financial Accounting")
+        self.unit = Unit.objects.create(subject=self.subject, title="Consolidations", code="FA2", order=2)
+        self.other = Unit.objects.create(subject=self.subject, title="Leases", code="FA1", order=1)
+        QuestionSet.objects.create(unit=self.unit, title="Revision")
+
+    def test_listings_are_served_from_snapshot_without_queries(self):
+        resp = self.client.get("/api/subjects/units/")
+        self.assertEqual([row["code"] for row in resp.json()], ["FA1", "FA2"])
+        self.assertEqual(resp.json()[1]["question_set_count"], 1)
+
+        with self.assertNumQueries(0):
+            resp = self.client.get("/api/subjects/", HTTP_ACCEPT_ENCODING="gzip")
+            units = self.client.get("/api/subjects/units/", {"search": "lease"}).json()
+        body = json.loads(gzip.decompress(resp.content))
+        self.assertEqual(body["count"], 1)
+        self.assertEqual(body["results"][0]["question_set_count"], 1)
+        self.assertEqual([row["code"] for row in units], ["FA1"])
+
+        etag = resp["ETag"]
+        self.assertTrue(etag.endswith('-gzip"'))
+        self.assertEqual(self.client.get("/api/subjects/", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # The identity body is another representation with its own tag
+        self.assertEqual(self.client.get("/api/subjects/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_catalog_changes_rebuild_snapshot(self):
+        etag = self.client.get("/api/subjects/")["ETag"]
+        Material.objects.create(unit=self.other, title="Notes", file="materials/notes.pdf")
+        resp = self.client.get("/api/subjects/")
+        self.assertNotEqual(resp["ETag"], etag)
+        self.assertEqual(resp.json()["results"][0]["material_count"], 1)
+
+    def test_snapshot_rebuilt_before_commit_does_not_survive_it(self):
+        old = catalog.get_snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            Material.objects.create(unit=self.other, title="Notes", file="materials/notes.pdf")
+            # A concurrent request still sees the committed rows and caches them under the new version
+            with mock.patch.object(catalog, "build_snapshot", lambda version: old._replace(version=version)):
+                self.assertEqual(catalog.get_snapshot().units[0]["material_count"], 0)
+        self.assertEqual(self.client.get("/api/subjects/units/").json()[0]["material_count"], 1)
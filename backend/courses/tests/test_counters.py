@@ -0,0 +1,80 @@
+import io
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+from courses import counters
+from courses.models import Subject, Unit
+from materials.models import Material
+from quizzes.models import QuestionSet
+
+
+class CatalogCounterTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.subject = Subject.objects.create(name="Financial Accounting")
+        self.other_subject = Subject.objects.create(name="Audit")
+        self.unit = Unit.objects.create(subject=self.subject, title="Leases")
+        self.other = Unit.objects.create(subject=self.subject, title="Consolidations")
+
+    def counts(self, obj):
+        obj.refresh_from_db()
+        return obj.material_count, obj.question_set_count, obj.download_count
+
+    def test_signals_keep_counters_in_step(self):
+        material = Material.objects.create(unit=self.unit, title="Notes", file="materials/notes.pdf")
+        Material.objects.create(unit=self.unit, title="Draft", file="materials/draft.pdf", is_public=False)
+        qset = QuestionSet.objects.create(unit=self.unit, title="Revision")
+        self.assertEqual(self.counts(self.unit), (1, 1, 0))
+        self.assertEqual(self.counts(self.subject), (1, 1, 0))
+
+        self.client.get(f"/api/materials/{material.pk}/download/")
+        self.assertEqual(self.counts(self.unit), (1, 1, 1))
+        # Later downloads in the same interval wait for the next flush
+        self.client.get(f"/api/materials/{material.pk}/download/")
+        self.assertEqual(self.counts(self.unit), (1, 1, 1))
+        counters.flush_downloads()
+        self.assertEqual(self.counts(self.unit), (1, 1, 2))
+        self.assertEqual(self.counts(self.subject), (1, 1, 2))
+
+        material.refresh_from_db()
+        material.unit = self.other
+        material.save()
+        qset.unit = self.other
+        qset.save()
+        self.assertEqual(self.counts(self.unit), (0, 0, 0))
+        self.assertEqual(self.counts(self.other), (1, 1, 2))
+
+        self.other.subject = self.other_subject
+        self.other.save()
+        self.assertEqual(self.counts(self.subject), (0, 0, 0))
+        self.assertEqual(self.counts(self.other_subject), (1, 1, 2))
+
+        material.delete()
+        qset.delete()
+        self.assertEqual(self.counts(self.other_subject), (0, 0, 0))
+
+    def test_recount_repairs_drift(self):
+        Material.objects.create(unit=self.unit, title="Notes", file="materials/notes.pdf", download_count=4)
+        QuestionSet.objects.bulk_create([QuestionSet(unit=self.unit, title="Bulk")])
+        Unit.objects.filter(pk=self.unit.pk).update(material_count=9)
+        call_command("recount", stdout=io.StringIO())
+        self.assertEqual(self.counts(self.unit), (1, 1, 4))
+        self.assertEqual(self.counts(self.subject), (1, 1, 4))
+        self.assertEqual(self.counts(self.other), (0, 0, 0))
+
+    def test_recount_claims_buffered_downloads(self):
+        material = Material.objects.create(unit=self.unit, title="Notes", file="materials/notes.pdf")
+        for _ in range(3):
+            self.client.get(f"/api/materials/{material.pk}/download/")
+        self.assertEqual(self.counts(self.unit), (1, 0, 1))
+        counters.recount()
+        counters.flush_downloads()
+        self.assertEqual(self.counts(self.unit), (1, 0, 3))
+        self.assertEqual(self.counts(self.subject), (1, 0, 3))
+
+    def test_flush_command_writes_downloads_without_new_traffic(self):
+        material = Material.objects.create(unit=self.unit, title="Notes", file="materials/notes.pdf")
+        for _ in range(2):
+            self.client.get(f"/api/materials/{material.pk}/download/")
+        call_command("flush_downloads", stdout=io.StringIO())
+        self.assertEqual(self.counts(self.unit), (1, 0, 2))
@@ -0,0 +1,41 @@
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from courses.models import Subject, Unit
+from materials.models import Material
+from quizzes.models import QuestionSet, Question
+
+
+class UnitDetailTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        subject = Subject.objects.create(name="Financial Accounting")
+        self.unit = Unit.objects.create(subject=subject, title="Leases", code="FA1")
+        for i in range(14):
+            Material.objects.create(unit=self.unit, title=f"Notes {i}", file=f"materials/notes{i}.pdf", download_count=i)
+        Material.objects.create(unit=self.unit, title="Draft", file="materials/draft.pdf", is_public=False)
+        qset = QuestionSet.objects.create(unit=self.unit, title="Revision")
+        Question.objects.create(question_set=qset, text="Q", choices=["A", "B"], correct_choice="A", points=2)
+
+    def test_unit_page_in_one_request_with_fixed_queries(self):
+        self.client.get("/api/subjects/units/")  # warm the catalog snapshot
+        with self.assertNumQueries(3):  # material count + material page + set summaries
+            resp = self.client.get(f"/api/subjects/units/{self.unit.id}/")
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(data["unit"]["code"], "FA1")
+        self.assertEqual(data["subject"]["name"], "Financial Accounting")
+        self.assertEqual(data["materials"]["count"], 14)
+        self.assertEqual(data["materials"]["results"][0]["title"], "Notes 13")
+        self.assertEqual(data["question_sets"][0]["total_points"], 2)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(f"/api/subjects/units/{self.unit.id}/").json(), data)
+        page = self.client.get(f"/api/subjects/units/{self.unit.id}/", {"page": 2})
+        self.assertEqual(len(page.json()["materials"]["results"]), 2)
+
+    def test_unknown_unit_and_invalidation(self):
+        self.assertEqual(self.client.get("/api/subjects/units/999999/").status_code, 404)
+        self.client.get(f"/api/subjects/units/{self.unit.id}/")
+        QuestionSet.objects.create(unit=self.unit, title="Mock")
+        resp = self.client.get(f"/api/subjects/units/{self.unit.id}/")
+        self.assertEqual(len(resp.json()["question_sets"]), 2)
@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import SubjectListView, UnitListView
+from .views import SubjectListView, UnitListView, UnitDetailView
 
 urlpatterns = [
     path("", SubjectListView.as_view(), name="subjects_list"),
     path("units/", UnitListView.as_view(), name="units_list"),
+    path("units/<int:pk>/", UnitDetailView.as_view(), name="unit_detail"),
 ]
@@ -1,16 +1,86 @@
+import hashlib
+from django.http import Http404
 from rest_framework import generics, filters, permissions
-from .models import Subject, Unit
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from cpa_academy import singleflight
+from cpa_academy.db_routers import ReplicaReadMixin, use_primary
+from cpa_academy.prerendered import prerender, prerendered_response
+from materials.models import Material
+from materials.serializers import MaterialSerializer
+from quizzes.models import QuestionSet
+from quizzes.serializers import QuestionSetSummarySerializer
 from .serializers import SubjectSerializer, UnitSerializer
+from . import catalog
 
-class SubjectListView(generics.ListAPIView):
-    queryset = Subject.objects.prefetch_related("units").all()
+# Catalog responses may be stored but must be revalidated with their ETag
+CATALOG_CACHE_CONTROL = "public, no-cache"
+# Unit pages also show download and attempt figures, which do not bump the catalog version
+UNIT_DETAIL_TIMEOUT = 60
+
+class SubjectListView(ReplicaReadMixin, generics.ListAPIView):
+    """Subjects with their units, served from the precompiled catalog snapshot."""
     serializer_class = SubjectSerializer
     permission_classes = [permissions.AllowAny]
 
-class UnitListView(generics.ListAPIView):
-    queryset = Unit.objects.select_related("subject").all().order_by("order")
+    def list(self, request, *args, **kwargs):
+        snapshot = catalog.get_snapshot()
+        if snapshot.subjects_blob is not None and not request.query_params:
+            return prerendered_response(request, *snapshot.subjects_blob, CATALOG_CACHE_CONTROL)
+        return self.get_paginated_response(self.paginate_queryset(snapshot.subjects))
+
+class UnitListView(ReplicaReadMixin, generics.ListAPIView):
+    """All units in order; ?search= filters title, code, description and subject in memory."""
     serializer_class = UnitSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [filters.SearchFilter]
-    search_fields = ["title", "code", "description", "subject__name", "subject__slug"]
     pagination_class = None
+
+    def list(self, request, *args, **kwargs):
+        snapshot = catalog.get_snapshot()
+        search = request.query_params.get(filters.SearchFilter.search_param, "")
+        if search:
+            return Response(catalog.search_units(snapshot.units, search))
+        return prerendered_response(request, *snapshot.units_blob, CATALOG_CACHE_CONTROL)
+
+class UnitDetailView(ReplicaReadMixin, APIView):
+    """
+    Everything the unit page shows in one response: the unit and its subject
+    (from the catalog snapshot), a page of its public materials and its
+    question set summaries. Responses are cached per catalog version, already
+    rendered and compressed.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, pk):
+        snapshot = catalog.get_snapshot()
+        unit = next((row for row in snapshot.units if row["id"] == pk), None)
+        if unit is None:
+            raise Http404("No Unit matches the given query.")
+        # Keyed on the full URL: pagination links and file URLs are absolute
+        url = hashlib.sha256(request.build_absolute_uri().encode()).hexdigest()[:32]
+        key = f"courses:unit-detail:v2:{snapshot.version}:{url}"
+
+        def build():
+            with use_primary():
+                return prerender(self._build(request, unit))
+
+        blob = singleflight.fetch(key, build, UNIT_DETAIL_TIMEOUT, UNIT_DETAIL_TIMEOUT)
+        return prerendered_response(request, *blob, f"public, max-age={UNIT_DETAIL_TIMEOUT}")
+
+    def _build(self, request, unit):
+        paginator = PageNumberPagination()
+        materials = (
+            Material.objects.select_related("unit").filter(unit_id=unit["id"], is_public=True)
+            .order_by("-download_count", "id")
+        )
+        page = paginator.paginate_queryset(materials, request, view=self)
+        question_sets = QuestionSet.objects.with_summary().filter(unit_id=unit["id"]).order_by("id")
+        return {
+            "unit": {k: v for k, v in unit.items() if k != "subject"},
+            "subject": unit["subject"],
+            "materials": paginator.get_paginated_response(
+                MaterialSerializer(page, many=True, context={"request": request}).data
+            ).data,
+            "question_sets": QuestionSetSummarySerializer(question_sets, many=True).data,
+        }
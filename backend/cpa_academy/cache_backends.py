@@ -0,0 +1,240 @@
+"""
+Two-tier cache: a bounded per-process LRU in front of a shared cache.
+
+The shared tier (LOCATION names another CACHES alias: Redis, file-based,
+...) is what every gunicorn worker sees. Reads of keys starting with one of
+OPTIONS["LOCAL_KEY_PREFIXES"] are also kept in process memory for at most
+LOCAL_TIMEOUT seconds, so hot lookups skip the shared cache's network hop or
+file read. Writes go to the shared tier and update this process's copy;
+other processes may serve their copy until it expires.
+
+Only data that is immutable once written should be listed in
+LOCAL_KEY_PREFIXES: entries stored under a version number
+(quizzes.versions) are the intended use. The version counters themselves,
+rate-limit buckets, sessions and anything else updated in place are left
+out and always read from the shared tier, so bumping a version invalidates
+every worker's local entries at once (broadcast invalidation): the next
+read builds a key nobody has cached.
+
+get_or_set() is single-flight within the process: when a key is missing,
+one thread computes it while the others wait for that result instead of
+all recomputing it. stats() reports hits, misses, evictions and coalesced
+waits of this process.
+
+Local entries are pickled like LocMemCache's, so callers never share a
+mutable object across threads.
+"""
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+_MISSING = object()
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class LocalStore:
+    """Process-wide LRU shared by the per-thread TwoTierCache instances of one alias."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (expires, pickled value)
+        self.stats = Counter()
+        self.lock = threading.Lock()
+        self.flights = {}
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] <= time.monotonic():
+                del self.entries[key]
+                self.stats["expired"] += 1
+                return _MISSING
+            self.entries.move_to_end(key)
+        return pickle.loads(entry[1])
+
+    def put(self, key, value, ttl):
+        if ttl <= 0:
+            self.discard(key)
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, pickled)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.stats[name] += n
+
+    @contextmanager
+    def flight(self, key):
+        """Serialize the threads of this process computing the same key."""
+        with self.lock:
+            entry = self.flights.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self.lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.flights[key]
+
+
+class TwoTierCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.shared_alias = location
+        self.local_timeout = float(options.get("LOCAL_TIMEOUT", 10))
+        self.local_prefixes = tuple(options.get("LOCAL_KEY_PREFIXES", ()))
+        with _stores_lock:
+            self.store = _stores.setdefault(location, LocalStore(int(options.get("LOCAL_MAX_ENTRIES", 1000))))
+
+    @property
+    def shared(self):
+        # caches[] hands out one backend instance per thread
+        return caches[self.shared_alias]
+
+    def is_local(self, key):
+        return bool(self.local_prefixes) and key.startswith(self.local_prefixes)
+
+    def local_ttl(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self.local_timeout
+        return min(self.local_timeout, timeout)
+
+    def stats(self):
+        with self.store.lock:
+            stats = dict(self.store.stats)
+            entries = len(self.store.entries)
+        return {
+            "local_hits": stats.get("local_hits", 0),
+            "shared_hits": stats.get("shared_hits", 0),
+            "misses": stats.get("misses", 0),
+            "evictions": stats.get("evictions", 0),
+            "expired": stats.get("expired", 0),
+            "coalesced": stats.get("coalesced", 0),
+            "entries": entries,
+            "max_entries": self.store.max_entries,
+        }
+
+    def get(self, key, default=None, version=None):
+        local = self.is_local(key)
+        if local:
+            value = self.store.get((key, version))
+            if value is not _MISSING:
+                self.store.count("local_hits")
+                return value
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self.store.count("misses")
+            return default
+        self.store.count("shared_hits")
+        if local:
+            self.store.put((key, version), value, self.local_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        found, remote = {}, []
+        for key in keys:
+            value = self.store.get((key, version)) if self.is_local(key) else _MISSING
+            if value is _MISSING:
+                remote.append(key)
+            else:
+                found[key] = value
+        self.store.count("local_hits", len(found))
+        if remote:
+            fetched = self.shared.get_many(remote, version=version)
+            self.store.count("shared_hits", len(fetched))
+            self.store.count("misses", len(remote) - len(fetched))
+            for key, value in fetched.items():
+                if self.is_local(key):
+                    self.store.put((key, version), value, self.local_timeout)
+            found.update(fetched)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        if self.is_local(key):
+            self.store.put((key, version), value, self.local_ttl(timeout))
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if self.is_local(key) and key not in failed:
+                self.store.put((key, version), value, self.local_ttl(timeout))
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if self.is_local(key):
+            if added:
+                self.store.put((key, version), value, self.local_ttl(timeout))
+            else:
+                self.store.discard((key, version))
+        return added
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        value = self.get(key, version=version)
+        if value is not None:
+            return value
+        with self.store.flight((key, version)):
+            value = self.get(key, version=version)
+            if value is not None:
+                self.store.count("coalesced")
+                return value
+            if callable(default):
+                default = default()
+            self.add(key, default, timeout, version=version)
+            return self.get(key, default, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.store.discard((key, version))
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.store.discard((key, version))
+        self.shared.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        if self.is_local(key) and self.store.get((key, version)) is not _MISSING:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.store.discard((key, version))
+        return self.shared.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        self.store.discard((key, version))
+        return self.shared.decr(key, delta, version=version)
+
+    def clear(self):
+        self.store.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
@@ -0,0 +1,100 @@
+"""
+Brotli and gzip compression of JSON responses.
+
+CompressionMiddleware compresses application/json responses of at least
+COMPRESSION_MIN_SIZE bytes (default 1024) for clients that accept Brotli
+("br", when the brotli package is installed) or gzip, preferring Brotli.
+Streaming responses (file downloads) and responses that already carry a
+Content-Encoding are left alone.
+
+Bodies that are rendered once and cached (cpa_academy.prerendered) are
+compressed at the highest levels when they are built, by precompress(), and
+their variants stored next to them, so serving them costs no CPU; the
+middleware only compresses what is rendered per request, at faster levels.
+"""
+import gzip
+import re
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+DEFAULT_MIN_SIZE = 1024
+# (per-request level, precompressed level)
+BROTLI_QUALITY = (4, 11)
+GZIP_LEVEL = (6, 9)
+
+_q_value = re.compile(r"q\s*=\s*([0-9.]+)")
+
+
+def available_encodings():
+    """Supported encodings in order of preference."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(body, encoding, precompressed=False):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY[precompressed])
+    # mtime=0 keeps the bytes identical across workers
+    return gzip.compress(body, compresslevel=GZIP_LEVEL[precompressed], mtime=0)
+
+
+def precompress(body):
+    """{encoding: bytes} for a body that will be served many times; variants that do not shrink it are skipped."""
+    variants = {}
+    for encoding in available_encodings():
+        compressed = compress(body, encoding, precompressed=True)
+        if len(compressed) < len(body):
+            variants[encoding] = compressed
+    return variants
+
+
+def negotiate(accept_encoding, encodings):
+    """The encoding of `encodings` (in preference order) the Accept-Encoding header ranks highest, or None."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        match = _q_value.search(params)
+        try:
+            accepted[name.strip()] = float(match.group(1)) if match else 1.0
+        except ValueError:
+            continue
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+        if not response.get("Content-Type", "").startswith("application/json"):
+            return response
+        if len(response.content) < getattr(settings, "COMPRESSION_MIN_SIZE", DEFAULT_MIN_SIZE):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate(request.headers.get("Accept-Encoding", ""), available_encodings())
+        if encoding is None:
+            return response
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        # The compressed bytes differ from the identity representation a strong ETag names
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
@@ -1,9 +1,15 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.cache import cache
+from django.db.models import Count
 from users.models import User
 from courses.models import Subject, Unit
 from materials.models import Material
-from quizzes.models import QuestionSet, Question, QuizAttempt
+from quizzes.models import QuestionSet, Question, QuizAttempt, QuestionStatistics, QuestionSetStatistics, RegradeJob
+from quizzes.regrading import start_regrade
+from .paginators import EstimatedCountPaginator, estimated_table_count
+
+HEADER_STATS_TIMEOUT = 60 * 5
 
 # Customize Django admin site headers and titles
 admin.site.site_header = "CPA Web Administration"
@@ -16,6 +22,12 @@ try:
 except admin.sites.NotRegistered:
     pass
 
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelists that must stay fast with millions of rows: no full-table COUNT(*) per page load."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
 # Register models for admin interface
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -23,6 +35,8 @@ class UserAdmin(BaseUserAdmin):
     list_filter = ('is_admin', 'is_staff', 'is_superuser', 'is_active', 'date_joined', 'last_login')
     search_fields = ('username', 'email', 'first_name', 'last_name')
     ordering = ('-date_joined',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     # Add is_admin to the fieldsets
     fieldsets = BaseUserAdmin.fieldsets + (
@@ -33,26 +47,38 @@ class UserAdmin(BaseUserAdmin):
         if extra_context is None:
             extra_context = {}
         extra_context = dict(extra_context)
-        extra_context['total_users'] = User.objects.count()
-        extra_context['users_logged_in'] = User.objects.filter(last_login__isnull=False).count()
+        extra_context.update(self.header_stats())
         return super().changelist_view(request, extra_context=extra_context)
 
+    def header_stats(self):
+        # Shared by every admin page load for a few minutes instead of two counts per load
+        def compute():
+            return {
+                'total_users': estimated_table_count(User),
+                'users_logged_in': User.objects.filter(last_login__isnull=False).count(),
+            }
+        return cache.get_or_set('admin:user-header-stats', compute, HEADER_STATS_TIMEOUT)
+
 @admin.register(Subject)
 class SubjectAdmin(admin.ModelAdmin):
-    list_display = ('name', 'slug')
+    list_display = ('name', 'slug', 'material_count', 'question_set_count', 'download_count')
+    readonly_fields = ('material_count', 'question_set_count', 'download_count')
     prepopulated_fields = {'slug': ('name',)}
     search_fields = ('name',)
 
 @admin.register(Unit)
 class UnitAdmin(admin.ModelAdmin):
-    list_display = ('title', 'subject', 'code', 'order')
+    list_display = ('title', 'subject', 'code', 'order', 'material_count', 'question_set_count', 'download_count')
+    list_select_related = ('subject',)
+    readonly_fields = ('material_count', 'question_set_count', 'download_count')
     list_filter = ('subject',)
     search_fields = ('title', 'code', 'description')
     ordering = ('subject', 'order')
 
 @admin.register(Material)
-class MaterialAdmin(admin.ModelAdmin):
+class MaterialAdmin(LargeTableAdmin):
     list_display = ('title', 'unit', 'file_type', 'uploaded_by', 'upload_date', 'download_count', 'is_public')
+    list_select_related = ('unit', 'uploaded_by')
     list_filter = ('is_public', 'file_type', 'upload_date', 'unit__subject')
     search_fields = ('title', 'description')
     ordering = ('-upload_date',)
@@ -60,16 +86,30 @@ class MaterialAdmin(admin.ModelAdmin):
 @admin.register(QuestionSet)
 class QuestionSetAdmin(admin.ModelAdmin):
     list_display = ('title', 'unit', 'question_count')
+    list_select_related = ('unit',)
     list_filter = ('unit__subject',)
     search_fields = ('title', 'description')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(question_count=Count('questions'))
     
     def question_count(self, obj):
-        return obj.questions.count()
+        return obj.question_count
     question_count.short_description = 'Questions'
+    question_count.admin_order_field = 'question_count'
+
+    @admin.action(description='Regrade attempts against the current answers')
+    def regrade_attempts(self, request, queryset):
+        # Regrades can outlive the request timeout; the regrade worker runs queued jobs
+        for qset in queryset:
+            job = start_regrade(qset.pk)
+            self.message_user(request, f'{qset.title}: queued regrade job {job.pk}.')
+    actions = ['regrade_attempts']
 
 @admin.register(Question)
-class QuestionAdmin(admin.ModelAdmin):
+class QuestionAdmin(LargeTableAdmin):
     list_display = ('text_preview', 'question_set', 'points', 'correct_choice')
+    list_select_related = ('question_set',)
     list_filter = ('question_set__unit__subject', 'points')
     search_fields = ('text',)
     
@@ -77,9 +117,55 @@ class QuestionAdmin(admin.ModelAdmin):
         return obj.text[:50] + '...' if len(obj.text) > 50 else obj.text
     text_preview.short_description = 'Question'
 
+    @admin.action(description='Regrade attempts that answered the selected questions')
+    def regrade_attempts(self, request, queryset):
+        by_set = {}
+        for set_id, question_id in queryset.values_list('question_set_id', 'id'):
+            by_set.setdefault(set_id, []).append(question_id)
+        for set_id, question_ids in by_set.items():
+            job = start_regrade(set_id, question_ids)
+            self.message_user(request, f'Question set {set_id}: queued regrade job {job.pk}.')
+    actions = ['regrade_attempts']
+
 @admin.register(QuizAttempt)
-class QuizAttemptAdmin(admin.ModelAdmin):
+class QuizAttemptAdmin(LargeTableAdmin):
     list_display = ('user', 'question_set', 'score', 'total', 'started_at', 'finished_at')
+    list_select_related = ('user', 'question_set')
+    raw_id_fields = ('user', 'question_set')
     list_filter = ('question_set__unit__subject', 'started_at')
     search_fields = ('user__username', 'question_set__title')
     ordering = ('-started_at',)
+
+@admin.register(QuestionStatistics)
+class QuestionStatisticsAdmin(admin.ModelAdmin):
+    list_display = ('question', 'responses', 'difficulty', 'discrimination', 'updated_at')
+    list_select_related = ('question',)
+    list_filter = ('question__question_set__unit__subject',)
+    search_fields = ('question__text',)
+    ordering = ('difficulty',)
+    readonly_fields = [f.name for f in QuestionStatistics._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(QuestionSetStatistics)
+class QuestionSetStatisticsAdmin(admin.ModelAdmin):
+    list_display = ('question_set', 'attempts', 'mean_raw', 'kr20', 'updated_at')
+    list_select_related = ('question_set',)
+    list_filter = ('question_set__unit__subject',)
+    search_fields = ('question_set__title',)
+    readonly_fields = [f.name for f in QuestionSetStatistics._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(RegradeJob)
+class RegradeJobAdmin(admin.ModelAdmin):
+    list_display = ('question_set', 'attempts_regraded', 'answers_changed', 'last_attempt_id', 'created_at', 'finished_at')
+    list_select_related = ('question_set',)
+    list_filter = ('finished_at',)
+    ordering = ('-created_at',)
+    readonly_fields = [f.name for f in RegradeJob._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,214 @@
+"""
+Read replicas.
+
+DATABASES aliases named "replica" or "replica_<n>" are read replicas of
+"default". ReplicaRouter sends a read to one of them only when
+
+- the running view opted in (ReplicaReadMixin, or the replica_reads()
+  decorator for function views), so writes and everything outside the
+  read-heavy listings keep reading from the primary;
+- the request has not written, and the client has not written in the last
+  REPLICA_PIN_SECONDS, so users read their own writes
+  (ReplicaPinningMiddleware records the pin in the shared cache). Clients
+  are told apart by user (session or JWT) and, when anonymous, by IP as
+  DRF's throttles see it (NUM_PROXIES), so one writer does not pin everyone
+  behind a shared address. An anonymous write (a registration, a login)
+  pins the address as well as the user it signed in, so the client's first
+  requests with its new token read it too;
+- no transaction is open on the primary;
+- the replica is at most REPLICA_MAX_LAG seconds behind. Lag is measured
+  per process every REPLICA_LAG_CHECK_INTERVAL seconds; a replica that
+  cannot be reached counts as infinitely behind until the next check.
+
+One replica is chosen per request so its reads see a consistent state.
+Everything else, including all writes, uses the primary. Code that caches
+data under a version key wraps its build in use_primary(): built from a
+lagging replica, the stale data would otherwise outlive the lag.
+
+Without replica aliases (the default) the router and middleware do nothing.
+Locally, SQLITE_REPLICA_PATH adds a second SQLite file as "replica".
+"""
+import functools
+import hashlib
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.throttling import BaseThrottle
+
+# Seconds since the last replayed transaction, or 0 when the replica has replayed all it received
+POSTGRES_LAG_SQL = """
+    SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END
+"""
+
+_state = ContextVar("replica_state", default=None)
+_force_primary = ContextVar("replica_force_primary", default=False)
+_lag = {}
+_lag_lock = threading.Lock()
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias == "replica" or alias.startswith("replica_")]
+
+
+def measure_lag(alias):
+    """Replication lag of a replica in seconds (0 for backends without replication info)."""
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(POSTGRES_LAG_SQL)
+        value = cursor.fetchone()[0]
+    return float(value or 0)
+
+
+def replica_lag(alias):
+    interval = getattr(settings, "REPLICA_LAG_CHECK_INTERVAL", 5)
+    lag, checked = _lag.get(alias, (None, 0.0))
+    now = time.monotonic()
+    if lag is None or now - checked >= interval:
+        try:
+            lag = measure_lag(alias)
+        except DatabaseError:
+            lag = math.inf
+        with _lag_lock:
+            _lag[alias] = (lag, now)
+    return lag
+
+
+def pick_replica():
+    max_lag = getattr(settings, "REPLICA_MAX_LAG", 5)
+    healthy = [alias for alias in replica_aliases() if replica_lag(alias) <= max_lag]
+    return random.choice(healthy) if healthy else None
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary inside the block, whatever the view allows."""
+    token = _force_primary.set(True)
+    try:
+        yield
+    finally:
+        _force_primary.reset(token)
+
+
+@contextmanager
+def _replica_reads_allowed():
+    state = _state.get()
+    if state is None:
+        yield
+        return
+    previous, state["replica_reads"] = state["replica_reads"], True
+    try:
+        yield
+    finally:
+        state["replica_reads"] = previous
+
+
+def replica_reads(view):
+    """Decorate a function view so its reads may go to a replica."""
+    @functools.wraps(view)
+    def wrapped(request, *args, **kwargs):
+        with _replica_reads_allowed():
+            return view(request, *args, **kwargs)
+    return wrapped
+
+
+class ReplicaReadMixin:
+    """View mixin: reads made while handling the request may go to a replica."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with _replica_reads_allowed():
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state["replica_reads"] or state["pinned"] or _force_primary.get():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        if state["replica"] is None:
+            state["replica"] = pick_replica() or ""
+        return state["replica"] or None
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state["pinned"] = state["wrote"] = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+
+def _user_id(request):
+    """The signed-in user's id from the request's session or JWT, without loading the user."""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    session = getattr(request, "session", None)
+    if session is not None and session.get(SESSION_KEY):
+        return session[SESSION_KEY]
+    # Imported here: routers load before the auth models are ready
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    if not header:
+        return None
+    try:
+        raw = auth.get_raw_token(header)
+        return auth.get_validated_token(raw).get(jwt_settings.USER_ID_CLAIM) if raw is not None else None
+    except AuthenticationFailed:
+        return None
+
+
+def _pin_key(client):
+    return f"db:primary-pin:{hashlib.sha256(client.encode()).hexdigest()[:32]}"
+
+
+def _pin_keys(request):
+    """(user key or None when anonymous, address key) of the request's client."""
+    user_id = _user_id(request)
+    user_key = _pin_key(f"user:{user_id}") if user_id is not None else None
+    return user_key, _pin_key(f"ip:{BaseThrottle().get_ident(request)}")
+
+
+class ReplicaPinningMiddleware:
+    """Tracks per-request routing state and pins clients that wrote to the primary for a while."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_aliases():
+            return self.get_response(request)
+        user_key, ip_key = _pin_keys(request)
+        # Signed-in clients also honour their address's pin, set by an anonymous write such as signing up
+        pinned = any(cache.get_many([key for key in (user_key, ip_key) if key]).values())
+        state = {"replica_reads": False, "pinned": pinned, "wrote": False, "replica": None}
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state["wrote"]:
+            keys = {ip_key} if user_key is None else set()
+            # The view may have authenticated the request (DRF sets request.user), e.g. a login
+            signed_in_key = _pin_keys(request)[0]
+            if signed_in_key:
+                keys.add(signed_in_key)
+            cache.set_many(dict.fromkeys(keys, True), getattr(settings, "REPLICA_PIN_SECONDS", 5))
+        return response
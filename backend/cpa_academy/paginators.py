@@ -0,0 +1,50 @@
+"""
+Admin changelist paginator for large tables.
+
+Django's Paginator runs SELECT COUNT(*) over the whole changelist queryset
+on every page load, which takes seconds on tables with millions of rows
+(QuizAttempt, QuizAnswer, Material). EstimatedCountPaginator counts an
+unfiltered changelist from the planner's row estimate on PostgreSQL
+(pg_class.reltuples, kept current by autovacuum/ANALYZE) and elsewhere from
+a COUNT(*) cached for COUNT_CACHE_TIMEOUT seconds. Filtered and searched
+changelists are narrower and keep the exact count. Small tables, where the
+estimate would be visibly off, are always counted exactly.
+
+Use it together with ModelAdmin.show_full_result_count = False, which drops
+the second, unfiltered count the changelist header shows next to filtered
+results.
+"""
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+COUNT_CACHE_TIMEOUT = 60 * 5
+EXACT_COUNT_BELOW = 10_000
+
+
+def estimated_table_count(model, using="default"):
+    """Approximate row count of a model's table: reltuples on PostgreSQL, else a cached COUNT(*)."""
+    table = model._meta.db_table
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [connection.ops.quote_name(table)])
+            row = cursor.fetchone()
+        # reltuples is -1 (or 0) until the table has been vacuumed or analyzed
+        if row and row[0] > 0:
+            return row[0]
+    return cache.get_or_set(f"admin:count:{using}:{table}", lambda: model._default_manager.using(using).count(), COUNT_CACHE_TIMEOUT)
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, "query", None)
+        if query is None or query.where or query.distinct or query.combinator:
+            return super().count
+        estimate = estimated_table_count(queryset.model, queryset.db)
+        if estimate < EXACT_COUNT_BELOW:
+            return super().count
+        return estimate
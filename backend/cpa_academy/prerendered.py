@@ -0,0 +1,48 @@
+"""
+Serving response bodies that were rendered (and compressed) ahead of time.
+
+Used for payloads that change rarely and are read on every page load, such
+as the course catalog and question set contents: the view only picks the
+encoding and sets validators, it never serializes or compresses. The
+Brotli/gzip variants are built once by cpa_academy.compression.precompress()
+and cached with the body.
+"""
+import hashlib
+from typing import Dict, NamedTuple
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+from .compression import negotiate, precompress
+
+
+class Prerendered(NamedTuple):
+    body: bytes
+    compressed: Dict[str, bytes]
+    etag: str
+
+
+def prerender(data) -> Prerendered:
+    """Render `data` as JSON with its compressed variants and an ETag."""
+    body = JSONRenderer().render(data)
+    return Prerendered(body, precompress(body), hashlib.sha256(body).hexdigest()[:16])
+
+
+def prerendered_response(request, body, compressed, etag, cache_control, content_type="application/json"):
+    """
+    Return the best compressed variant or the plain body (304 when the
+    client's If-None-Match names it). Each encoding is a different
+    representation, so compressed variants get their own ETag ("<etag>-br").
+    """
+    encoding = negotiate(request.headers.get("Accept-Encoding", ""), [e for e in ("br", "gzip") if e in compressed])
+    etag = f'"{etag}-{encoding}"' if encoding is not None else f'"{etag}"'
+    if etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponse(status=304)
+    elif encoding is not None:
+        response = HttpResponse(compressed[encoding], content_type=content_type)
+        response["Content-Encoding"] = encoding
+    else:
+        response = HttpResponse(body, content_type=content_type)
+    response["ETag"] = etag
+    response["Cache-Control"] = cache_control
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
@@ -20,6 +20,13 @@ SECURE_HSTS_INCLUDE_SUBDOMAINS = True
 SECURE_HSTS_PRELOAD = True
 
 # Database configuration for production
+# psycopg 3 with Django's connection pool: each gunicorn worker keeps up to
+# DB_POOL_MAX_SIZE connections open and request threads borrow them, so only
+# a recycled (--max-requests) or cold worker pays for TCP+TLS+auth, and only
+# for DB_POOL_MIN_SIZE connections that the pool opens in the background.
+# DB_POOL=false falls back to one persistent connection per thread (CONN_MAX_AGE).
+DB_POOL = os.getenv('DB_POOL', 'true').lower() == 'true'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -36,6 +43,44 @@ DATABASES = {
     }
 }
 
+if DB_POOL:
+    from psycopg_pool import ConnectionPool
+
+    # The pool owns connection lifetime; Django requires CONN_MAX_AGE = 0 with it
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = False
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+        # One per gunicorn thread plus headroom for management threads
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', str(int(os.getenv('GUNICORN_THREADS', '2')) + 2))),
+        'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+        'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+        # Test each connection as it is handed out (SELECT 1 round trip)
+        'check': ConnectionPool.check_connection if os.getenv('DB_POOL_CHECK', 'true').lower() == 'true' else None,
+    }
+
+# Streaming read replicas of the primary: DB_REPLICA_HOSTS=host1,host2 (same
+# database, credentials and port unless DB_REPLICA_PORT is set). They become
+# "replica", "replica_2", ... for cpa_academy.db_routers.ReplicaRouter.
+_replica_hosts = [host.strip() for host in os.getenv('DB_REPLICA_HOSTS', '').split(',') if host.strip()]
+for _index, _host in enumerate(_replica_hosts, start=1):
+    DATABASES['replica' if _index == 1 else f'replica_{_index}'] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'OPTIONS': {**DATABASES['default']['OPTIONS']},
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# The platform's load balancer adds the client address to X-Forwarded-For
+REST_FRAMEWORK["NUM_PROXIES"] = int(os.getenv("NUM_PROXIES", "1"))
+
+# Shared cache: Redis (see settings). Every worker must see the same quiz
+# sessions, counters and locks, which per-process memory cannot provide.
+if not os.getenv('REDIS_URL'):
+    raise RuntimeError("REDIS_URL must be set in production.")
+
 # Static files
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
@@ -82,10 +82,12 @@ LOGOUT_REDIRECT_URL = os.environ.get("LOGOUT_REDIRECT_URL", "https://cpa-website
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "cpa_academy.compression.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
+    "cpa_academy.db_routers.ReplicaPinningMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "allauth.account.middleware.AccountMiddleware",
@@ -111,17 +113,73 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "cpa_academy.wsgi.application"
 
+# SQLite with WAL and tuned pragmas (cpa_academy/sqlite_backend). IMMEDIATE
+# transactions take the write lock up front, so they wait for it instead of
+# failing with "database is locked" when a read turns into a write.
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
+        "ENGINE": "cpa_academy.sqlite_backend",
         "NAME": os.getenv("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
         "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
         "OPTIONS": {
             "timeout": int(os.getenv("SQLITE_TIMEOUT", "20")),
+            "transaction_mode": "IMMEDIATE",
+            "serialize_writes": os.getenv("SQLITE_SERIALIZE_WRITES", "").lower() == "true",
         },
     }
 }
 
+# Read replicas ("replica", "replica_<n>") serve reads of opted-in views; see
+# cpa_academy/db_routers.py. SQLITE_REPLICA_PATH adds a second SQLite file as
+# a local replica; tests mirror it onto the default test database.
+if os.getenv("SQLITE_REPLICA_PATH"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": os.getenv("SQLITE_REPLICA_PATH"),
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["cpa_academy.db_routers.ReplicaRouter"]
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", "5"))
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", "5"))
+
+# Two-tier cache (cpa_academy/cache_backends.py): versioned, immutable entries
+# are also kept in a per-process LRU in front of the shared cache. The shared
+# tier is Redis with REDIS_URL and per-process memory otherwise (development
+# and tests). It holds state, not only copies: quiz sessions, version
+# counters, rate-limit buckets and rebuild leases rely on atomic add()/incr()
+# and must not be culled, so there is no file-based option, and the memory
+# cache is sized well beyond Django's default of 300 entries.
+if os.getenv("REDIS_URL"):
+    SHARED_CACHE = {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": os.getenv("REDIS_URL")}
+else:
+    SHARED_CACHE = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "cpa-academy",
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("SHARED_CACHE_MAX_ENTRIES", "100000")),
+            "CULL_FREQUENCY": 10,  # cull a tenth rather than a third when full
+        },
+    }
+
+CACHES = {
+    "default": {
+        "BACKEND": "cpa_academy.cache_backends.TwoTierCache",
+        "LOCATION": "shared",
+        "OPTIONS": {
+            "LOCAL_MAX_ENTRIES": int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "1000")),
+            "LOCAL_TIMEOUT": int(os.getenv("LOCAL_CACHE_TIMEOUT", "30")),
+            "LOCAL_KEY_PREFIXES": [
+                "courses:catalog:",
+                "courses:unit-detail:",
+                "quizzes:payload:",
+                "quizzes:answer-key:",
+                "quizzes:pool:",
+            ],
+        },
+    },
+    "shared": {**SHARED_CACHE, "TIMEOUT": 300},
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -218,15 +276,48 @@ AUTH_USER_MODEL = "users.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 12,
+    # Token buckets for cpa_academy.throttling: "<scope>" per user, "_ip" per client, "_global" overall
+    "DEFAULT_THROTTLE_RATES": {
+        "downloads": "30/min",
+        "downloads_ip": "60/min",
+        "downloads_global": "1200/min",
+        "uploads": "20/hour",
+        "uploads_ip": "40/hour",
+        "uploads_global": "300/hour",
+        "quiz_attempts": "30/min",
+        "quiz_attempts_ip": "60/min",
+        "quiz_attempts_global": "1200/min",
+        "google_login": "10/min",
+        "google_login_ip": "20/min",
+        "google_login_global": "600/min",
+    },
+    # Proxies in front of the app that append to X-Forwarded-For; the client IP
+    # for throttling and replica pins is the entry the outermost of them added
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", "0")),
 }
 
+# In-flight request caps per view (cpa_academy.throttling); beyond them requests get a 503
+CONCURRENCY_LIMITS = {
+    "downloads": 16,
+    "uploads": 4,
+}
+
+# JSON responses smaller than this are sent uncompressed (cpa_academy.compression)
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+
+# Item analysis reads attempts only once their ids are this old (quizzes.analytics), so late commits are not skipped
+ITEM_ANALYSIS_SETTLE_SECONDS = int(os.environ.get("ITEM_ANALYSIS_SETTLE_SECONDS", "60"))
+
+# Seconds between writes of the buffered unit and subject download counts (courses.counters)
+DOWNLOAD_FLUSH_INTERVAL = int(os.environ.get("DOWNLOAD_FLUSH_INTERVAL", "10"))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
@@ -0,0 +1,132 @@
+"""
+Single-flight cache fills.
+
+fetch(key, compute, timeout) returns the cached value of `key`; when it is
+missing or expired, exactly one caller rebuilds it while the others wait for
+that result (or get the previous value) instead of all hitting the database
+at once:
+
+- threads of one worker coordinate on a per-key lock;
+- workers coordinate on a lease, a "lease:<key>" entry taken with
+  cache.add() in the shared cache and released when the value is stored.
+  A worker that dies while holding it blocks others for at most
+  LEASE_TIMEOUT seconds.
+
+With stale_timeout, a value stays cached that much longer than `timeout`
+and callers that find a rebuild already running are served it rather than
+waiting (stale-while-revalidate). Callers that have nothing to serve wait
+up to WAIT_TIMEOUT seconds for the value, then compute it themselves.
+
+A None result is returned but not cached; exceptions from compute() release
+the lease and propagate. stats() counts per process how many callers were
+served without a rebuild of their own ("coalesced" and "stale_served").
+"""
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from django.core.cache import cache
+
+LEASE_TIMEOUT = 30
+WAIT_TIMEOUT = 10
+POLL_INTERVAL = 0.05
+
+_stats = Counter()
+_locks = {}
+_guard = threading.Lock()
+
+
+def _count(name):
+    with _guard:
+        _stats[name] += 1
+
+
+def stats():
+    with _guard:
+        counts = dict(_stats)
+    names = ("hits", "rebuilds", "coalesced", "stale_served", "wait_timeouts")
+    result = {name: counts.get(name, 0) for name in names}
+    result["rebuilds_avoided"] = result["coalesced"] + result["stale_served"]
+    return result
+
+
+@contextmanager
+def _key_lock(key):
+    with _guard:
+        entry = _locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        yield entry[0]
+    finally:
+        with _guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _locks[key]
+
+
+def _read(key, shared=False):
+    """(value, fresh) for a stored entry, or None. shared=True skips a two-tier cache's local copy."""
+    backend = getattr(cache, "shared", cache) if shared else cache
+    entry = backend.get(key)
+    if entry is None:
+        return None
+    value, fresh_until = entry
+    return value, fresh_until > time.time()
+
+
+def _store(key, value, timeout, stale_timeout):
+    if value is not None:
+        cache.set(key, (value, time.time() + timeout), timeout + stale_timeout)
+
+
+def fetch(key, compute, timeout, stale_timeout=0):
+    """The cached value of `key`, computed by a single caller across threads and workers when missing."""
+    entry = _read(key)
+    if entry is not None and not entry[1]:
+        # A local copy may trail a value another worker already refreshed
+        entry = _read(key, shared=True)
+    if entry is not None and entry[1]:
+        _count("hits")
+        return entry[0]
+
+    with _key_lock(key) as lock:
+        # Another thread of this worker is already rebuilding the key
+        waited = not lock.acquire(blocking=False)
+        if waited:
+            if entry is not None:
+                _count("stale_served")
+                return entry[0]
+            if not lock.acquire(timeout=WAIT_TIMEOUT):
+                _count("wait_timeouts")
+                return compute()
+        try:
+            return _fill(key, compute, timeout, stale_timeout, waited)
+        finally:
+            lock.release()
+
+
+def _fill(key, compute, timeout, stale_timeout, waited):
+    """Called holding the in-process key lock: rebuild under the shared lease or wait for its holder."""
+    lease = f"lease:{key}"
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while True:
+        entry = _read(key, shared=True)
+        if entry is not None and entry[1]:
+            _count("coalesced" if waited else "hits")
+            return entry[0]
+        if cache.add(lease, True, LEASE_TIMEOUT):
+            try:
+                value = compute()
+                _store(key, value, timeout, stale_timeout)
+            finally:
+                cache.delete(lease)
+            _count("rebuilds")
+            return value
+        if entry is not None:
+            _count("stale_served")
+            return entry[0]
+        if time.monotonic() >= deadline:
+            _count("wait_timeouts")
+            return compute()
+        waited = True
+        time.sleep(POLL_INTERVAL)
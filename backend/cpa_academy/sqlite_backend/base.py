@@ -0,0 +1,148 @@
+"""
+SQLite backend tuned for small production deployments.
+
+Every new connection gets PRAGMAS (overridable per key through
+DATABASES[...]["OPTIONS"]["pragmas"]):
+
+    journal_mode=WAL      readers no longer block the writer and vice versa
+    synchronous=NORMAL    fsync at checkpoints only; durable with WAL
+                          except for the last transactions on power loss
+    mmap_size, cache_size larger page cache, memory-mapped reads
+    temp_store=MEMORY     sorts and temp indexes stay off disk
+    busy_timeout          how long a writer waits for the lock (defaults to
+                          the "timeout" option)
+
+Use OPTIONS["transaction_mode"] = "IMMEDIATE" with it: a deferred
+transaction that reads and then writes cannot wait for the write lock and
+fails at once with "database is locked", whatever the busy timeout.
+
+With OPTIONS["serialize_writes"] = True, writes of this process also queue
+on an in-process lock per database file: a transaction holds it from BEGIN
+to COMMIT/ROLLBACK and an autocommit INSERT/UPDATE/DELETE for the statement,
+so threads wait their turn in Python instead of spinning in SQLite's busy
+handler. Other processes are still arbitrated by busy_timeout.
+"""
+import threading
+from contextlib import contextmanager
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base as sqlite3_base
+
+WRITE_KEYWORDS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # negative: KiB, i.e. 64 MiB
+    "temp_store": "MEMORY",
+}
+
+_write_locks = {}
+_write_locks_guard = threading.Lock()
+
+
+def pragma_statements(pragmas, timeout=None):
+    """PRAGMA statements for `pragmas` layered over PRAGMAS; busy_timeout defaults to `timeout` seconds."""
+    merged = dict(PRAGMAS)
+    if timeout is not None:
+        merged["busy_timeout"] = int(timeout * 1000)
+    merged.update(pragmas or {})
+    return [f"PRAGMA {name}={value}" for name, value in merged.items() if value is not None]
+
+
+def write_lock(name):
+    with _write_locks_guard:
+        return _write_locks.setdefault(str(name), threading.Lock())
+
+
+class SerializedWriteCursorWrapper(sqlite3_base.SQLiteCursorWrapper):
+    db = None
+
+    def execute(self, query, params=None):
+        with self.db.autocommit_write(query):
+            return super().execute(query, params)
+
+    def executemany(self, query, param_list):
+        with self.db.autocommit_write(query):
+            return super().executemany(query, param_list)
+
+
+class DatabaseWrapper(sqlite3_base.DatabaseWrapper):
+    serialize_writes = False
+    holds_write_lock = False
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = pragma_statements(kwargs.pop("pragmas", None), kwargs.get("timeout", 5))
+        self.serialize_writes = bool(kwargs.pop("serialize_writes", False))
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for statement in self.pragmas:
+            conn.execute(statement)
+        return conn
+
+    def create_cursor(self, name=None):
+        if not self.serialize_writes:
+            return super().create_cursor(name)
+        cursor = self.connection.cursor(factory=SerializedWriteCursorWrapper)
+        cursor.db = self
+        return cursor
+
+    # Write serialization
+
+    def acquire_write_lock(self):
+        timeout = self.settings_dict["OPTIONS"].get("timeout", 5)
+        if not write_lock(self.settings_dict["NAME"]).acquire(timeout=timeout):
+            raise OperationalError("database is locked (timed out waiting in the write queue)")
+        self.holds_write_lock = True
+
+    def release_write_lock(self):
+        if self.holds_write_lock:
+            self.holds_write_lock = False
+            write_lock(self.settings_dict["NAME"]).release()
+
+    @contextmanager
+    def autocommit_write(self, query):
+        """Hold the write lock for one statement that writes outside a transaction."""
+        needed = (
+            not self.holds_write_lock
+            and self.get_autocommit()
+            and not self.in_atomic_block
+            and query.lstrip()[:7].upper().startswith(WRITE_KEYWORDS)
+        )
+        if needed:
+            self.acquire_write_lock()
+        try:
+            yield
+        finally:
+            if needed:
+                self.release_write_lock()
+
+    def _start_transaction_under_autocommit(self):
+        if self.serialize_writes and not self.holds_write_lock:
+            self.acquire_write_lock()
+        try:
+            super()._start_transaction_under_autocommit()
+        except Exception:
+            self.release_write_lock()
+            raise
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self.release_write_lock()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self.release_write_lock()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self.release_write_lock()
@@ -0,0 +1,211 @@
+"""
+Token-bucket rate limiting and load shedding for expensive endpoints.
+
+Rates are DRF throttle rates ("30/min") in REST_FRAMEWORK's
+DEFAULT_THROTTLE_RATES, looked up per scope:
+
+    "<scope>"          per signed-in user (per IP for anonymous requests)
+    "<scope>_ip"       per client IP
+    "<scope>_global"   shared by every client of the scope
+
+A rate of N/period is a bucket of N tokens refilled at N per period, so
+short bursts are absorbed while the long-run rate is capped. A scope without
+a rate is not limited. Views opt in with
+`throttle_classes = token_bucket_throttles("downloads")`; rejections are
+429 responses carrying Retry-After. A request costs one token unless its
+view defines throttle_cost(request), e.g. one token per item of a batch;
+the cost is capped at the bucket's capacity so the largest request can
+still get through a full bucket.
+
+Buckets live in the shared cache. The hot path is one atomic cache.incr()
+on a "tokens used" counter compared with the tokens earned since the
+bucket's base time; a rejected request is refunded with decr(). The counter
+and base are only rewritten (non-atomically) when an idle bucket is full
+again or the base is old, where a lost race costs at most a token or two.
+
+concurrency_limit() and ConcurrencyLimitMixin shed load instead: once
+CONCURRENCY_LIMITS[name] requests of a view are in flight across all
+workers, further ones get an immediate 503 rather than queueing, which
+keeps worker threads free for cheap endpoints.
+"""
+import functools
+import math
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+def take_token(key, capacity, rate, now=None, cost=1):
+    """
+    Take `cost` tokens from the bucket at `key` (capacity tokens, refilled at
+    `rate` per second). Returns (allowed, seconds until enough are available).
+    """
+    now = now if now is not None else time.time()
+    full_after = capacity / rate
+    timeout = int(full_after * 4) + 60
+    base_key, used_key = f"{key}:base", f"{key}:used"
+
+    base = cache.get(base_key)
+    if base is None:
+        cache.set_many({base_key: now, used_key: 0}, timeout)
+        base = now
+    try:
+        used = cache.incr(used_key, cost)
+    except ValueError:
+        cache.set(used_key, cost, timeout)
+        used = cost
+
+    earned = int((now - base) * rate)
+    if used > capacity + earned:
+        cache.decr(used_key, cost)
+        return False, max((used - capacity) / rate - (now - base), 0)
+    if used <= earned or now - base > full_after * 2:
+        # Drop credit beyond the capacity and keep the keys from expiring mid-use
+        cache.set_many({base_key: now, used_key: max(used - earned, cost)}, timeout)
+    return True, 0
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Base class; token_bucket_throttles() makes scoped subclasses."""
+    suffix = ""
+
+    def get_rate(self):
+        # Read on every request (not at import) so settings overrides apply
+        return api_settings.DEFAULT_THROTTLE_RATES.get(f"{self.scope}{self.suffix}")
+
+    def allow_request(self, request, view):
+        self._wait = 0
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        cost = min(self.get_cost(request, view), self.num_requests)
+        allowed, self._wait = take_token(key, self.num_requests, self.num_requests / self.duration, cost=cost)
+        return allowed
+
+    def get_cost(self, request, view):
+        throttle_cost = getattr(view, "throttle_cost", None)
+        return max(throttle_cost(request), 1) if throttle_cost else 1
+
+    def wait(self):
+        return math.ceil(self._wait) if self._wait else None
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f"throttle:{self.scope}:user:{request.user.pk}"
+        return f"throttle:{self.scope}:anon:{self.get_ident(request)}"
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    suffix = "_ip"
+
+    def get_cache_key(self, request, view):
+        return f"throttle:{self.scope}:ip:{self.get_ident(request)}"
+
+
+class GlobalTokenBucketThrottle(TokenBucketThrottle):
+    suffix = "_global"
+
+    def get_cache_key(self, request, view):
+        return f"throttle:{self.scope}:global"
+
+
+def token_bucket_throttles(scope):
+    """Per-user, per-IP and global throttle classes for a scope, for a view's throttle_classes."""
+    return [
+        type(f"{base.__name__}[{scope}]", (base,), {"scope": scope})
+        for base in (UserTokenBucketThrottle, IPTokenBucketThrottle, GlobalTokenBucketThrottle)
+    ]
+
+
+class ConcurrencyLimiter:
+    """
+    Counts in-flight requests for one name across all workers with
+    cache.incr()/decr(). Every admission pushes the counter's expiry
+    IN_FLIGHT_TIMEOUT seconds out, so requests lost with a crashed worker
+    are forgotten once the view has been idle that long. Releases never take
+    the counter below zero, which would admit more than the limit.
+    """
+    IN_FLIGHT_TIMEOUT = 60
+
+    def __init__(self, name):
+        self.name = name
+        self.key = f"concurrency:{name}"
+
+    def limit(self):
+        return getattr(settings, "CONCURRENCY_LIMITS", {}).get(self.name)
+
+    def acquire(self):
+        """Returns (admitted, counted); release() must follow a counted admission."""
+        limit = self.limit()
+        if limit is None:
+            return True, False
+        cache.add(self.key, 0, self.IN_FLIGHT_TIMEOUT)
+        try:
+            in_flight = cache.incr(self.key)
+        except ValueError:
+            cache.set(self.key, 1, self.IN_FLIGHT_TIMEOUT)
+            in_flight = 1
+        if in_flight > limit:
+            self.release()
+            return False, False
+        cache.touch(self.key, self.IN_FLIGHT_TIMEOUT)
+        return True, True
+
+    def release(self):
+        try:
+            in_flight = cache.decr(self.key)
+        except ValueError:
+            return  # counter expired while the request ran
+        if in_flight < 0:
+            # Released after the counter expired and restarted at 0
+            cache.incr(self.key, -in_flight)
+
+
+def _overloaded():
+    response = JsonResponse({"detail": "The server is busy. Please try again shortly."}, status=503)
+    response["Retry-After"] = "1"
+    return response
+
+
+def concurrency_limit(name):
+    """Decorate a view function so requests beyond CONCURRENCY_LIMITS[name] in flight get a 503."""
+    limiter = ConcurrencyLimiter(name)
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(request, *args, **kwargs):
+            admitted, counted = limiter.acquire()
+            if not admitted:
+                return _overloaded()
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                if counted:
+                    limiter.release()
+        return wrapped
+    return decorator
+
+
+class ConcurrencyLimitMixin:
+    """APIView mixin: set `concurrency_limit_name` to shed load once that many requests are in flight."""
+    concurrency_limit_name = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.concurrency_limit_name:
+            return super().dispatch(request, *args, **kwargs)
+        limiter = ConcurrencyLimiter(self.concurrency_limit_name)
+        admitted, counted = limiter.acquire()
+        if not admitted:
+            return _overloaded()
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if counted:
+                limiter.release()
@@ -3,6 +3,13 @@ from django.urls import path, include
 from django.conf import settings
 from django.http import JsonResponse
 from django.core.files.storage import default_storage
+from django.core.cache import cache
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from . import singleflight
 
 # Import admin configuration to apply custom headers and titles
 from . import custom_admin
@@ -32,6 +39,14 @@ def storage_health(request):
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
 
+@api_view(["GET"])
+@authentication_classes([*api_settings.DEFAULT_AUTHENTICATION_CLASSES, SessionAuthentication])
+@permission_classes([IsAdminUser])
+def cache_health(request):
+    # Staff with an API token or an admin session; figures are for the worker process that serves the request
+    stats = cache.stats() if hasattr(cache, "stats") else None
+    return Response({"backend": cache.__class__.__name__, "stats": stats, "single_flight": singleflight.stats()})
+
 urlpatterns = [
     path("", api_root, name="api_root"),
     path("admin/", admin.site.urls),
@@ -42,6 +57,7 @@ urlpatterns = [
     path("api/materials/", include("materials.urls")),
     path("api/quizzes/", include("quizzes.urls")),
     path("api/health/storage/", storage_health, name="storage_health"),
+    path("api/health/cache/", cache_health, name="cache_health"),
 ]
 
 # Only serve media files locally in development
@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+from cpa_academy.throttling import ConcurrencyLimiter, take_token
+
+
+def rates(**overrides):
+    return {**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": overrides}
+
+
+class TokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bucket_drains_and_refills(self):
+        for _ in range(3):
+            self.assertEqual(take_token("bucket", 3, 1.0, now=100.0), (True, 0))
+        allowed, wait = take_token("bucket", 3, 1.0, now=100.0)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 1.0)
+        # One token is earned per second; a refused request costs nothing
+        self.assertTrue(take_token("bucket", 3, 1.0, now=101.0)[0])
+        self.assertFalse(take_token("bucket", 3, 1.0, now=101.5)[0])
+
+    def test_idle_bucket_does_not_exceed_capacity(self):
+        take_token("bucket", 2, 1.0, now=100.0)
+        results = [take_token("bucket", 2, 1.0, now=1000.0)[0] for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+
+
+class ConcurrencyLimiterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(CONCURRENCY_LIMITS={"downloads": 2})
+    def test_late_releases_do_not_raise_the_limit(self):
+        limiter = ConcurrencyLimiter("downloads")
+        self.assertEqual([limiter.acquire() for _ in range(2)], [(True, True)] * 2)
+        cache.delete(limiter.key)  # expired while both requests were in flight
+        self.assertEqual(limiter.acquire(), (True, True))
+        limiter.release()
+        limiter.release()
+        limiter.release()
+        self.assertEqual(cache.get(limiter.key), 0)
+        self.assertEqual([limiter.acquire()[0] for _ in range(3)], [True, True, False])
+
+
+class DownloadLimitTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(REST_FRAMEWORK=rates(downloads="2/min"))
+    def test_burst_beyond_bucket_is_throttled(self):
+        statuses = [self.client.get("/api/materials/999/download/").status_code for _ in range(3)]
+        self.assertEqual(statuses, [404, 404, 429])
+        resp = self.client.get("/api/materials/999/download/")
+        self.assertEqual(resp.status_code, 429)
+        self.assertIn("Retry-After", resp)
+
+    @override_settings(REST_FRAMEWORK=rates(downloads_global="1/min"))
+    def test_global_bucket_is_shared_by_clients(self):
+        self.assertEqual(self.client.get("/api/materials/999/download/", REMOTE_ADDR="10.0.0.1").status_code, 404)
+        self.assertEqual(self.client.get("/api/materials/999/download/", REMOTE_ADDR="10.0.0.2").status_code, 429)
+
+    @override_settings(CONCURRENCY_LIMITS={"downloads": 0})
+    def test_requests_beyond_concurrency_limit_are_shed(self):
+        resp = self.client.get("/api/materials/999/download/")
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp["Retry-After"], "1")
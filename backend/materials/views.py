@@ -1,20 +1,33 @@
 from rest_framework import generics, permissions, status, serializers
 from .models import Material
 from .serializers import MaterialSerializer
+from users import progress
+from courses import catalog, counters
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.http import FileResponse, HttpResponseRedirect
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from cpa_academy import singleflight
+from cpa_academy.db_routers import ReplicaReadMixin, use_primary
+from cpa_academy.prerendered import prerender, prerendered_response
+from cpa_academy.throttling import token_bucket_throttles, concurrency_limit, ConcurrencyLimitMixin
 from django.core.exceptions import PermissionDenied
 from django.db.models import F, Q
 from django.conf import settings
 import os
+import hashlib
 import logging
 import boto3
 from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+# Public listings are shared by all users; material changes bump the catalog version
+MATERIAL_LIST_TIMEOUT = 60
+PRESIGNED_URL_EXPIRATION = 3600
+# Presigned URLs are reused for half their lifetime, so each client gets at least 30 minutes
+PRESIGNED_URL_REUSE = PRESIGNED_URL_EXPIRATION // 2
+
 
 @lru_cache(maxsize=1)
 def get_s3_client(region, access_key, secret_key):
@@ -27,7 +40,7 @@ def get_s3_client(region, access_key, secret_key):
         config=Config(signature_version='s3v4')
     )
 
-class MaterialListView(generics.ListAPIView):
+class MaterialListView(ReplicaReadMixin, generics.ListAPIView):
     serializer_class = MaterialSerializer
     permission_classes = [permissions.AllowAny]
 
@@ -48,10 +61,24 @@ class MaterialListView(generics.ListAPIView):
             qs = qs.order_by("-upload_date")
         return qs
 
+    def list(self, request, *args, **kwargs):
+        # Keyed on the full URL: filters, page and absolute file URLs all come from it
+        url = hashlib.sha256(request.build_absolute_uri().encode()).hexdigest()[:32]
+        key = f"materials:list:v2:{catalog.catalog_version()}:{url}"
+
+        def build():
+            with use_primary():
+                return prerender(super(MaterialListView, self).list(request, *args, **kwargs).data)
+
+        blob = singleflight.fetch(key, build, MATERIAL_LIST_TIMEOUT, MATERIAL_LIST_TIMEOUT)
+        return prerendered_response(request, *blob, "public, no-cache")
 
-class MaterialCreateView(generics.CreateAPIView):
+
+class MaterialCreateView(ConcurrencyLimitMixin, generics.CreateAPIView):
     serializer_class = MaterialSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = token_bucket_throttles("uploads")
+    concurrency_limit_name = "uploads"
     parser_classes = (MultiPartParser, FormParser)
 
     def perform_create(self, serializer):
@@ -78,6 +105,21 @@ class MaterialCreateView(generics.CreateAPIView):
             raise serializers.ValidationError({"file": f"Upload failed: {str(e)}"})
 
 
+def shared_presigned_url(storage, file_name):
+    """
+    A presigned download URL for an S3 object, checked and signed once per
+    PRESIGNED_URL_REUSE seconds for all workers. Raises FileNotFoundError
+    when the object does not exist; returns None when signing failed.
+    """
+    def build():
+        if not storage.exists(file_name):
+            raise FileNotFoundError(file_name)
+        return generate_s3_presigned_url(file_name, expiration=PRESIGNED_URL_EXPIRATION)
+
+    key = f"materials:presigned:{hashlib.sha256(file_name.encode()).hexdigest()[:32]}"
+    return singleflight.fetch(key, build, PRESIGNED_URL_REUSE)
+
+
 def generate_s3_presigned_url(file_name, expiration=3600):
     """Generate a presigned URL for S3 object download."""
     try:
@@ -156,8 +198,10 @@ class MaterialDetailView(generics.RetrieveDestroyAPIView):
         instance.delete()
 
 
+@concurrency_limit("downloads")
 @api_view(["GET"])
 @permission_classes([permissions.IsAuthenticatedOrReadOnly])
+@throttle_classes(token_bucket_throttles("downloads"))
 def material_download_view(request, pk):
     """
     Production-ready download endpoint.
@@ -189,6 +233,9 @@ def material_download_view(request, pk):
 
     # Increment download count asynchronously
     Material.objects.filter(pk=pk).update(download_count=F("download_count") + 1)
+    counters.record_download(material.unit_id)
+    if request.user.is_authenticated:
+        progress.record_download(request.user, material)
 
     # Get storage backend
     storage = material.file.storage
@@ -203,15 +250,14 @@ def material_download_view(request, pk):
     # S3: Return presigned URL (optionally redirect immediately)
     if is_s3:
         try:
-            # Verify file exists in S3 before generating presigned URL
-            if not storage.exists(material.file.name):
+            # Verify the file exists in S3 and get a presigned URL with proper content disposition
+            try:
+                presigned_url = shared_presigned_url(storage, material.file.name)
+            except FileNotFoundError:
                 logger.error(f"S3 key not found: {material.file.name} for Material {pk}")
                 return Response({
                     "detail": f"File not found in S3 storage. Key: {material.file.name}"
                 }, status=status.HTTP_404_NOT_FOUND)
-            
-            # Generate presigned URL with proper content disposition
-            presigned_url = generate_s3_presigned_url(material.file.name, expiration=3600)
             if presigned_url:
                 logger.info(f"Download: Material {pk} ({filename}) - S3 presigned URL generated successfully")
                 # If redirect requested, issue a 302 to the presigned URL for instant download
@@ -1,2 +1,3 @@
 # Quizzes app package
 
+default_app_config = 'quizzes.apps.QuizzesConfig'
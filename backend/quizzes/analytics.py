@@ -0,0 +1,288 @@
+"""
+Item analysis for quiz questions.
+
+Streams QuizAnswer rows into NumPy arrays one attempt-id range at a time and
+folds them into running sums, from which classical test statistics are
+derived in vectorized form:
+
+- difficulty: proportion of responders answering correctly (p-value)
+- discrimination: point-biserial correlation between the item and the
+  attempt's number-correct score
+- choice_counts: how often each choice was picked (distractor analysis)
+- kr20: Kuder-Richardson 20 reliability of each question set
+
+Results are stored in QuestionStatistics / QuestionSetStatistics together
+with the sums, and an ItemAnalysisCheckpoint records the last attempt id
+processed, so a rerun only reads attempts created since the previous one.
+The attempts are read outside any transaction; only storing the results and
+advancing the checkpoint take the write lock, and a run whose checkpoint was
+advanced by another run meanwhile discards its results.
+
+Attempt ids are assigned at insert, not at commit, so the highest id in the
+table can be ahead of a lower id whose transaction has not committed yet.
+A run therefore reads only up to the highest id the checkpoint saw at least
+ITEM_ANALYSIS_SETTLE_SECONDS earlier, and records the current highest id
+for a later run.
+"""
+import logging
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from .versions import bump_question_set_version
+from .models import (
+    Question, QuizAttempt, QuizAnswer,
+    QuestionStatistics, QuestionSetStatistics, ItemAnalysisCheckpoint,
+)
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = "item-analysis"
+DEFAULT_CHUNK_ATTEMPTS = 5000
+DEFAULT_SETTLE_SECONDS = 60
+
+# Column order of the sums matrices, matching the model fields
+QUESTION_SUM_FIELDS = ("responses", "correct", "sum_total", "sum_total_sq", "sum_total_correct")
+SET_SUM_FIELDS = ("attempts", "sum_raw", "sum_raw_sq")
+
+
+def _reduce(ids, sums):
+    """Collapse rows with equal ids by adding their sums."""
+    unique, inverse = np.unique(ids, return_inverse=True)
+    reduced = np.zeros((len(unique), sums.shape[1]))
+    np.add.at(reduced, inverse, sums)
+    return unique, reduced
+
+
+class ItemAnalysisAccumulator:
+    """Running per-question and per-set sums for one analysis run."""
+
+    def __init__(self):
+        self.question_ids = np.empty(0, dtype=np.int64)
+        self.question_sums = np.empty((0, len(QUESTION_SUM_FIELDS)))
+        self.set_ids = np.empty(0, dtype=np.int64)
+        self.set_sums = np.empty((0, len(SET_SUM_FIELDS)))
+        self.choice_counts = {}
+        self.answers = 0
+        self.attempts = 0
+
+    def add(self, rows):
+        """Fold a chunk of (attempt_id, question_set_id, question_id, choice, is_correct) rows."""
+        if not rows:
+            return
+        attempt_ids, set_ids, question_ids, choices, correct = zip(*rows)
+        attempt_ids = np.asarray(attempt_ids, dtype=np.int64)
+        set_ids = np.asarray(set_ids, dtype=np.int64)
+        question_ids = np.asarray(question_ids, dtype=np.int64)
+        correct = np.asarray(correct, dtype=np.float64)
+
+        # Number-correct score of each attempt, broadcast back to its answers
+        attempts, attempt_first, attempt_inv = np.unique(attempt_ids, return_index=True, return_inverse=True)
+        raw = np.bincount(attempt_inv, weights=correct, minlength=len(attempts))
+        x = raw[attempt_inv]
+
+        question_sums = np.column_stack((np.ones_like(x), correct, x, x * x, x * correct))
+        self.question_ids, self.question_sums = _reduce(
+            np.concatenate((self.question_ids, question_ids)),
+            np.vstack((self.question_sums, question_sums)),
+        )
+        set_sums = np.column_stack((np.ones_like(raw), raw, raw * raw))
+        self.set_ids, self.set_sums = _reduce(
+            np.concatenate((self.set_ids, set_ids[attempt_first])),
+            np.vstack((self.set_sums, set_sums)),
+        )
+
+        # Distractor frequencies: count distinct (question, choice) pairs
+        choice_values, choice_inv = np.unique(np.asarray(choices, dtype=str), return_inverse=True)
+        q_unique, q_inv = np.unique(question_ids, return_inverse=True)
+        width = len(choice_values)
+        pairs, counts = np.unique(q_inv * width + choice_inv, return_counts=True)
+        for pair, count in zip(pairs.tolist(), counts.tolist()):
+            per_question = self.choice_counts.setdefault(int(q_unique[pair // width]), {})
+            choice = str(choice_values[pair % width])
+            per_question[choice] = per_question.get(choice, 0) + count
+
+        self.answers += len(rows)
+        self.attempts += len(attempts)
+
+
+def item_statistics(sums):
+    """
+    Difficulty and point-biserial discrimination for rows of
+    (responses, correct, sum_total, sum_total_sq, sum_total_correct).
+    Undefined values (no variance, all right or all wrong) are NaN.
+    """
+    n, n1, s, ss, s1 = sums.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = n1 / n
+        mean = s / n
+        sd = np.sqrt(np.maximum(ss / n - mean * mean, 0))
+        mean_correct = s1 / n1
+        mean_wrong = (s - s1) / (n - n1)
+        r = (mean_correct - mean_wrong) / sd * np.sqrt(p * (1 - p))
+    r[(n1 == 0) | (n1 == n) | (sd == 0)] = np.nan
+    return p, r
+
+
+def kr20(k, attempts, sum_raw, sum_raw_sq, sum_pq):
+    """Vectorized KR-20 over sets; NaN where fewer than two items or no score variance."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = sum_raw / attempts
+        variance = sum_raw_sq / attempts - mean * mean
+        reliability = k / (k - 1) * (1 - sum_pq / variance)
+    reliability[(k < 2) | (attempts < 2) | ~(variance > 0)] = np.nan
+    return reliability
+
+
+def _nullable(values):
+    return [None if np.isnan(v) else float(v) for v in values]
+
+
+def _store_question_statistics(acc):
+    ids = acc.question_ids.tolist()
+    existing = QuestionStatistics.objects.in_bulk(ids, field_name="question_id")
+    previous = np.array([
+        [getattr(existing[qid], f) for f in QUESTION_SUM_FIELDS] if qid in existing else [0.0] * len(QUESTION_SUM_FIELDS)
+        for qid in ids
+    ]).reshape(len(ids), len(QUESTION_SUM_FIELDS))
+    totals = previous + acc.question_sums
+    difficulty, discrimination = item_statistics(totals)
+
+    to_create, to_update = [], []
+    for i, (qid, p, r) in enumerate(zip(ids, _nullable(difficulty), _nullable(discrimination))):
+        stats = existing.get(qid) or QuestionStatistics(question_id=qid)
+        for j, field in enumerate(QUESTION_SUM_FIELDS):
+            setattr(stats, field, int(totals[i, j]) if field in ("responses", "correct") else float(totals[i, j]))
+        counts = dict(stats.choice_counts or {})
+        for choice, count in acc.choice_counts.get(qid, {}).items():
+            counts[choice] = counts.get(choice, 0) + count
+        stats.choice_counts = counts
+        stats.difficulty = p
+        stats.discrimination = r
+        (to_update if stats.pk else to_create).append(stats)
+
+    QuestionStatistics.objects.bulk_create(to_create, batch_size=1000)
+    QuestionStatistics.objects.bulk_update(
+        to_update,
+        list(QUESTION_SUM_FIELDS) + ["choice_counts", "difficulty", "discrimination", "updated_at"],
+        batch_size=1000,
+    )
+    return len(ids)
+
+
+def _store_set_statistics(acc):
+    ids = acc.set_ids.tolist()
+    existing = QuestionSetStatistics.objects.in_bulk(ids, field_name="question_set_id")
+    previous = np.array([
+        [getattr(existing[sid], f) for f in SET_SUM_FIELDS] if sid in existing else [0.0] * len(SET_SUM_FIELDS)
+        for sid in ids
+    ]).reshape(len(ids), len(SET_SUM_FIELDS))
+    totals = previous + acc.set_sums
+    attempts, sum_raw, sum_raw_sq = totals.T
+
+    # KR-20 needs the current item count and sum of p*q over each set's items,
+    # with p taken over all attempts of the set (an unanswered item counts as wrong).
+    position = {sid: i for i, sid in enumerate(ids)}
+    k = np.zeros(len(ids))
+    for row in Question.objects.filter(question_set_id__in=ids).values("question_set_id").annotate(n=Count("id")).order_by():
+        k[position[row["question_set_id"]]] = row["n"]
+    rows = QuestionStatistics.objects.filter(question__question_set_id__in=ids).values_list("question__question_set_id", "correct")
+    sum_pq = np.zeros(len(ids))
+    if rows:
+        set_idx, correct = (np.asarray(col) for col in zip(*rows))
+        set_idx = np.vectorize(position.__getitem__, otypes=[np.int64])(set_idx)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            p = np.clip(correct / attempts[set_idx], 0, 1)
+        sum_pq = np.bincount(set_idx, weights=np.nan_to_num(p * (1 - p)), minlength=len(ids))
+    reliability = kr20(k, attempts, sum_raw, sum_raw_sq, sum_pq)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = _nullable(sum_raw / attempts)
+
+    to_create, to_update = [], []
+    for i, sid in enumerate(ids):
+        stats = existing.get(sid) or QuestionSetStatistics(question_set_id=sid)
+        stats.attempts = int(attempts[i])
+        stats.sum_raw = float(sum_raw[i])
+        stats.sum_raw_sq = float(sum_raw_sq[i])
+        stats.mean_raw = means[i]
+        stats.kr20 = None if np.isnan(reliability[i]) else float(reliability[i])
+        (to_update if stats.pk else to_create).append(stats)
+    QuestionSetStatistics.objects.bulk_create(to_create, batch_size=1000)
+    QuestionSetStatistics.objects.bulk_update(
+        to_update, list(SET_SUM_FIELDS) + ["mean_raw", "kr20", "updated_at"], batch_size=1000,
+    )
+    return len(ids)
+
+
+def run_item_analysis(chunk_attempts=DEFAULT_CHUNK_ATTEMPTS, full=False, progress=None):
+    """
+    Fold attempts created since the last run into the stored statistics.
+    With full=True all statistics are dropped and rebuilt from scratch, which
+    is needed after answers are regraded. Returns a summary dict.
+    """
+    checkpoint, _ = ItemAnalysisCheckpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+    previous = checkpoint.last_attempt_id
+    start = 0 if full else previous
+    now = timezone.now()
+    latest = QuizAttempt.objects.aggregate(m=Max("id"))["m"] or 0
+    settle = timedelta(seconds=getattr(settings, "ITEM_ANALYSIS_SETTLE_SECONDS", DEFAULT_SETTLE_SECONDS))
+    seen = (checkpoint.seen_attempt_id, checkpoint.seen_at)
+    if not settle:
+        upto = latest
+    elif checkpoint.seen_at is not None and checkpoint.seen_at <= now - settle:
+        upto = checkpoint.seen_attempt_id
+    else:
+        upto = previous  # the id seen last time has not settled yet
+    # Once the id seen last time is used, the current highest id takes its place
+    if not settle or checkpoint.seen_at is None or upto == checkpoint.seen_attempt_id:
+        seen = (latest, now)
+
+    # Read outside a transaction: holding the write lock (SQLite runs
+    # IMMEDIATE transactions) for the whole scan would stall every submission
+    acc = ItemAnalysisAccumulator()
+    lo = start
+    while lo < upto:
+        hi = min(lo + chunk_attempts, upto)
+        rows = list(
+            QuizAnswer.objects.filter(attempt_id__gt=lo, attempt_id__lte=hi)
+            .values_list("attempt_id", "attempt__question_set_id", "question_id", "choice", "is_correct")
+            .order_by()
+        )
+        acc.add(rows)
+        lo = hi
+        if progress:
+            progress(lo, upto, acc)
+
+    questions = sets = 0
+    with transaction.atomic():
+        checkpoint = ItemAnalysisCheckpoint.objects.select_for_update().get(pk=checkpoint.pk)
+        if checkpoint.last_attempt_id != previous:
+            # Another run stored these attempts meanwhile; adding them again would count them twice
+            logger.warning("Item analysis checkpoint moved during the run; discarding its results")
+            acc = ItemAnalysisAccumulator()
+        else:
+            if full:
+                QuestionStatistics.objects.all().delete()
+                QuestionSetStatistics.objects.all().delete()
+            questions = _store_question_statistics(acc) if len(acc.question_ids) else 0
+            sets = _store_set_statistics(acc) if len(acc.set_ids) else 0
+            checkpoint.last_attempt_id = max(start, upto)
+            checkpoint.seen_attempt_id, checkpoint.seen_at = seen
+            checkpoint.save()
+
+    # Sampling pools embed difficulties, so refresh them for the sets touched
+    for question_set_id in acc.set_ids.tolist():
+        bump_question_set_version(question_set_id)
+
+    summary = {
+        "from_attempt": start,
+        "to_attempt": checkpoint.last_attempt_id,
+        "attempts": acc.attempts,
+        "answers": acc.answers,
+        "questions": questions,
+        "question_sets": sets,
+    }
+    logger.info(f"Item analysis run: {summary}")
+    return summary
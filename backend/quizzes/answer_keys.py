@@ -0,0 +1,142 @@
+"""
+Cached answer keys used to grade quiz attempts.
+
+An answer key maps question id -> (correct choice, points) for one question
+set, plus the total points available. Keys are held in two tiers: a small
+per-process dict and the shared Django cache, both tagged with the set's
+version from quizzes.versions. Question changes bump the version (see
+quizzes.signals), so grading a submission reads no database rows.
+"""
+import threading
+from typing import Dict, NamedTuple, Optional, Tuple
+from django.core.cache import cache
+from .models import QuestionSet, Question
+from .versions import question_set_version, question_set_versions, bump_question_set_version
+
+ANSWER_KEY_TIMEOUT = 60 * 60 * 24
+LOCAL_MAX_ENTRIES = 512
+
+_local_keys = {}
+_local_lock = threading.Lock()
+
+
+class AnswerKey(NamedTuple):
+    question_set_id: int
+    version: int
+    unit_id: int
+    answers: Dict[int, Tuple[str, int]]
+    total: int
+
+    def mark(self, answers):
+        """
+        Mark a list of {"question_id": ..., "choice": ...} dicts against this key.
+        Returns {question_id: (choice, is_correct, points_awarded)}; answers to
+        unknown questions are dropped and a repeated question keeps its last answer.
+        """
+        marked = {}
+        for ans in answers:
+            qid = ans.get("question_id")
+            entry = self.answers.get(qid)
+            if not entry:
+                continue
+            choice = str(ans.get("choice"))
+            is_correct = entry[0] == choice
+            marked[qid] = (choice, is_correct, entry[1] if is_correct else 0)
+        return marked
+
+    def grade(self, answers):
+        """Score a list of {"question_id": ..., "choice": ...} dicts against this key."""
+        return sum(points for _, _, points in self.mark(answers).values())
+
+def _cache_key(question_set_id, version):
+    return f"quizzes:answer-key:v2:{question_set_id}:{version}"
+
+
+def _remember(key):
+    with _local_lock:
+        if len(_local_keys) >= LOCAL_MAX_ENTRIES and key.question_set_id not in _local_keys:
+            _local_keys.pop(next(iter(_local_keys)))
+        _local_keys[key.question_set_id] = key
+
+
+def build_answer_key(question_set_id, version) -> Optional[AnswerKey]:
+    unit_id = QuestionSet.objects.filter(pk=question_set_id).values_list("unit_id", flat=True).first()
+    if unit_id is None:
+        return None
+    rows = Question.objects.filter(question_set_id=question_set_id).values_list("id", "correct_choice", "points")
+    answers = {qid: (str(correct), points) for qid, correct, points in rows}
+    return AnswerKey(question_set_id, version, unit_id, answers, sum(points for _, points in answers.values()))
+
+
+def get_answer_key(question_set_id) -> Optional[AnswerKey]:
+    """Return the current answer key for a set, or None if the set does not exist."""
+    version = question_set_version(question_set_id)
+    key = _local_keys.get(question_set_id)
+    if key is not None and key.version == version:
+        return key
+
+    cached = cache.get(_cache_key(question_set_id, version))
+    if cached is not None:
+        key = AnswerKey(question_set_id, version, cached["unit_id"], cached["answers"], cached["total"])
+    else:
+        key = build_answer_key(question_set_id, version)
+        if key is None:
+            return None
+        cache.set(
+            _cache_key(question_set_id, version),
+            {"unit_id": key.unit_id, "answers": key.answers, "total": key.total},
+            ANSWER_KEY_TIMEOUT,
+        )
+    _remember(key)
+    return key
+
+
+def get_answer_keys(question_set_ids) -> Dict[int, AnswerKey]:
+    """
+    get_answer_key() for many sets: one cache round trip for the versions,
+    one for the cached keys, and a single query for every key that has to be
+    built. Sets that do not exist are missing from the result.
+    """
+    versions = question_set_versions(set(question_set_ids))
+    keys, wanted = {}, {}
+    for question_set_id, version in versions.items():
+        key = _local_keys.get(question_set_id)
+        if key is not None and key.version == version:
+            keys[question_set_id] = key
+        else:
+            wanted[_cache_key(question_set_id, version)] = question_set_id
+
+    for cache_key, cached in cache.get_many(list(wanted)).items():
+        question_set_id = wanted.pop(cache_key)
+        keys[question_set_id] = AnswerKey(
+            question_set_id, versions[question_set_id], cached["unit_id"], cached["answers"], cached["total"],
+        )
+
+    if wanted:
+        built = {}
+        # LEFT JOIN from the sets, so sets without questions still get an (empty) key
+        rows = QuestionSet.objects.filter(pk__in=wanted.values()).values_list(
+            "id", "unit_id", "questions__id", "questions__correct_choice", "questions__points",
+        )
+        for question_set_id, unit_id, qid, correct, points in rows:
+            unit_id, answers = built.setdefault(question_set_id, (unit_id, {}))
+            if qid is not None:
+                answers[qid] = (str(correct), points)
+        entries = {}
+        for question_set_id, (unit_id, answers) in built.items():
+            total = sum(points for _, points in answers.values())
+            version = versions[question_set_id]
+            keys[question_set_id] = AnswerKey(question_set_id, version, unit_id, answers, total)
+            entries[_cache_key(question_set_id, version)] = {"unit_id": unit_id, "answers": answers, "total": total}
+        cache.set_many(entries, ANSWER_KEY_TIMEOUT)
+
+    for key in keys.values():
+        _remember(key)
+    return keys
+
+
+def invalidate_answer_key(question_set_id):
+    """Drop the cached key for a set; call after bulk updates that skip model signals."""
+    bump_question_set_version(question_set_id)
+    with _local_lock:
+        _local_keys.pop(question_set_id, None)
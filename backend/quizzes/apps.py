@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class QuizzesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'quizzes'
+
+    def ready(self):
+        """Import signal handlers when the app is ready"""
+        import quizzes.signals  # noqa
@@ -0,0 +1,101 @@
+"""
+Recording graded quiz attempts.
+
+Shared by direct submissions and timed quiz sessions: the attempt, its
+per-question answers, the leaderboard and the user's progress summary are
+written in one transaction from a cached answer key, without reading
+question rows. record_attempts() does the same for a batch of attempts
+synced from an offline client.
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from users import progress
+from .models import QuizAttempt, QuizAnswer
+from .answer_keys import get_answer_keys
+from . import leaderboards
+
+
+def record_attempt(user, answer_key, answers, started_at=None, finished_at=None):
+    """Grade `answers` against `answer_key` and store the attempt; returns the QuizAttempt."""
+    marked = answer_key.mark(answers if isinstance(answers, list) else [])
+    finished_at = finished_at or timezone.now()
+    with transaction.atomic():
+        attempt = QuizAttempt.objects.create(
+            user=user,
+            question_set_id=answer_key.question_set_id,
+            score=sum(points for _, _, points in marked.values()),
+            total=answer_key.total,
+            started_at=started_at or finished_at,
+            finished_at=finished_at,
+        )
+        QuizAnswer.objects.bulk_create([
+            QuizAnswer(attempt=attempt, question_id=qid, choice=choice[:50], is_correct=is_correct, points_awarded=points)
+            for qid, (choice, is_correct, points) in marked.items()
+        ])
+        leaderboards.record_attempt(attempt)
+        progress.record_attempt(attempt, answer_key.unit_id)
+    return attempt
+
+
+def record_attempts(user, submissions, _retry=True):
+    """
+    Store a batch of attempts made offline. Each submission is a dict with
+    client_id (UUID), question_set, answers and optional started_at /
+    finished_at. Submissions whose client_id the user already synced are
+    not stored again, so a retried sync is harmless.
+
+    Returns one (client_id, attempt or None, created) per distinct client_id,
+    in order; attempt is None when the question set does not exist.
+    """
+    now = timezone.now()
+    unique = {}
+    for sub in submissions:
+        unique.setdefault(sub["client_id"], sub)
+    existing = {
+        attempt.client_id: attempt
+        for attempt in QuizAttempt.objects.filter(user=user, client_id__in=list(unique))
+    }
+    answer_keys = get_answer_keys({sub["question_set"] for cid, sub in unique.items() if cid not in existing})
+
+    new, answers = [], []
+    for client_id, sub in unique.items():
+        answer_key = answer_keys.get(sub["question_set"])
+        if client_id in existing or answer_key is None:
+            continue
+        marked = answer_key.mark(sub["answers"] if isinstance(sub["answers"], list) else [])
+        # Device clocks are not trusted to be in the past
+        finished_at = min(sub.get("finished_at") or now, now)
+        new.append(QuizAttempt(
+            user=user,
+            question_set_id=answer_key.question_set_id,
+            score=sum(points for _, _, points in marked.values()),
+            total=answer_key.total,
+            started_at=min(sub.get("started_at") or finished_at, finished_at),
+            finished_at=finished_at,
+            client_id=client_id,
+        ))
+        answers.append(marked)
+
+    try:
+        with transaction.atomic():
+            QuizAttempt.objects.bulk_create(new)
+            QuizAnswer.objects.bulk_create([
+                QuizAnswer(attempt=attempt, question_id=qid, choice=choice[:50], is_correct=is_correct, points_awarded=points)
+                for attempt, marked in zip(new, answers)
+                for qid, (choice, is_correct, points) in marked.items()
+            ], batch_size=1000)
+            for attempt in new:
+                leaderboards.record_attempt(attempt)
+                progress.record_attempt(attempt, answer_keys[attempt.question_set_id].unit_id)
+    except IntegrityError:
+        # A concurrent retry of the same sync stored some of these first; the
+        # rerun reports them as already synced
+        if not _retry:
+            raise
+        return record_attempts(user, submissions, _retry=False)
+
+    created = {attempt.client_id: attempt for attempt in new}
+    return [
+        (client_id, existing.get(client_id) or created.get(client_id), client_id in created)
+        for client_id in unique
+    ]
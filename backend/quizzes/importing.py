@@ -0,0 +1,332 @@
+"""
+Streaming import of question banks from JSONL or CSV.
+
+Rows are read lazily, validated and written one chunk at a time, so memory
+use does not grow with the size of the bank. Each row describes one
+question:
+
+    question_set   id of an existing set, or
+    unit / unit_code + set_title   a set looked up (or created) by title in a unit
+    external_id    optional stable key; rows with one are upserted
+    text, choices, correct_choice, explanation, points
+
+`choices` is a list of strings or of {"id", "text"} objects (in CSV: a JSON
+array, or strings separated by "|"), and correct_choice must be one of the
+choice ids. Bulk writes bypass model signals, so the answer keys of every
+touched set are invalidated explicitly.
+"""
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from collections import Counter
+from itertools import islice
+from django.db import transaction
+from courses import counters
+from courses.catalog import bump_catalog_version
+from courses.models import Unit
+from .models import QuestionSet, Question
+from .answer_keys import invalidate_answer_key
+from .versions import bump_unit_version
+
+DEFAULT_CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 100
+UPSERT_FIELDS = ["text", "choices", "correct_choice", "explanation", "points"]
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    sets_created: int = 0
+    error_count: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self):
+        return {
+            "rows": self.rows, "created": self.created, "updated": self.updated,
+            "sets_created": self.sets_created, "error_count": self.error_count, "errors": self.errors,
+        }
+
+
+def detect_format(filename):
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    raise ImportFormatError("Cannot tell the format from the file name; use .jsonl or .csv")
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, row dict or parse error string) from a text stream."""
+    if fmt == "jsonl":
+        for line_no, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_no, f"Invalid JSON: {e}"
+                continue
+            yield line_no, row if isinstance(row, dict) else "Each line must be a JSON object"
+    elif fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        raise ImportFormatError(f"Unsupported format: {fmt}")
+
+
+def open_text(binary_stream):
+    return io.TextIOWrapper(binary_stream, encoding="utf-8-sig", newline="")
+
+
+def _parse_choices(value):
+    if isinstance(value, str):
+        value = value.strip()
+        if value.startswith("["):
+            value = json.loads(value)
+        else:
+            value = [part.strip() for part in value.split("|") if part.strip()]
+    if not isinstance(value, list) or len(value) < 2:
+        raise ValueError("choices must list at least two options")
+    if all(isinstance(c, str) for c in value):
+        ids = value
+    elif all(isinstance(c, dict) and "id" in c and "text" in c for c in value):
+        ids = [str(c["id"]) for c in value]
+    else:
+        raise ValueError('choices must all be strings or all be {"id", "text"} objects')
+    if len(set(ids)) != len(ids):
+        raise ValueError("choice ids must be unique")
+    return value, ids
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def validate_row(row, default_question_set=None):
+    """Return a cleaned dict for a row, raising ValueError with a message if it is invalid."""
+    text = row.get("text")
+    if _blank(text):
+        raise ValueError("text is required")
+    try:
+        choices, ids = _parse_choices(row.get("choices"))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"choices is not valid JSON: {e}")
+    correct = row.get("correct_choice")
+    if _blank(correct) or str(correct).strip() not in ids:
+        raise ValueError("correct_choice must be one of the choice ids")
+    try:
+        points = int(row["points"]) if not _blank(row.get("points")) else 1
+    except (TypeError, ValueError):
+        raise ValueError("points must be an integer")
+
+    cleaned = {
+        "text": str(text).strip(),
+        "choices": choices,
+        "correct_choice": str(correct).strip()[:50],
+        "explanation": "" if _blank(row.get("explanation")) else str(row["explanation"]),
+        "points": points,
+        "external_id": None if _blank(row.get("external_id")) else str(row["external_id"]).strip()[:100],
+    }
+    if not _blank(row.get("question_set")):
+        try:
+            cleaned["question_set"] = int(row["question_set"])
+        except (TypeError, ValueError):
+            raise ValueError("question_set must be an id")
+    elif not _blank(row.get("set_title")) and not (_blank(row.get("unit")) and _blank(row.get("unit_code"))):
+        cleaned["set_title"] = str(row["set_title"]).strip()[:255]
+        cleaned["unit"] = None if _blank(row.get("unit")) else str(row["unit"]).strip()
+        cleaned["unit_code"] = None if _blank(row.get("unit_code")) else str(row["unit_code"]).strip()
+    elif default_question_set is not None:
+        cleaned["question_set"] = default_question_set
+    else:
+        raise ValueError("give question_set, or set_title with unit or unit_code")
+    return cleaned
+
+
+class _SetResolver:
+    """Maps row set references to QuestionSet ids, creating titled sets on demand."""
+
+    def __init__(self, result, create=True):
+        self.result = result
+        self.create = create
+        self.units_by_id = dict(Unit.objects.values_list("id", "id"))
+        self.units_by_code = {code: pk for pk, code in Unit.objects.exclude(code="").values_list("id", "code")}
+        self.known_sets = set(QuestionSet.objects.values_list("id", flat=True))
+        self.by_title = {}  # (unit id, title) -> set id; None for sets a dry run would create
+
+    def _unit(self, row):
+        if row.get("unit"):
+            try:
+                return self.units_by_id.get(int(row["unit"]))
+            except ValueError:
+                return None
+        return self.units_by_code.get(row["unit_code"])
+
+    def resolve(self, rows):
+        """Fill row["question_set_id"] for every row, returning the rows whose set is unknown."""
+        missing_titles, unresolved = {}, []
+        for row in rows:
+            if "question_set" in row:
+                set_id = row["question_set"]
+            else:
+                unit_id = self._unit(row)
+                if unit_id is None:
+                    unresolved.append((row, "unknown unit"))
+                    continue
+                key = (unit_id, row["set_title"])
+                if key not in self.by_title:
+                    missing_titles.setdefault(key, []).append(row)
+                    continue
+                set_id = self.by_title[key]
+                if set_id is None:
+                    row["question_set_id"] = None
+                    continue
+            if set_id not in self.known_sets:
+                unresolved.append((row, f"question set {set_id} does not exist"))
+                continue
+            row["question_set_id"] = set_id
+
+        if missing_titles:
+            units = {unit_id for unit_id, _ in missing_titles}
+            titles = {title for _, title in missing_titles}
+            for pk, unit_id, title in QuestionSet.objects.filter(unit_id__in=units, title__in=titles).values_list("id", "unit_id", "title"):
+                self.by_title.setdefault((unit_id, title), pk)
+            to_create = [key for key in missing_titles if key not in self.by_title]
+            if to_create and self.create:
+                created = QuestionSet.objects.bulk_create([QuestionSet(unit_id=u, title=t) for u, t in to_create])
+                for key, qset in zip(to_create, created):
+                    self.by_title[key] = qset.pk
+                    self.known_sets.add(qset.pk)
+                self.result.sets_created += len(created)
+                # bulk_create skips the signals that maintain unit counters, unit pools and the catalog
+                for unit_id, n in Counter(unit_id for unit_id, _ in to_create).items():
+                    counters.adjust(unit_id, question_set_count=n)
+                    bump_unit_version(unit_id)
+                bump_catalog_version()
+            elif to_create:
+                # Dry run: report the sets the import would create, and accept their rows
+                self.by_title.update(dict.fromkeys(to_create))
+                self.result.sets_created += len(to_create)
+            for key, key_rows in missing_titles.items():
+                for row in key_rows:
+                    if key in self.by_title:
+                        row["question_set_id"] = self.by_title[key]
+                    else:
+                        unresolved.append((row, "question set does not exist"))
+        return unresolved
+
+
+def _write_chunk(rows, result):
+    keyed, plain = {}, []
+    for row in rows:
+        question = Question(
+            question_set_id=row["question_set_id"],
+            **{name: row[name] for name in UPSERT_FIELDS + ["external_id"]},
+        )
+        if row["external_id"]:
+            keyed[(row["question_set_id"], row["external_id"])] = question  # last row wins
+        else:
+            plain.append(question)
+
+    if keyed:
+        set_ids = {set_id for set_id, _ in keyed}
+        existing = set(
+            Question.objects.filter(question_set_id__in=set_ids, external_id__in={ext for _, ext in keyed})
+            .values_list("question_set_id", "external_id")
+        )
+        existing &= set(keyed)
+        Question.objects.bulk_create(
+            list(keyed.values()),
+            update_conflicts=True,
+            unique_fields=["question_set", "external_id"],
+            update_fields=UPSERT_FIELDS,
+        )
+        result.updated += len(existing)
+        result.created += len(keyed) - len(existing)
+    if plain:
+        Question.objects.bulk_create(plain)
+        result.created += len(plain)
+
+
+def _count_chunk(rows, result, planned):
+    """Count the questions _write_chunk would create and update, without writing."""
+    keyed, plain = set(), 0
+    for row in rows:
+        if not row["external_id"]:
+            plain += 1
+        elif row["question_set_id"] is None:
+            # In a set the import would create, so nothing to update yet
+            keyed.add((row["unit"] or row["unit_code"], row["set_title"], row["external_id"]))
+        else:
+            keyed.add((row["question_set_id"], row["external_id"]))
+    existing = keyed & planned  # written by an earlier chunk
+    lookup = [key for key in keyed - existing if len(key) == 2]
+    if lookup:
+        existing |= keyed & set(
+            Question.objects.filter(
+                question_set_id__in={set_id for set_id, _ in lookup}, external_id__in={ext for _, ext in lookup},
+            ).values_list("question_set_id", "external_id")
+        )
+    planned |= keyed
+    result.updated += len(existing)
+    result.created += len(keyed) - len(existing) + plain
+
+
+def import_questions(rows, chunk_size=DEFAULT_CHUNK_SIZE, default_question_set=None, dry_run=False, progress=None):
+    """
+    Import (line number, row) pairs as produced by read_rows(). Rows that
+    name no set go to default_question_set when it is given. Invalid rows
+    are skipped and reported; valid rows are written in chunk-sized
+    transactions. Returns an ImportResult.
+    """
+    result = ImportResult()
+    resolver = _SetResolver(result, create=not dry_run)
+    touched, planned = set(), set()
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        valid = []
+        for line_no, row in chunk:
+            result.rows += 1
+            if isinstance(row, str):
+                result.add_error(line_no, row)
+                continue
+            try:
+                cleaned = validate_row(row, default_question_set)
+            except ValueError as e:
+                result.add_error(line_no, str(e))
+                continue
+            cleaned["line"] = line_no
+            valid.append(cleaned)
+
+        with transaction.atomic():
+            for row, message in resolver.resolve(valid):
+                result.add_error(row["line"], message)
+            ready = [row for row in valid if "question_set_id" in row]
+            if dry_run:
+                _count_chunk(ready, result, planned)
+            else:
+                _write_chunk(ready, result)
+                touched.update(row["question_set_id"] for row in ready)
+        if progress:
+            progress(result)
+
+    for set_id in touched:
+        invalidate_answer_key(set_id)
+    return result
@@ -0,0 +1,111 @@
+"""
+Per-question-set leaderboards.
+
+LeaderboardEntry keeps each user's best score per set and is updated in the
+same transaction that stores a QuizAttempt, so reads never scan attempts:
+
+- top N is an index range scan over (question_set, -best_score, achieved_at)
+- a user's rank is 1 + the number of users with a strictly higher best score,
+  a COUNT over the head of that same index, so it never loads the whole set
+  and always reflects committed submissions.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Greatest
+from .models import LeaderboardEntry, QuizAttempt
+
+DEFAULT_TOP_N = 10
+MAX_TOP_N = 100
+
+
+def _raise_best(attempt):
+    improved = Q(best_score__lt=attempt.score)
+    return LeaderboardEntry.objects.filter(
+        question_set_id=attempt.question_set_id, user_id=attempt.user_id,
+    ).update(
+        attempts=F("attempts") + 1,
+        best_score=Greatest(F("best_score"), Value(attempt.score)),
+        best_total=Case(When(improved, then=Value(attempt.total)), default=F("best_total")),
+        achieved_at=Case(When(improved, then=Value(attempt.finished_at)), default=F("achieved_at")),
+    )
+
+
+def record_attempt(attempt):
+    """
+    Fold a newly created attempt into its set's leaderboard with a single
+    conditional UPDATE (an INSERT for a user's first attempt). Call inside
+    the attempt's transaction.
+    """
+    if not _raise_best(attempt):
+        try:
+            with transaction.atomic():
+                LeaderboardEntry.objects.create(
+                    question_set_id=attempt.question_set_id,
+                    user_id=attempt.user_id,
+                    best_score=attempt.score,
+                    best_total=attempt.total,
+                    achieved_at=attempt.finished_at,
+                )
+        except IntegrityError:
+            # Another request inserted the row first
+            _raise_best(attempt)
+
+
+def top_entries(question_set_id, limit=DEFAULT_TOP_N):
+    """Return [(rank, entry)] for the best `limit` users, ties sharing a rank."""
+    entries = list(
+        LeaderboardEntry.objects.filter(question_set_id=question_set_id)
+        .select_related("user")
+        .order_by("-best_score", "achieved_at")[:limit]
+    )
+    ranked, rank, previous = [], 0, None
+    for position, entry in enumerate(entries, 1):
+        if entry.best_score != previous:
+            rank, previous = position, entry.best_score
+        ranked.append((rank, entry))
+    return ranked
+
+
+def user_rank(question_set_id, user):
+    """Return (rank, entry) for a user, or None if they have no attempt on the set."""
+    entry = (
+        LeaderboardEntry.objects.filter(question_set_id=question_set_id, user=user)
+        .select_related("user")
+        .first()
+    )
+    if entry is None:
+        return None
+    higher = LeaderboardEntry.objects.filter(question_set_id=question_set_id, best_score__gt=entry.best_score).count()
+    return higher + 1, entry
+
+
+def rebuild_leaderboard(question_set_id):
+    """Recompute a set's leaderboard from its attempts, e.g. after a regrade."""
+    best = {}
+    rows = (
+        QuizAttempt.objects.filter(question_set_id=question_set_id)
+        .order_by("finished_at", "id")
+        .values_list("user_id", "score", "total", "finished_at", "started_at")
+    )
+    for user_id, score, total, finished_at, started_at in rows.iterator(chunk_size=5000):
+        current = best.get(user_id)
+        if current is None:
+            best[user_id] = [score, total, 1, finished_at or started_at]
+            continue
+        current[2] += 1
+        if score > current[0]:
+            current[0], current[1], current[3] = score, total, finished_at or started_at
+
+    with transaction.atomic():
+        LeaderboardEntry.objects.filter(question_set_id=question_set_id).delete()
+        LeaderboardEntry.objects.bulk_create(
+            [
+                LeaderboardEntry(
+                    question_set_id=question_set_id, user_id=user_id,
+                    best_score=score, best_total=total, attempts=attempts, achieved_at=achieved_at,
+                )
+                for user_id, (score, total, attempts, achieved_at) in best.items()
+            ],
+            batch_size=1000,
+        )
+    return len(best)
@@ -0,0 +1,39 @@
+"""
+Management command to compute item statistics (difficulty, discrimination,
+distractor frequencies, KR-20) for quiz questions.
+Only attempts created since the previous run are read unless --full is given.
+"""
+from django.core.management.base import BaseCommand
+from quizzes.analytics import run_item_analysis, DEFAULT_CHUNK_ATTEMPTS
+
+
+class Command(BaseCommand):
+    help = 'Update quiz item statistics from attempts made since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Discard stored statistics and rebuild them from every attempt',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_ATTEMPTS,
+            help='Number of attempt ids read per chunk',
+        )
+
+    def handle(self, *args, **options):
+        def progress(done, upto, acc):
+            self.stdout.write(f'  attempts <= {done}/{upto}: {acc.answers} answers read')
+
+        summary = run_item_analysis(
+            chunk_attempts=options['chunk_size'],
+            full=options['full'],
+            progress=progress if options['verbosity'] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed attempts {summary['from_attempt'] + 1}-{summary['to_attempt']}: "
+            f"{summary['attempts']} attempts, {summary['answers']} answers, "
+            f"{summary['questions']} questions and {summary['question_sets']} question sets updated"
+        ))
@@ -0,0 +1,72 @@
+"""
+Management command to bulk import a question bank from a JSONL or CSV file.
+Rows are streamed and written in chunks; rows with an external_id are
+upserted, so re-importing an edited bank updates questions in place.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from quizzes.models import QuestionSet
+from quizzes.importing import import_questions, read_rows, detect_format, ImportFormatError, DEFAULT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Import questions from a .jsonl or .csv question bank'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the question bank file')
+        parser.add_argument(
+            '--format',
+            choices=['jsonl', 'csv'],
+            help='File format (default: taken from the file extension)',
+        )
+        parser.add_argument(
+            '--question-set',
+            type=int,
+            help='ID of the question set for rows that do not name one',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Number of rows validated and written per transaction',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the file and report errors without writing anything',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            fmt = options['format'] or detect_format(options['path'])
+        except ImportFormatError as e:
+            raise CommandError(str(e))
+        set_id = options['question_set']
+        if set_id is not None and not QuestionSet.objects.filter(pk=set_id).exists():
+            raise CommandError(f'Question set {set_id} does not exist')
+
+        def progress(result):
+            self.stdout.write(f'  {result.rows} rows read: {result.created} created, {result.updated} updated')
+
+        try:
+            stream = open(options['path'], encoding='utf-8-sig', newline='')
+        except OSError as e:
+            raise CommandError(f'Cannot open {options["path"]}: {e}')
+        with stream:
+            result = import_questions(
+                read_rows(stream, fmt),
+                chunk_size=options['chunk_size'],
+                default_question_set=set_id,
+                dry_run=options['dry_run'],
+                progress=progress if options['verbosity'] > 1 else None,
+            )
+
+        for error in result.errors:
+            self.stderr.write(f'  line {error["line"]}: {error["error"]}')
+        if result.error_count > len(result.errors):
+            self.stderr.write(f'  ... and {result.error_count - len(result.errors)} more errors')
+        prefix = 'Dry run: would import' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix} {result.created + result.updated} questions '
+            f'({result.created} new, {result.updated} updated, {result.sets_created} new sets); '
+            f'{result.error_count} rows skipped'
+        ))
@@ -0,0 +1,99 @@
+"""
+Management command to recompute stored quiz attempt scores after an editor
+corrects correct_choice or points on questions of a set.
+Only attempts that answered the given questions are rescored.
+With --pending it runs the jobs queued from the admin instead, and with
+--watch it keeps polling for new ones (the regrade worker process).
+"""
+import logging
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from quizzes.models import QuestionSet
+from quizzes.regrading import start_regrade, unfinished_job, pending_jobs, run_regrade, DEFAULT_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Regrade quiz attempts of a question set against its current answer key'
+
+    def add_arguments(self, parser):
+        parser.add_argument('question_set', type=int, nargs='?', help='ID of the question set to regrade')
+        parser.add_argument(
+            '--questions',
+            help='Comma-separated IDs of the changed questions (default: every question of the set)',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue the most recent unfinished regrade job of this set',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Number of attempts rescored per transaction',
+        )
+        parser.add_argument(
+            '--pending',
+            action='store_true',
+            help='Run every unfinished regrade job (queued from the admin) instead of one set',
+        )
+        parser.add_argument(
+            '--watch',
+            type=int,
+            metavar='SECONDS',
+            help='With --pending, keep running and check for new jobs every SECONDS',
+        )
+
+    def handle(self, *args, **options):
+        if options['pending']:
+            while True:
+                # A long-lived worker must not keep using a connection the database dropped
+                close_old_connections()
+                for job in pending_jobs():
+                    self.stdout.write(f'Running regrade job {job.pk} for question set {job.question_set_id}')
+                    try:
+                        self.run(job, options)
+                    except Exception:
+                        if not options['watch']:
+                            raise
+                        logger.exception(f'Regrade job {job.pk} failed; it is retried once its claim expires')
+                if not options['watch']:
+                    return
+                time.sleep(options['watch'])
+
+        set_id = options['question_set']
+        if set_id is None:
+            raise CommandError('Give a question set ID, or --pending')
+        if not QuestionSet.objects.filter(pk=set_id).exists():
+            raise CommandError(f'Question set {set_id} does not exist')
+
+        job = unfinished_job(set_id) if options['resume'] else None
+        if job:
+            self.stdout.write(f'Resuming regrade job {job.pk} after attempt {job.last_attempt_id}')
+        else:
+            question_ids = None
+            if options['questions']:
+                try:
+                    question_ids = [int(pk) for pk in options['questions'].split(',') if pk.strip()]
+                except ValueError:
+                    raise CommandError('--questions must be a comma-separated list of IDs')
+            job = start_regrade(set_id, question_ids)
+            self.stdout.write(f'Started regrade job {job.pk} for {len(job.question_ids)} questions')
+        if not self.run(job, options):
+            raise CommandError(f'Regrade job {job.pk} is being run by another worker')
+
+    def run(self, job, options):
+        def progress(job):
+            self.stdout.write(f'  up to attempt {job.last_attempt_id}: {job.attempts_regraded} attempts regraded')
+
+        job = run_regrade(job, batch_size=options['batch_size'], progress=progress if options['verbosity'] > 1 else None)
+        if job is None:
+            return None
+        self.stdout.write(self.style.SUCCESS(
+            f'Regraded {job.attempts_regraded} attempts ({job.answers_changed} answers changed). '
+            f'Run "analyze_items --full" to refresh item statistics.'
+        ))
+        return job
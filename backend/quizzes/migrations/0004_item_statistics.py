@@ -0,0 +1,58 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0003_quizanswer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemAnalysisCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_attempt_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuestionSetStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.IntegerField(default=0)),
+                ('sum_raw', models.FloatField(default=0)),
+                ('sum_raw_sq', models.FloatField(default=0)),
+                ('mean_raw', models.FloatField(blank=True, null=True)),
+                ('kr20', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('question_set', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='quizzes.questionset')),
+            ],
+            options={
+                'verbose_name_plural': 'question set statistics',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('responses', models.IntegerField(default=0)),
+                ('correct', models.IntegerField(default=0)),
+                ('sum_total', models.FloatField(default=0)),
+                ('sum_total_sq', models.FloatField(default=0)),
+                ('sum_total_correct', models.FloatField(default=0)),
+                ('choice_counts', models.JSONField(blank=True, default=dict)),
+                ('difficulty', models.FloatField(blank=True, null=True)),
+                ('discrimination', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='quizzes.question')),
+            ],
+            options={
+                'verbose_name_plural': 'question statistics',
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0004_item_statistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegradeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_ids', models.JSONField(default=list)),
+                ('last_attempt_id', models.BigIntegerField(default=0)),
+                ('attempts_regraded', models.IntegerField(default=0)),
+                ('answers_changed', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='quizanswer',
+            name='question',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='quizzes.question'),
+        ),
+        migrations.AddIndex(
+            model_name='quizanswer',
+            index=models.Index(fields=['question', 'attempt'], name='quizanswer_question_attempt'),
+        ),
+        migrations.AddField(
+            model_name='regradejob',
+            name='question_set',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='regrade_jobs', to='quizzes.questionset'),
+        ),
+    ]
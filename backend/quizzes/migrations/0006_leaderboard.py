@@ -0,0 +1,32 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0005_regrade_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('best_score', models.IntegerField()),
+                ('best_total', models.IntegerField()),
+                ('attempts', models.IntegerField(default=1)),
+                ('achieved_at', models.DateTimeField()),
+                ('question_set', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard', to='quizzes.questionset')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['question_set', '-best_score', 'achieved_at'], name='leaderboard_ranking')],
+                'constraints': [models.UniqueConstraint(fields=('question_set', 'user'), name='leaderboard_unique_user')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:39
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0006_leaderboard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionset',
+            name='time_limit_minutes',
+            field=models.PositiveIntegerField(blank=True, help_text='Leave empty for untimed quizzes', null=True),
+        ),
+        migrations.AlterField(
+            model_name='quizattempt',
+            name='started_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-19 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0009_quizattempt_client_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itemanalysischeckpoint',
+            name='seen_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='itemanalysischeckpoint',
+            name='seen_attempt_id',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
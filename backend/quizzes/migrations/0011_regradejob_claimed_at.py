@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 15:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0010_item_analysis_watermark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='regradejob',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
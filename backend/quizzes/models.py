@@ -1,10 +1,35 @@
 from django.db import models
+from django.db.models import Avg, Count, IntegerField, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from django.utils import timezone
+
+
+class QuestionSetQuerySet(models.QuerySet):
+    def with_summary(self):
+        """
+        Annotate each set with question and attempt statistics.
+        Correlated subqueries keep this to a single SELECT without the row
+        multiplication a double JOIN over questions and attempts would cause.
+        """
+        questions = Question.objects.filter(question_set=OuterRef("pk")).order_by().values("question_set")
+        attempts = QuizAttempt.objects.filter(question_set=OuterRef("pk")).order_by().values("question_set")
+        return self.annotate(
+            question_count=Coalesce(Subquery(questions.annotate(n=Count("id")).values("n")), Value(0)),
+            total_points=Coalesce(Subquery(questions.annotate(n=Sum("points")).values("n")), Value(0)),
+            attempt_count=Coalesce(Subquery(attempts.annotate(n=Count("id")).values("n")), Value(0)),
+            average_score=Subquery(attempts.annotate(n=Avg("score")).values("n")),
+            best_score=Subquery(attempts.annotate(n=Max("score")).values("n"), output_field=IntegerField()),
+        )
+
 
 class QuestionSet(models.Model):
     unit = models.ForeignKey("courses.Unit", on_delete=models.CASCADE, related_name="question_sets")
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
+    time_limit_minutes = models.PositiveIntegerField(null=True, blank=True, help_text="Leave empty for untimed quizzes")
+
+    objects = QuestionSetQuerySet.as_manager()
 
     def __str__(self):
         return self.title
@@ -16,6 +41,13 @@ class Question(models.Model):
     correct_choice = models.CharField(max_length=50)
     explanation = models.TextField(blank=True)
     points = models.IntegerField(default=1)
+    # Stable key from an imported question bank, used to upsert re-imports
+    external_id = models.CharField(max_length=100, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["question_set", "external_id"], name="question_unique_external_id"),
+        ]
 
     def __str__(self):
         return f"Q: {self.text[:50]}"
@@ -25,5 +57,137 @@ class QuizAttempt(models.Model):
     question_set = models.ForeignKey(QuestionSet, on_delete=models.CASCADE)
     score = models.IntegerField()
     total = models.IntegerField()
-    started_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: timed sessions record when the quiz was actually started
+    started_at = models.DateTimeField(default=timezone.now)
     finished_at = models.DateTimeField(null=True, blank=True)
+    # Client-generated id of an attempt synced from an offline device; makes re-syncs idempotent
+    client_id = models.UUIDField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "client_id"], name="quizattempt_unique_client_id"),
+        ]
+
+class QuizAnswer(models.Model):
+    """
+    One submitted answer of a QuizAttempt. Rows are written in a single
+    bulk_create per attempt; the attempt foreign key index and the
+    (question, attempt) index serve the "answers of an attempt" and
+    "answers to a question" lookups.
+    """
+    attempt = models.ForeignKey(QuizAttempt, on_delete=models.CASCADE, related_name="answers")
+    # Covered by the (question, attempt) index below
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="answers", db_index=False)
+    choice = models.CharField(max_length=50)
+    is_correct = models.BooleanField(default=False)
+    points_awarded = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Regrading walks the attempts that answered given questions in id order
+            models.Index(fields=["question", "attempt"], name="quizanswer_question_attempt"),
+        ]
+
+    def __str__(self):
+        return f"Attempt {self.attempt_id} Q{self.question_id}: {self.choice}"
+
+class QuestionStatistics(models.Model):
+    """
+    Classical item statistics for a Question, maintained by quizzes.analytics.
+    The running sums are the sufficient statistics that let each run fold in
+    only new attempts; difficulty/discrimination are derived from them.
+    """
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, related_name="statistics")
+    responses = models.IntegerField(default=0)
+    correct = models.IntegerField(default=0)
+    sum_total = models.FloatField(default=0)
+    sum_total_sq = models.FloatField(default=0)
+    sum_total_correct = models.FloatField(default=0)
+    choice_counts = models.JSONField(default=dict, blank=True)
+    difficulty = models.FloatField(null=True, blank=True)
+    discrimination = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "question statistics"
+
+    def __str__(self):
+        return f"Stats for question {self.question_id}"
+
+
+class QuestionSetStatistics(models.Model):
+    """Per-set attempt score moments and KR-20 reliability, maintained by quizzes.analytics."""
+    question_set = models.OneToOneField(QuestionSet, on_delete=models.CASCADE, related_name="statistics")
+    attempts = models.IntegerField(default=0)
+    sum_raw = models.FloatField(default=0)
+    sum_raw_sq = models.FloatField(default=0)
+    mean_raw = models.FloatField(null=True, blank=True)
+    kr20 = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "question set statistics"
+
+    def __str__(self):
+        return f"Stats for question set {self.question_set_id}"
+
+
+class ItemAnalysisCheckpoint(models.Model):
+    """
+    High-water mark of the attempts already folded into the item statistics,
+    and the highest attempt id seen by the last run, which becomes the next
+    mark once every transaction open at that time has committed.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    last_attempt_id = models.BigIntegerField(default=0)
+    seen_attempt_id = models.BigIntegerField(default=0)
+    seen_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_attempt_id}"
+
+
+class RegradeJob(models.Model):
+    """
+    A resumable rescoring of the attempts that answered some questions of a set.
+    last_attempt_id is committed together with each batch, so an interrupted
+    job continues where it stopped. claimed_at is the lease of the worker
+    running it, renewed with each batch.
+    """
+    question_set = models.ForeignKey(QuestionSet, on_delete=models.CASCADE, related_name="regrade_jobs")
+    question_ids = models.JSONField(default=list)
+    last_attempt_id = models.BigIntegerField(default=0)
+    attempts_regraded = models.IntegerField(default=0)
+    answers_changed = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Regrade {self.question_set_id} ({len(self.question_ids)} questions)"
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Best score of one user on one question set, maintained incrementally by
+    quizzes.leaderboards as attempts are submitted. The ordering index makes
+    top-N reads a short index range scan regardless of attempt volume.
+    """
+    question_set = models.ForeignKey(QuestionSet, on_delete=models.CASCADE, related_name="leaderboard")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="leaderboard_entries")
+    best_score = models.IntegerField()
+    best_total = models.IntegerField()
+    attempts = models.IntegerField(default=1)
+    achieved_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["question_set", "user"], name="leaderboard_unique_user"),
+        ]
+        indexes = [
+            models.Index(fields=["question_set", "-best_score", "achieved_at"], name="leaderboard_ranking"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} on {self.question_set_id}: {self.best_score}"
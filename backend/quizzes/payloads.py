@@ -0,0 +1,91 @@
+"""
+Pre-rendered question set payloads.
+
+The detail payload of a set (metadata and questions, never the answers) is
+rendered to JSON once per set version and compressed (Brotli and gzip)
+alongside. Its
+content hash names an immutable URL, /api/quizzes/sets/<id>/v/<hash>/, that
+browsers and CDNs may cache indefinitely; any change to the set or its
+questions bumps the version (quizzes.signals), producing a new hash and URL.
+
+Payloads are kept in a small per-process dict in front of the shared cache.
+Entries are also stored under their hash, so a client holding a slightly
+older URL still gets the content it names while it remains cached.
+"""
+import hashlib
+import threading
+from typing import NamedTuple, Optional
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+from cpa_academy.compression import precompress
+from cpa_academy.db_routers import use_primary
+from .models import QuestionSet
+from .serializers import QuestionSetSerializer
+from .versions import question_set_version
+
+PAYLOAD_TIMEOUT = 60 * 60 * 24
+LOCAL_MAX_ENTRIES = 128
+HASH_LENGTH = 16
+
+_local = {}
+_local_lock = threading.Lock()
+
+
+class Payload(NamedTuple):
+    question_set_id: int
+    content_hash: str
+    body: bytes
+    compressed: dict
+
+
+def _version_key(question_set_id, version):
+    return f"quizzes:payload:v2:{question_set_id}:{version}"
+
+
+def _hash_key(question_set_id, content_hash):
+    return f"quizzes:payload:v2:{question_set_id}:hash:{content_hash}"
+
+
+def _remember(key, payload):
+    with _local_lock:
+        if len(_local) >= LOCAL_MAX_ENTRIES and key not in _local:
+            _local.pop(next(iter(_local)))
+        _local[key] = payload
+
+
+def render_payload(question_set_id) -> Optional[Payload]:
+    question_set = QuestionSet.objects.prefetch_related("questions").filter(pk=question_set_id).first()
+    if question_set is None:
+        return None
+    body = JSONRenderer().render(QuestionSetSerializer(question_set).data)
+    content_hash = hashlib.sha256(body).hexdigest()[:HASH_LENGTH]
+    return Payload(question_set_id, content_hash, body, precompress(body))
+
+
+def current_payload(question_set_id) -> Optional[Payload]:
+    """The payload of the set's current version, or None if the set does not exist."""
+    key = _version_key(question_set_id, question_set_version(question_set_id))
+    payload = _local.get(key)
+    if payload is not None:
+        return payload
+    cached = cache.get(key)
+    if cached is not None:
+        payload = Payload(question_set_id, *cached)
+    else:
+        with use_primary():
+            payload = render_payload(question_set_id)
+        if payload is None:
+            return None
+        entry = (payload.content_hash, payload.body, payload.compressed)
+        cache.set_many({key: entry, _hash_key(question_set_id, payload.content_hash): entry}, PAYLOAD_TIMEOUT)
+    _remember(key, payload)
+    return payload
+
+
+def payload_by_hash(question_set_id, content_hash) -> Optional[Payload]:
+    """The payload a versioned URL names, if it is current or still cached."""
+    current = current_payload(question_set_id)
+    if current is None or current.content_hash == content_hash:
+        return current
+    cached = cache.get(_hash_key(question_set_id, content_hash))
+    return Payload(question_set_id, *cached) if cached is not None else None
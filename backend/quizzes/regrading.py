@@ -0,0 +1,166 @@
+"""
+Bulk regrading of quiz attempts after answer-key corrections.
+
+A RegradeJob names a question set and the questions whose correct_choice or
+points changed. Running it walks, in attempt-id order, only the attempts that
+answered one of those questions, rescores their stored QuizAnswer rows with
+NumPy against the current key and writes the results back with bulk_update.
+Each batch commits together with the job's cursor, so a job interrupted at
+any point can be resumed without redoing or skipping attempts. A worker
+first claims the job with a conditional UPDATE of claimed_at and renews the
+claim with every batch, so two workers never run the same job; a claim not
+renewed for CLAIM_TIMEOUT seconds (a crashed worker) can be taken over.
+Once the scores are written the set's leaderboard and the unit's progress
+summaries are rebuilt.
+
+Jobs can take far longer than a web request may run, so the admin only
+queues them; "manage.py regrade_attempts --pending" (the worker process in
+the Procfile) runs every unfinished job.
+"""
+import logging
+from datetime import timedelta
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Question, QuizAttempt, QuizAnswer, RegradeJob
+from .answer_keys import build_answer_key, invalidate_answer_key
+from .leaderboards import rebuild_leaderboard
+from users.progress import reconcile_progress
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+CLAIM_TIMEOUT = 600
+
+
+def start_regrade(question_set_id, question_ids=None):
+    """Create a job for the given questions of a set (all of them when omitted)."""
+    questions = Question.objects.filter(question_set_id=question_set_id)
+    if question_ids is not None:
+        questions = questions.filter(pk__in=question_ids)
+    return RegradeJob.objects.create(
+        question_set_id=question_set_id,
+        question_ids=sorted(questions.values_list("id", flat=True)),
+    )
+
+
+def unfinished_job(question_set_id):
+    return (
+        RegradeJob.objects.filter(question_set_id=question_set_id, finished_at__isnull=True)
+        .order_by("-created_at")
+        .first()
+    )
+
+
+def pending_jobs():
+    """Unfinished jobs, oldest first."""
+    return RegradeJob.objects.filter(finished_at__isnull=True).order_by("created_at", "pk")
+
+
+def claim_job(job):
+    """Take the job for this worker. False when another worker holds a live claim or it is finished."""
+    now = timezone.now()
+    claimed = (
+        RegradeJob.objects.filter(pk=job.pk, finished_at__isnull=True)
+        .filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=now - timedelta(seconds=CLAIM_TIMEOUT)))
+        .update(claimed_at=now)
+    )
+    if claimed:
+        job.claimed_at = now
+    return bool(claimed)
+
+
+def rescore(rows, question_ids, correct_choices, points):
+    """
+    Vectorized rescoring of (answer_id, attempt_id, question_id, choice,
+    is_correct, points_awarded) rows against a key given as sorted
+    question_ids with aligned correct_choices/points arrays.
+
+    Returns (changed answer rows as (id, is_correct, points), attempt ids, attempt scores).
+    """
+    answer_ids, attempt_ids, answer_qids, choices, was_correct, old_points = zip(*rows)
+    answer_qids = np.asarray(answer_qids, dtype=np.int64)
+    idx = np.clip(np.searchsorted(question_ids, answer_qids), 0, max(len(question_ids) - 1, 0))
+    known = question_ids[idx] == answer_qids if len(question_ids) else np.zeros(len(rows), dtype=bool)
+
+    is_correct = known & (np.asarray(choices, dtype=str) == correct_choices[idx])
+    awarded = np.where(is_correct, points[idx], 0)
+    changed = (is_correct != np.asarray(was_correct, dtype=bool)) | (awarded != np.asarray(old_points))
+
+    attempts, inverse = np.unique(np.asarray(attempt_ids, dtype=np.int64), return_inverse=True)
+    scores = np.bincount(inverse, weights=awarded, minlength=len(attempts))
+
+    changed_rows = [
+        (answer_id, bool(ok), int(pts))
+        for answer_id, ok, pts in zip(np.asarray(answer_ids)[changed].tolist(), is_correct[changed], awarded[changed])
+    ]
+    return changed_rows, attempts.tolist(), scores.astype(np.int64).tolist()
+
+
+def run_regrade(job, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Process a job to completion (or from its cursor when resumed) and return
+    it, or None when another worker is running it.
+    """
+    if not claim_job(job):
+        return None
+    job.refresh_from_db(fields=["last_attempt_id", "attempts_regraded", "answers_changed"])
+    invalidate_answer_key(job.question_set_id)
+    key = build_answer_key(job.question_set_id, version=0)
+    if key is None or not job.question_ids:
+        job.finished_at = timezone.now()
+        job.save(update_fields=["finished_at"])
+        return job
+
+    question_ids = np.array(sorted(key.answers), dtype=np.int64)
+    correct_choices = np.array([key.answers[qid][0] for qid in question_ids.tolist()], dtype=str)
+    points = np.array([key.answers[qid][1] for qid in question_ids.tolist()], dtype=np.int64)
+
+    # Totals depend only on the key, so one set-based UPDATE covers every attempt
+    QuizAttempt.objects.filter(question_set_id=job.question_set_id).exclude(total=key.total).update(total=key.total)
+
+    while True:
+        attempt_ids = list(
+            QuizAnswer.objects.filter(question_id__in=job.question_ids, attempt_id__gt=job.last_attempt_id)
+            .order_by("attempt_id")
+            .values_list("attempt_id", flat=True)
+            .distinct()[:batch_size]
+        )
+        if not attempt_ids:
+            break
+        rows = list(
+            QuizAnswer.objects.filter(attempt_id__in=attempt_ids)
+            .values_list("id", "attempt_id", "question_id", "choice", "is_correct", "points_awarded")
+            .order_by()
+        )
+        changed_rows, attempts, scores = rescore(rows, question_ids, correct_choices, points)
+
+        with transaction.atomic():
+            QuizAnswer.objects.bulk_update(
+                [QuizAnswer(id=answer_id, is_correct=ok, points_awarded=pts) for answer_id, ok, pts in changed_rows],
+                ["is_correct", "points_awarded"],
+                batch_size=batch_size,
+            )
+            QuizAttempt.objects.bulk_update(
+                [QuizAttempt(id=attempt_id, score=score) for attempt_id, score in zip(attempts, scores)],
+                ["score"],
+                batch_size=batch_size,
+            )
+            job.last_attempt_id = attempt_ids[-1]
+            job.attempts_regraded += len(attempts)
+            job.answers_changed += len(changed_rows)
+            job.claimed_at = timezone.now()
+            job.save(update_fields=["last_attempt_id", "attempts_regraded", "answers_changed", "claimed_at"])
+        if progress:
+            progress(job)
+
+    rebuild_leaderboard(job.question_set_id)
+    reconcile_progress(unit_id=key.unit_id)
+    job.finished_at = timezone.now()
+    job.save(update_fields=["finished_at"])
+    logger.info(
+        f"Regrade job {job.pk} for question set {job.question_set_id}: "
+        f"{job.attempts_regraded} attempts, {job.answers_changed} answers changed"
+    )
+    return job
@@ -0,0 +1,136 @@
+"""
+Random question sampling for practice exams.
+
+Each question set has a pool: its question ids in ascending order plus a
+difficulty (p-value from QuestionStatistics, 0.5 when unknown) per question.
+Units map to the ids of their sets. Pools and unit lists are cached in
+process memory and in the shared cache under the version counters from
+quizzes.versions, so they are rebuilt only after questions or sets change.
+
+Selection happens in memory with a seeded NumPy generator: uniform sampling
+without replacement, or weighted sampling without replacement using
+Efraimidis-Spirakis exponential keys. The same seed over the same pool
+versions always yields the same exam, so exams never need to be stored.
+"""
+import threading
+from typing import NamedTuple
+import numpy as np
+from django.core.cache import cache
+from .models import QuestionSet, Question, QuestionStatistics
+from .versions import question_set_version, unit_version
+
+POOL_TIMEOUT = 60 * 60 * 24
+LOCAL_MAX_ENTRIES = 1024
+DEFAULT_DIFFICULTY = 0.5
+WEIGHTINGS = ("uniform", "hard", "easy", "weak")
+
+_local = {}
+_local_lock = threading.Lock()
+
+
+class QuestionPool(NamedTuple):
+    version: int
+    ids: np.ndarray
+    difficulty: np.ndarray
+
+
+def _remember(key, value):
+    with _local_lock:
+        if len(_local) >= LOCAL_MAX_ENTRIES and key not in _local:
+            _local.pop(next(iter(_local)))
+        _local[key] = value
+
+
+def _cached(key, build):
+    value = _local.get(key)
+    if value is not None:
+        return value
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, POOL_TIMEOUT)
+    _remember(key, value)
+    return value
+
+
+def question_set_pool(question_set_id):
+    version = question_set_version(question_set_id)
+
+    def build():
+        ids = np.fromiter(
+            Question.objects.filter(question_set_id=question_set_id).order_by("id").values_list("id", flat=True),
+            dtype=np.int64,
+        )
+        known = dict(
+            QuestionStatistics.objects.filter(question__question_set_id=question_set_id, difficulty__isnull=False)
+            .values_list("question_id", "difficulty")
+        )
+        difficulty = np.array([known.get(qid, DEFAULT_DIFFICULTY) for qid in ids.tolist()], dtype=np.float64)
+        return {"ids": ids.tobytes(), "difficulty": difficulty.tobytes()}
+
+    raw = _cached(f"quizzes:pool:set:{question_set_id}:{version}", build)
+    return QuestionPool(
+        version,
+        np.frombuffer(raw["ids"], dtype=np.int64),
+        np.frombuffer(raw["difficulty"], dtype=np.float64),
+    )
+
+
+def unit_question_set_ids(unit_id):
+    version = unit_version(unit_id)
+
+    def build():
+        return list(QuestionSet.objects.filter(unit_id=unit_id).order_by("id").values_list("id", flat=True))
+
+    return _cached(f"quizzes:pool:unit:{unit_id}:{version}", build)
+
+
+def _weights(pools, pool_units, weighting, weak_units):
+    if weighting == "hard":
+        return [1.05 - pool.difficulty for pool in pools]
+    if weighting == "easy":
+        return [pool.difficulty + 0.05 for pool in pools]
+    if weighting == "weak":
+        # Units where the student scores lower get proportionally more questions
+        return [
+            np.full(len(pool.ids), 1.1 - weak_units.get(unit_id, 0.5))
+            for pool, unit_id in zip(pools, pool_units)
+        ]
+    return None
+
+
+def sample_questions(question_set_ids=(), unit_ids=(), count=20, seed=0, weighting="uniform", weak_units=None):
+    """
+    Draw up to `count` distinct question ids from the given sets and units.
+    weak_units maps unit id -> the student's average fraction correct and is
+    only used with weighting="weak". Returns (question ids, pool versions).
+    """
+    unit_of_set = {}
+    for unit_id in sorted(set(unit_ids)):
+        for set_id in unit_question_set_ids(unit_id):
+            unit_of_set.setdefault(set_id, unit_id)
+    set_ids = sorted(set(question_set_ids) | set(unit_of_set))
+    if set_ids and weighting == "weak":
+        missing = [sid for sid in set_ids if sid not in unit_of_set]
+        unit_of_set.update(QuestionSet.objects.filter(pk__in=missing).values_list("id", "unit_id"))
+
+    pools = [question_set_pool(sid) for sid in set_ids]
+    versions = {sid: pool.version for sid, pool in zip(set_ids, pools)}
+    if not pools:
+        return [], versions
+    # Sets are deduplicated above, so every id in the combined pool is distinct
+    ids = np.concatenate([pool.ids for pool in pools])
+    if not len(ids):
+        return [], versions
+    count = min(count, len(ids))
+    rng = np.random.default_rng(seed)
+
+    weights = _weights(pools, [unit_of_set.get(sid) for sid in set_ids], weighting, weak_units or {})
+    if weights is None:
+        chosen = rng.choice(len(ids), size=count, replace=False)
+    else:
+        weights = np.concatenate(weights)
+        keys = rng.exponential(size=len(ids)) / weights
+        chosen = np.argpartition(keys, count - 1)[:count]
+        chosen = chosen[np.argsort(keys[chosen])]
+    return ids[chosen].tolist(), versions
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import QuestionSet, Question, QuizAttempt
+from .models import QuestionSet, Question, QuizAttempt, QuestionStatistics, QuestionSetStatistics, LeaderboardEntry
 
 class ChoiceSerializer(serializers.Serializer):
     id = serializers.CharField()
@@ -11,14 +11,64 @@ class QuestionSerializer(serializers.ModelSerializer):
         fields = ("id","text","choices","points","explanation")
         read_only_fields = ("explanation",)
 
+class PracticeQuestionSerializer(QuestionSerializer):
+    class Meta(QuestionSerializer.Meta):
+        fields = QuestionSerializer.Meta.fields + ("question_set",)
+
 class QuestionSetSerializer(serializers.ModelSerializer):
     questions = QuestionSerializer(many=True, read_only=True)
     class Meta:
         model = QuestionSet
-        fields = ("id","unit","title","description","questions")
+        fields = ("id","unit","title","description","time_limit_minutes","questions")
+
+class QuestionSetSummarySerializer(serializers.ModelSerializer):
+    """List representation: set metadata plus aggregates from QuestionSet.objects.with_summary()."""
+    question_count = serializers.IntegerField(read_only=True)
+    total_points = serializers.IntegerField(read_only=True)
+    attempt_count = serializers.IntegerField(read_only=True)
+    average_score = serializers.FloatField(read_only=True, allow_null=True)
+    best_score = serializers.IntegerField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = QuestionSet
+        fields = ("id","unit","title","description","time_limit_minutes","question_count","total_points","attempt_count","average_score","best_score")
 
 class QuizAttemptSerializer(serializers.ModelSerializer):
     class Meta:
         model = QuizAttempt
-        fields = ("id","user","question_set","score","total","started_at","finished_at")
-        read_only_fields = ("user","score","total","started_at","finished_at")
+        fields = ("id","user","question_set","score","total","started_at","finished_at","client_id")
+        read_only_fields = ("user","score","total","started_at","finished_at","client_id")
+
+class OfflineAttemptSerializer(serializers.Serializer):
+    """One attempt of a batch sync; client_id is generated on the device and makes retries idempotent."""
+    client_id = serializers.UUIDField()
+    question_set = serializers.IntegerField()
+    answers = serializers.ListField(child=serializers.DictField(), allow_empty=True)
+    started_at = serializers.DateTimeField(required=False, allow_null=True)
+    finished_at = serializers.DateTimeField(required=False, allow_null=True)
+
+class QuestionStatisticsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = QuestionStatistics
+        fields = ("question","responses","correct","difficulty","discrimination","choice_counts","updated_at")
+
+class QuestionSetStatisticsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = QuestionSetStatistics
+        fields = ("question_set","attempts","mean_raw","kr20","updated_at")
+
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    """A leaderboard row; the view sets `rank` on each entry before serializing."""
+    rank = serializers.IntegerField(read_only=True)
+    name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = LeaderboardEntry
+        fields = ("rank","name","best_score","best_total","attempts","achieved_at")
+
+    def get_name(self, obj):
+        # Usernames are email addresses, so only show a display name publicly
+        user = obj.user
+        if user.first_name:
+            return f"{user.first_name} {user.last_name[:1]}".strip()
+        return user.username.split("@")[0]
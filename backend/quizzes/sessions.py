@@ -0,0 +1,158 @@
+"""
+Server-side timed quiz sessions.
+
+An in-progress quiz lives only in the cache backend: start() stores the
+session with a TTL covering its deadline, save_answers() merges autosaved
+answers (one cache read and one write, no database access), and submit()
+grades the saved answers once and writes a single QuizAttempt. Deadlines
+are enforced here rather than trusted from the client: answers arriving
+after the deadline plus QUIZ_SESSION_GRACE_SECONDS are rejected, and a late
+submit grades only what was saved in time.
+"""
+import secrets
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from datetime import datetime, timezone as dt_timezone
+from .answer_keys import get_answer_key
+from .attempts import record_attempt
+
+UNTIMED_TTL = 60 * 60 * 3
+EXPIRED_RETENTION = 60 * 10
+DEFAULT_GRACE_SECONDS = 5
+
+
+class SessionError(Exception):
+    """Raised for session operations that cannot be honoured; carries an HTTP status."""
+
+    def __init__(self, detail, status):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def _grace():
+    return getattr(settings, "QUIZ_SESSION_GRACE_SECONDS", DEFAULT_GRACE_SECONDS)
+
+
+def _session_key(token):
+    return f"quizzes:session:{token}"
+
+
+def _user_key(user_id, question_set_id):
+    return f"quizzes:session:user:{user_id}:{question_set_id}"
+
+
+def _ttl(session, now):
+    if session["deadline"] is None:
+        return UNTIMED_TTL
+    # Keep the session a little past its deadline so a late submit can still be graded
+    return max(int(session["deadline"] - now) + _grace() + EXPIRED_RETENTION, 1)
+
+
+def _store(session, now):
+    ttl = _ttl(session, now)
+    cache.set_many({
+        _session_key(session["token"]): session,
+        _user_key(session["user_id"], session["question_set_id"]): session["token"],
+    }, ttl)
+
+
+def remaining_seconds(session, now=None):
+    if session["deadline"] is None:
+        return None
+    return max(0, int(session["deadline"] - (now or time.time())))
+
+
+def start(user, question_set):
+    """Return the user's active session for the set, or start a new one. Returns (session, created)."""
+    now = time.time()
+    token = cache.get(_user_key(user.pk, question_set.pk))
+    if token:
+        session = cache.get(_session_key(token))
+        if session and not session.get("submitted") and (session["deadline"] is None or session["deadline"] > now):
+            return session, False
+
+    deadline = now + question_set.time_limit_minutes * 60 if question_set.time_limit_minutes else None
+    session = {
+        "token": secrets.token_urlsafe(24),
+        "user_id": user.pk,
+        "question_set_id": question_set.pk,
+        "started_at": now,
+        "deadline": deadline,
+        "answers": {},
+        "submitted": False,
+    }
+    _store(session, now)
+    return session, True
+
+
+def load(user, token):
+    session = cache.get(_session_key(token))
+    if session is None or session["user_id"] != user.pk:
+        raise SessionError("Quiz session not found or expired.", 404)
+    return session
+
+
+def save_answers(user, token, answers):
+    """Merge [{"question_id", "choice"}] into the session; returns the number of answers saved."""
+    now = time.time()
+    session = load(user, token)
+    if session["submitted"]:
+        raise SessionError("This quiz session has already been submitted.", 409)
+    if session["deadline"] is not None and now > session["deadline"] + _grace():
+        raise SessionError("Time is up for this quiz session.", 409)
+
+    answer_key = get_answer_key(session["question_set_id"])
+    if answer_key is None:
+        raise SessionError("Question set no longer exists.", 404)
+    for ans in answers if isinstance(answers, list) else []:
+        qid = ans.get("question_id") if isinstance(ans, dict) else None
+        if qid in answer_key.answers:
+            session["answers"][str(qid)] = str(ans.get("choice"))[:50]
+    _store(session, now)
+    return len(session["answers"])
+
+
+def submit(user, token, answers=None):
+    """Grade the session once and store it as a QuizAttempt."""
+    now = time.time()
+    session = load(user, token)
+    if session["submitted"]:
+        raise SessionError("This quiz session has already been submitted.", 409)
+    if answers and (session["deadline"] is None or now <= session["deadline"] + _grace()):
+        save_answers(user, token, answers)
+        session = load(user, token)
+
+    answer_key = get_answer_key(session["question_set_id"])
+    if answer_key is None:
+        raise SessionError("Question set no longer exists.", 404)
+    # Mark submitted before writing so a double submit cannot create two attempts
+    session["submitted"] = True
+    if not cache.add(f"{_session_key(token)}:submitted", True, _ttl(session, now)):
+        raise SessionError("This quiz session has already been submitted.", 409)
+    _store(session, now)
+
+    finished = now if session["deadline"] is None else min(now, session["deadline"])
+    return record_attempt(
+        user,
+        answer_key,
+        [{"question_id": int(qid), "choice": choice} for qid, choice in session["answers"].items()],
+        started_at=datetime.fromtimestamp(session["started_at"], tz=dt_timezone.utc),
+        finished_at=datetime.fromtimestamp(finished, tz=dt_timezone.utc),
+    )
+
+
+def describe(session):
+    """Client-facing view of a session."""
+    return {
+        "token": session["token"],
+        "question_set": session["question_set_id"],
+        "started_at": datetime.fromtimestamp(session["started_at"], tz=dt_timezone.utc),
+        "deadline": datetime.fromtimestamp(session["deadline"], tz=dt_timezone.utc) if session["deadline"] else None,
+        "remaining_seconds": remaining_seconds(session),
+        "answers": [{"question_id": int(qid), "choice": choice} for qid, choice in session["answers"].items()],
+        "submitted": session["submitted"],
+        "server_time": timezone.now(),
+    }
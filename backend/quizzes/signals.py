@@ -0,0 +1,42 @@
+"""
+Signal handlers for the quizzes app.
+Invalidate cached per-set and per-unit data whenever questions or sets change.
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import QuestionSet, Question
+from .answer_keys import invalidate_answer_key
+from .versions import bump_unit_version
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_question_set_caches(sender, instance, **kwargs):
+    invalidate_answer_key(instance.question_set_id)
+
+
+@receiver(pre_save, sender=QuestionSet)
+def remember_previous_unit(sender, instance, **kwargs):
+    instance._previous_unit_id = None
+    if instance.pk:
+        instance._previous_unit_id = (
+            QuestionSet.objects.filter(pk=instance.pk).values_list("unit_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=QuestionSet)
+def invalidate_unit_caches(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_unit_id", None)
+    if created or previous != instance.unit_id:
+        bump_unit_version(instance.unit_id)
+        if previous is not None:
+            bump_unit_version(previous)
+    if not created:
+        # Answer keys carry the unit id and set payloads embed every field
+        invalidate_answer_key(instance.pk)
+
+
+@receiver(post_delete, sender=QuestionSet)
+def invalidate_deleted_question_set(sender, instance, **kwargs):
+    invalidate_answer_key(instance.pk)
+    bump_unit_version(instance.unit_id)
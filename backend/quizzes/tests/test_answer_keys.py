@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from unittest import mock
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from rest_framework.test import APITestCase
+from courses.models import Subject, Unit
+from quizzes.models import QuestionSet, Question, QuizAttempt, QuizAnswer
+from quizzes import answer_keys
+from quizzes.answer_keys import get_answer_key, invalidate_answer_key
+from quizzes.versions import unit_version
+
+
+class AnswerKeyGradingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.user = User.objects.create_user(username="student", password="pass1234")
+        subject = Subject.objects.create(name="Accounting")
+        unit = Unit.objects.create(subject=subject, title="Financial Reporting 1")
+        self.qset = QuestionSet.objects.create(unit=unit, title="Revision")
+        self.q1 = Question.objects.create(
+            question_set=self.qset, text="2+2=?",
+            choices=[{"id": "A", "text": "3"}, {"id": "B", "text": "4"}],
+            correct_choice="B", points=1,
+        )
+        self.q2 = Question.objects.create(
+            question_set=self.qset, text="3+3=?",
+            choices=[{"id": "A", "text": "6"}, {"id": "B", "text": "7"}],
+            correct_choice="A", points=2,
+        )
+        self.client.force_authenticate(self.user)
+
+    def submit(self, answers):
+        return self.client.post(
+            "/api/quizzes/attempts/",
+            {"question_set": self.qset.id, "answers": answers},
+            format="json",
+        )
+
+    def test_warm_key_grades_without_reading_questions(self):
+        get_answer_key(self.qset.id)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.submit([
+                {"question_id": self.q1.id, "choice": "B"},
+                {"question_id": self.q2.id, "choice": "B"},
+            ])
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual((resp.data["score"], resp.data["total"]), (1, 3))
+        selects = [q["sql"] for q in ctx.captured_queries if q["sql"].lstrip().upper().startswith("SELECT")]
+        self.assertEqual(selects, [])
+        self.assertEqual(QuizAttempt.objects.count(), 1)
+
+    def test_question_change_invalidates_key(self):
+        self.assertEqual(get_answer_key(self.qset.id).total, 3)
+        self.q2.correct_choice = "B"
+        self.q2.points = 5
+        self.q2.save()
+        resp = self.submit([{"question_id": self.q2.id, "choice": "B"}])
+        self.assertEqual((resp.data["score"], resp.data["total"]), (5, 6))
+
+        self.q1.delete()
+        self.assertEqual(get_answer_key(self.qset.id).total, 5)
+
+    def test_key_rebuilt_before_commit_does_not_survive_it(self):
+        old_key = get_answer_key(self.qset.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.q2.correct_choice = "B"
+            self.q2.save()
+            # A concurrent request still sees the committed rows and caches them under the new version
+            with mock.patch.object(answer_keys, "build_answer_key", lambda pk, version: old_key._replace(version=version)):
+                self.assertEqual(get_answer_key(self.qset.id).answers[self.q2.id][0], "A")
+            before_commit = unit_version(self.qset.unit_id)
+            QuestionSet.objects.create(unit_id=self.qset.unit_id, title="Mock")
+            self.assertGreater(unit_version(self.qset.unit_id), before_commit)
+            before_commit = unit_version(self.qset.unit_id)
+        self.assertEqual(get_answer_key(self.qset.id).answers[self.q2.id][0], "B")
+        self.assertGreater(unit_version(self.qset.unit_id), before_commit)
+
+    def test_answers_are_stored_per_question(self):
+        resp = self.submit([
+            {"question_id": self.q1.id, "choice": "A"},
+            {"question_id": self.q2.id, "choice": "A"},
+            {"question_id": 999999, "choice": "A"},
+        ])
+        self.assertEqual(resp.status_code, 201)
+        stored = {
+            a.question_id: (a.choice, a.is_correct, a.points_awarded)
+            for a in QuizAnswer.objects.filter(attempt_id=resp.data["id"])
+        }
+        self.assertEqual(stored, {self.q1.id: ("A", False, 0), self.q2.id: ("A", True, 2)})
+        self.assertEqual(self.q2.answers.count(), 1)
+
+    def test_large_exam_writes_answers_in_bulk(self):
+        questions = Question.objects.bulk_create([
+            Question(question_set=self.qset, text=f"Q{i}", choices=[{"id": "A", "text": "a"}], correct_choice="A")
+            for i in range(200)
+        ])
+        invalidate_answer_key(self.qset.id)  # bulk_create skips model signals
+        get_answer_key(self.qset.id)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.submit([{"question_id": q.id, "choice": "A"} for q in questions])
+        self.assertEqual(resp.data["score"], 200)
+        answer_inserts = [q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "quizzes_quizanswer"')]
+        self.assertLessEqual(len(answer_inserts), 2)  # one bulk_create, split only by the backend's batch limit
+        self.assertEqual(QuizAnswer.objects.filter(attempt_id=resp.data["id"]).count(), 200)
+
+    def test_unknown_question_set_is_404(self):
+        resp = self.client.post("/api/quizzes/attempts/", {"question_set": 999999, "answers": []}, format="json")
+        self.assertEqual(resp.status_code, 404)
+        resp = self.client.post("/api/quizzes/attempts/", {"answers": []}, format="json")
+        self.assertEqual(resp.status_code, 404)
@@ -0,0 +1,90 @@
+import io
+import json
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APITestCase
+from courses.models import Subject, Unit
+from quizzes.models import QuestionSet, Question
+from quizzes.answer_keys import get_answer_key
+from quizzes.importing import import_questions, read_rows
+from quizzes.sampling import sample_questions
+
+
+def jsonl(rows):
+    return io.StringIO("\n".join(json.dumps(row) for row in rows) + "\n")
+
+
+class QuestionImportTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        subject = Subject.objects.create(name="Accounting")
+        self.unit = Unit.objects.create(subject=subject, title="Financial Reporting 1", code="FR1")
+        self.qset = QuestionSet.objects.create(unit=self.unit, title="Revision")
+
+    def test_upserts_on_external_id_and_reports_bad_rows(self):
+        rows = [
+            {"question_set": self.qset.id, "external_id": "q1", "text": "Q1", "choices": ["A", "B"], "correct_choice": "A"},
+            {"question_set": self.qset.id, "external_id": "q2", "text": "Q2", "choices": ["A", "B"], "correct_choice": "C"},
+            {"unit_code": "FR1", "set_title": "Imported", "text": "Q3", "choices": ["A", "B"], "correct_choice": "B", "points": 2},
+        ]
+        result = import_questions(read_rows(jsonl(rows), "jsonl"), chunk_size=2)
+        self.assertEqual((result.created, result.updated, result.sets_created, result.error_count), (2, 0, 1, 1))
+        self.assertEqual(result.errors[0]["line"], 2)
+        self.assertTrue(QuestionSet.objects.filter(unit=self.unit, title="Imported").exists())
+
+        key = get_answer_key(self.qset.id)
+        rows[0]["correct_choice"] = "B"
+        result = import_questions(read_rows(jsonl(rows[:1]), "jsonl"))
+        self.assertEqual((result.created, result.updated), (0, 1))
+        self.assertEqual(Question.objects.get(external_id="q1").correct_choice, "B")
+        # Bulk writes skip signals, so the importer must drop the cached key itself
+        self.assertNotEqual(get_answer_key(self.qset.id).answers, key.answers)
+
+    def test_imported_sets_reach_unit_sampling(self):
+        self.assertEqual(sample_questions(unit_ids=[self.unit.id], count=5)[0], [])
+        rows = [{"unit_code": "FR1", "set_title": "Imported", "text": f"Q{i}", "choices": ["A", "B"], "correct_choice": "A"} for i in range(3)]
+        import_questions(read_rows(jsonl(rows), "jsonl"))
+        self.assertEqual(len(sample_questions(unit_ids=[self.unit.id], count=5)[0]), 3)
+
+    def test_dry_run_counts_sets_it_would_create(self):
+        rows = [{"unit_code": "FR1", "set_title": "Imported", "text": f"Q{i}", "choices": ["A", "B"], "correct_choice": "A"} for i in range(3)]
+        result = import_questions(read_rows(jsonl(rows), "jsonl"), chunk_size=2, dry_run=True)
+        self.assertEqual((result.created, result.sets_created, result.error_count), (3, 1, 0))
+        self.assertFalse(QuestionSet.objects.filter(title="Imported").exists())
+
+    def test_dry_run_tells_updates_from_creates(self):
+        Question.objects.create(question_set=self.qset, external_id="q1", text="Q1", choices=["A", "B"], correct_choice="A")
+        row = {"question_set": self.qset.id, "choices": ["A", "B"], "correct_choice": "B"}
+        rows = [
+            {**row, "external_id": "q1", "text": "Q1"},
+            {**row, "external_id": "q2", "text": "Q2"},
+            {**row, "external_id": "q2", "text": "Q2 again"},  # the first q2 was written by the previous chunk
+            {**row, "text": "No id"},
+        ]
+        expected = import_questions(read_rows(jsonl(rows), "jsonl"), chunk_size=2, dry_run=True)
+        self.assertEqual((expected.created, expected.updated), (2, 2))
+        self.assertEqual(Question.objects.count(), 1)
+        result = import_questions(read_rows(jsonl(rows), "jsonl"), chunk_size=2)
+        self.assertEqual((result.created, result.updated), (expected.created, expected.updated))
+
+    def test_csv_upload_endpoint_is_staff_only(self):
+        body = (
+            "external_id,text,choices,correct_choice,points\n"
+            'c1,First,"[{""id"": ""A"", ""text"": ""a""}, {""id"": ""B"", ""text"": ""b""}]",A,1\n'
+            "c2,Second,A|B|C,C,\n"
+        ).encode()
+        User = get_user_model()
+        self.client.force_authenticate(User.objects.create_user(username="student", password="pass1234"))
+        resp = self.client.post("/api/quizzes/import/", {"file": SimpleUploadedFile("bank.csv", body)}, format="multipart")
+        self.assertEqual(resp.status_code, 403)
+
+        self.client.force_authenticate(User.objects.create_user(username="staff", password="pass1234", is_staff=True))
+        resp = self.client.post(
+            "/api/quizzes/import/",
+            {"file": SimpleUploadedFile("bank.csv", body), "question_set": self.qset.id},
+            format="multipart",
+        )
+        self.assertEqual(resp.status_code, 201, resp.data)
+        self.assertEqual(resp.data["created"], 2)
+        self.assertEqual(self.qset.questions.count(), 2)
@@ -0,0 +1,139 @@
+import io
+import math
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from courses.models import Subject, Unit
+from quizzes.models import (
+    QuestionSet, Question, QuizAttempt, QuizAnswer,
+    QuestionStatistics, QuestionSetStatistics,
+)
+from quizzes.analytics import run_item_analysis
+
+
+def point_biserial(item, totals):
+    n = len(item)
+    mean = sum(totals) / n
+    sd = math.sqrt(sum((t - mean) ** 2 for t in totals) / n)
+    right = [t for i, t in zip(item, totals) if i]
+    wrong = [t for i, t in zip(item, totals) if not i]
+    p = len(right) / n
+    return (sum(right) / len(right) - sum(wrong) / len(wrong)) / sd * math.sqrt(p * (1 - p))
+
+
+@override_settings(ITEM_ANALYSIS_SETTLE_SECONDS=0)
+class ItemAnalysisTests(APITestCase):
+    # Rows are attempts, columns are questions; 1 = correct
+    MATRIX = [
+        [1, 1, 1],
+        [1, 1, 0],
+        [1, 0, 0],
+        [0, 1, 0],
+        [1, 1, 1],
+        [0, 0, 0],
+    ]
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="student", password="pass1234")
+        self.staff = User.objects.create_user(username="editor", password="pass1234", is_staff=True)
+        subject = Subject.objects.create(name="Accounting")
+        unit = Unit.objects.create(subject=subject, title="Financial Reporting 1")
+        self.qset = QuestionSet.objects.create(unit=unit, title="Revision")
+        self.questions = [
+            Question.objects.create(
+                question_set=self.qset, text=f"Q{i}",
+                choices=[{"id": "A", "text": "a"}, {"id": "B", "text": "b"}, {"id": "C", "text": "c"}],
+                correct_choice="A",
+            )
+            for i in range(3)
+        ]
+
+    def add_attempts(self, matrix):
+        for row in matrix:
+            attempt = QuizAttempt.objects.create(user=self.user, question_set=self.qset, score=sum(row), total=3)
+            QuizAnswer.objects.bulk_create([
+                QuizAnswer(attempt=attempt, question=q, choice="A" if ok else ("B" if j % 2 else "C"), is_correct=bool(ok))
+                for j, (q, ok) in enumerate(zip(self.questions, row))
+            ])
+
+    def assert_matches_matrix(self, matrix):
+        totals = [sum(row) for row in matrix]
+        for j, question in enumerate(self.questions):
+            stats = QuestionStatistics.objects.get(question=question)
+            item = [row[j] for row in matrix]
+            self.assertEqual(stats.responses, len(matrix))
+            self.assertAlmostEqual(stats.difficulty, sum(item) / len(item))
+            self.assertAlmostEqual(stats.discrimination, point_biserial(item, totals))
+            self.assertEqual(sum(stats.choice_counts.values()), len(matrix))
+            self.assertEqual(stats.choice_counts["A"], sum(item))
+
+        k = len(self.questions)
+        mean = sum(totals) / len(totals)
+        variance = sum((t - mean) ** 2 for t in totals) / len(totals)
+        pq = sum((sum(col) / len(col)) * (1 - sum(col) / len(col)) for col in zip(*matrix))
+        set_stats = QuestionSetStatistics.objects.get(question_set=self.qset)
+        self.assertEqual(set_stats.attempts, len(matrix))
+        self.assertAlmostEqual(set_stats.kr20, k / (k - 1) * (1 - pq / variance))
+
+    def test_statistics_match_direct_computation(self):
+        self.add_attempts(self.MATRIX)
+        summary = run_item_analysis(chunk_attempts=2)
+        self.assertEqual(summary["attempts"], len(self.MATRIX))
+        self.assert_matches_matrix(self.MATRIX)
+
+    def test_rerun_only_reads_new_attempts(self):
+        self.add_attempts(self.MATRIX[:3])
+        run_item_analysis()
+        self.add_attempts(self.MATRIX[3:])
+        summary = run_item_analysis()
+        self.assertEqual(summary["attempts"], len(self.MATRIX) - 3)
+        self.assert_matches_matrix(self.MATRIX)
+
+        self.assertEqual(run_item_analysis()["attempts"], 0)
+        call_command("analyze_items", "--full", stdout=io.StringIO())
+        self.assert_matches_matrix(self.MATRIX)
+
+    @override_settings(ITEM_ANALYSIS_SETTLE_SECONDS=60)
+    def test_attempts_are_read_once_settled(self):
+        self.add_attempts(self.MATRIX[:3])
+        # The first run only notes the highest id: a lower one may not have committed yet
+        self.assertEqual(run_item_analysis()["attempts"], 0)
+        self.add_attempts(self.MATRIX[3:])
+        self.assertEqual(run_item_analysis()["attempts"], 0)
+        later = timezone.now() + timedelta(seconds=61)
+        with mock.patch("quizzes.analytics.timezone.now", return_value=later):
+            self.assertEqual(run_item_analysis()["attempts"], 3)
+        with mock.patch("quizzes.analytics.timezone.now", return_value=later + timedelta(seconds=61)):
+            self.assertEqual(run_item_analysis()["attempts"], len(self.MATRIX) - 3)
+        self.assert_matches_matrix(self.MATRIX)
+
+    def test_overlapping_runs_count_attempts_once(self):
+        self.add_attempts(self.MATRIX)
+        inner = []
+
+        def progress(done, upto, acc):
+            if not inner:
+                # Another worker runs to completion while this one is still reading
+                inner.append(run_item_analysis())
+
+        summary = run_item_analysis(chunk_attempts=2, progress=progress)
+        self.assertEqual(inner[0]["attempts"], len(self.MATRIX))
+        self.assertEqual(summary["attempts"], 0)
+        self.assert_matches_matrix(self.MATRIX)
+
+    def test_statistics_api_is_staff_only(self):
+        self.add_attempts(self.MATRIX)
+        run_item_analysis()
+        url = f"/api/quizzes/sets/{self.qset.id}/statistics/"
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_authenticate(self.staff)
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["question_set"]["attempts"], len(self.MATRIX))
+        self.assertEqual(len(resp.data["questions"]), 3)
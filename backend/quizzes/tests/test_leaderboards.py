@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from courses.models import Subject, Unit
+from quizzes.models import QuestionSet, Question, LeaderboardEntry
+from quizzes.leaderboards import rebuild_leaderboard
+
+
+class LeaderboardTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.users = [
+            User.objects.create_user(username=f"student{i}@example.com", first_name=f"Student{i}", last_name="Smith", password="pass1234")
+            for i in range(4)
+        ]
+        subject = Subject.objects.create(name="Accounting")
+        unit = Unit.objects.create(subject=subject, title="Financial Reporting 1")
+        self.qset = QuestionSet.objects.create(unit=unit, title="Revision")
+        self.questions = [
+            Question.objects.create(
+                question_set=self.qset, text=f"Q{i}",
+                choices=[{"id": "A", "text": "a"}, {"id": "B", "text": "b"}], correct_choice="A",
+            )
+            for i in range(3)
+        ]
+        self.url = f"/api/quizzes/sets/{self.qset.id}/leaderboard/"
+
+    def submit(self, user, correct):
+        self.client.force_authenticate(user)
+        answers = [{"question_id": q.id, "choice": "A" if i < correct else "B"} for i, q in enumerate(self.questions)]
+        resp = self.client.post("/api/quizzes/attempts/", {"question_set": self.qset.id, "answers": answers}, format="json")
+        self.assertEqual(resp.status_code, 201)
+
+    def test_best_score_is_kept_per_user(self):
+        self.submit(self.users[0], 1)
+        self.submit(self.users[0], 3)
+        self.submit(self.users[0], 2)
+        entry = LeaderboardEntry.objects.get(question_set=self.qset, user=self.users[0])
+        self.assertEqual((entry.best_score, entry.attempts), (3, 3))
+
+    def test_ranks(self):
+        for user, correct in zip(self.users, (2, 3, 2, 0)):
+            self.submit(user, correct)
+        self.client.force_authenticate(self.users[2])
+        resp = self.client.get(self.url, {"limit": 3})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([(r["rank"], r["best_score"]) for r in resp.data["top"]], [(1, 3), (2, 2), (2, 2)])
+        self.assertEqual(resp.data["top"][0]["name"], "Student1 S")
+        self.assertEqual((resp.data["me"]["rank"], resp.data["me"]["best_score"]), (2, 2))
+
+        # Another user improving pushes the caller down at once
+        self.submit(self.users[3], 3)
+        self.client.force_authenticate(self.users[2])
+        self.assertEqual(self.client.get(self.url).data["me"]["rank"], 3)
+
+    def test_anonymous_gets_no_personal_rank_and_rebuild_matches(self):
+        for user, correct in zip(self.users, (1, 2, 3, 1)):
+            self.submit(user, correct)
+        self.client.force_authenticate(None)
+        before = self.client.get(self.url).data
+        self.assertIsNone(before["me"])
+        self.assertEqual(rebuild_leaderboard(self.qset.id), 4)
+        after = self.client.get(self.url).data
+        self.assertEqual(
+            [(r["rank"], r["best_score"], r["attempts"]) for r in before["top"]],
+            [(r["rank"], r["best_score"], r["attempts"]) for r in after["top"]],
+        )
+        self.assertEqual(self.client.get("/api/quizzes/sets/999999/leaderboard/").status_code, 404)
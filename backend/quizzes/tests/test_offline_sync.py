@@ -0,0 +1,78 @@
+import uuid
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.conf import settings
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from courses.models import Subject, Unit
+from quizzes.models import QuestionSet, Question, QuizAttempt, QuizAnswer, LeaderboardEntry
+from quizzes.views import QuizAttemptBatchView
+
+
+class OfflineSyncTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.user = User.objects.create_user(username="student", password="pass1234")
+        subject = Subject.objects.create(name="Accounting")
+        unit = Unit.objects.create(subject=subject, title="Financial Reporting 1")
+        choices = [{"id": "A", "text": "a"}, {"id": "B", "text": "b"}]
+        self.sets, self.questions = [], []
+        for title in ("Revision", "Mock"):
+            qset = QuestionSet.objects.create(unit=unit, title=title)
+            self.sets.append(qset)
+            self.questions.append(Question.objects.create(question_set=qset, text="Q", choices=choices, correct_choice="A", points=2))
+        self.client.force_authenticate(self.user)
+
+    def sync(self, attempts):
+        return self.client.post("/api/quizzes/attempts/batch/", {"attempts": attempts}, format="json")
+
+    def test_batch_is_graded_in_bulk_and_idempotent(self):
+        attempts = [
+            {"client_id": str(uuid.uuid4()), "question_set": qset.id, "answers": [{"question_id": q.id, "choice": choice}],
+             "finished_at": "2026-01-05T10:00:00Z"}
+            for qset, q, choice in zip(self.sets, self.questions, ("A", "B"))
+        ]
+        attempts.append({"client_id": str(uuid.uuid4()), "question_set": 999999, "answers": []})
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.sync(attempts)
+        self.assertEqual(resp.status_code, 201, resp.data)
+        self.assertEqual([row["status"] for row in resp.data["results"]], ["created", "created", "error"])
+        self.assertEqual([row["attempt"]["score"] for row in resp.data["results"][:2]], [2, 0])
+        # Both answer keys come from a single query; attempts and answers are one INSERT each
+        key_loads = [q for q in ctx.captured_queries if 'FROM "quizzes_questionset"' in q["sql"]]
+        self.assertEqual(len(key_loads), 1)
+        self.assertEqual(sum('INSERT INTO "quizzes_quizattempt"' in q["sql"] for q in ctx.captured_queries), 1)
+        self.assertEqual(sum('INSERT INTO "quizzes_quizanswer"' in q["sql"] for q in ctx.captured_queries), 1)
+
+        resp = self.sync(attempts[:2])
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([row["status"] for row in resp.data["results"]], ["duplicate", "duplicate"])
+        self.assertEqual(QuizAttempt.objects.count(), 2)
+        self.assertEqual(QuizAnswer.objects.count(), 2)
+        self.assertEqual(LeaderboardEntry.objects.get(question_set=self.sets[0]).attempts, 1)
+
+    def test_rejects_invalid_payload(self):
+        self.assertEqual(self.sync([{"client_id": "not-a-uuid", "question_set": self.sets[0].id, "answers": []}]).status_code, 400)
+        self.assertEqual(self.sync([]).status_code, 400)
+
+    def attempt(self):
+        return {"client_id": str(uuid.uuid4()), "question_set": self.sets[0].id,
+                "answers": [{"question_id": self.questions[0].id, "choice": "A"}]}
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {"quiz_attempts": "5/min"}})
+    def test_batches_draw_one_token_per_attempt(self):
+        self.assertEqual(self.sync([self.attempt() for _ in range(4)]).status_code, 201)
+        resp = self.sync([self.attempt() for _ in range(2)])
+        self.assertEqual(resp.status_code, 429)
+        self.assertIn("Retry-After", resp)
+        self.assertEqual(self.sync([self.attempt()]).status_code, 201)
+        self.assertEqual(QuizAttempt.objects.count(), 5)
+
+    def test_rejects_oversized_batch(self):
+        resp = self.sync([self.attempt() for _ in range(QuizAttemptBatchView.MAX_ATTEMPTS + 1)])
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(QuizAttempt.objects.count(), 0)
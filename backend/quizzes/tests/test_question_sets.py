@@ -0,0 +1,77 @@
+import gzip
+import json
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from courses.models import Subject, Unit
+from quizzes.models import QuestionSet, Question, QuizAttempt
+
+
+class QuestionSetListTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="student", password="pass1234")
+        subject = Subject.objects.create(name="Accounting")
+        self.unit = Unit.objects.create(subject=subject, title="Financial Reporting 1")
+        self.qset = QuestionSet.objects.create(unit=self.unit, title="Revision")
+        for points in (1, 2, 3):
+            Question.objects.create(
+                question_set=self.qset,
+                text=f"Question worth {points}",
+                choices=[{"id": "A", "text": "yes"}, {"id": "B", "text": "no"}],
+                correct_choice="A",
+                points=points,
+            )
+        QuizAttempt.objects.create(user=self.user, question_set=self.qset, score=2, total=6)
+        QuizAttempt.objects.create(user=self.user, question_set=self.qset, score=6, total=6)
+        self.empty = QuestionSet.objects.create(unit=self.unit, title="Empty")
+
+    def test_list_returns_summaries_without_questions(self):
+        with self.assertNumQueries(2):  # page count + one aggregate select
+            resp = self.client.get("/api/quizzes/sets/")
+        self.assertEqual(resp.status_code, 200)
+        rows = {row["id"]: row for row in resp.data["results"]}
+        summary = rows[self.qset.id]
+        self.assertNotIn("questions", summary)
+        self.assertEqual(summary["question_count"], 3)
+        self.assertEqual(summary["total_points"], 6)
+        self.assertEqual(summary["attempt_count"], 2)
+        self.assertEqual(summary["average_score"], 4.0)
+        self.assertEqual(summary["best_score"], 6)
+
+        empty = rows[self.empty.id]
+        self.assertEqual(empty["question_count"], 0)
+        self.assertEqual(empty["total_points"], 0)
+        self.assertEqual(empty["attempt_count"], 0)
+        self.assertIsNone(empty["average_score"])
+
+    def test_detail_still_returns_questions(self):
+        resp = self.client.get(f"/api/quizzes/sets/{self.qset.id}/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.json()["questions"]), 3)
+        self.assertNotIn("correct_choice", resp.json()["questions"][0])
+
+    def test_detail_is_served_from_content_addressed_payload(self):
+        cache.clear()
+        resp = self.client.get(f"/api/quizzes/sets/{self.qset.id}/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(resp["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(resp.content))["id"], self.qset.id)
+        versioned = resp["Content-Location"]
+        etag = resp["ETag"]
+
+        with self.assertNumQueries(0):
+            resp = self.client.get(versioned)
+            self.assertEqual(resp.status_code, 200)
+            self.assertIn("immutable", resp["Cache-Control"])
+            resp = self.client.get(f"/api/quizzes/sets/{self.qset.id}/", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(resp.status_code, 304)
+            self.assertIn("Accept-Encoding", resp["Vary"])
+
+        self.qset.title = "Revision (updated)"
+        self.qset.save()
+        resp = self.client.get(f"/api/quizzes/sets/{self.qset.id}/")
+        self.assertNotEqual(resp["ETag"], etag)
+        self.assertEqual(resp.json()["title"], "Revision (updated)")
+        # The old URL still names the old content while it remains cached
+        self.assertEqual(self.client.get(versioned).json()["title"], "Revision")
+        self.assertEqual(self.client.get(f"/api/quizzes/sets/{self.qset.id}/v/0000/").status_code, 302)
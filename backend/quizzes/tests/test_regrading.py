@@ -0,0 +1,119 @@
+import io
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from courses.models import Subject, Unit
+from quizzes.models import QuestionSet, Question, QuizAttempt, QuizAnswer, RegradeJob
+from quizzes.regrading import start_regrade, run_regrade, claim_job, CLAIM_TIMEOUT
+from users.models import UnitProgress
+
+
+class RegradeTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="student", password="pass1234")
+        subject = Subject.objects.create(name="Accounting")
+        unit = Unit.objects.create(subject=subject, title="Financial Reporting 1")
+        self.qset = QuestionSet.objects.create(unit=unit, title="Revision")
+        choices = [{"id": "A", "text": "a"}, {"id": "B", "text": "b"}]
+        self.q1 = Question.objects.create(question_set=self.qset, text="Q1", choices=choices, correct_choice="A", points=1)
+        self.q2 = Question.objects.create(question_set=self.qset, text="Q2", choices=choices, correct_choice="A", points=2)
+        self.client.force_authenticate(self.user)
+        self.attempt_ids = [self.submit(c1, c2) for c1, c2 in [("A", "A"), ("A", "B"), ("B", "B"), ("B", "A")]]
+        self.other = self.submit_only_q1("A")
+
+    def submit(self, c1, c2):
+        resp = self.client.post("/api/quizzes/attempts/", {
+            "question_set": self.qset.id,
+            "answers": [{"question_id": self.q1.id, "choice": c1}, {"question_id": self.q2.id, "choice": c2}],
+        }, format="json")
+        return resp.data["id"]
+
+    def submit_only_q1(self, c1):
+        resp = self.client.post("/api/quizzes/attempts/", {
+            "question_set": self.qset.id, "answers": [{"question_id": self.q1.id, "choice": c1}],
+        }, format="json")
+        return resp.data["id"]
+
+    def scores(self):
+        return dict(QuizAttempt.objects.values_list("id", "score"))
+
+    def test_regrade_rescores_only_affected_attempts(self):
+        self.q2.correct_choice = "B"
+        self.q2.points = 3
+        self.q2.save()
+        job = run_regrade(start_regrade(self.qset.id, [self.q2.id]), batch_size=2)
+
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(job.attempts_regraded, 4)
+        scores = self.scores()
+        self.assertEqual([scores[pk] for pk in self.attempt_ids], [1, 4, 3, 0])
+        self.assertEqual(scores[self.other], 1)
+        self.assertEqual(set(QuizAttempt.objects.values_list("total", flat=True)), {4})
+        self.assertTrue(QuizAnswer.objects.get(attempt_id=self.attempt_ids[1], question=self.q2).is_correct)
+        progress = UnitProgress.objects.get(user=self.user)
+        self.assertEqual((progress.attempts, progress.score_sum, progress.total_sum), (5, 9, 20))
+        self.assertEqual(progress.best_percent, 100.0)
+
+    def test_claimed_job_is_not_run_twice(self):
+        job = start_regrade(self.qset.id, [self.q1.id])
+        self.assertTrue(claim_job(job))  # another worker holds it
+        self.assertIsNone(run_regrade(RegradeJob.objects.get(pk=job.pk)))
+        with self.assertRaises(CommandError):
+            call_command("regrade_attempts", str(self.qset.id), "--resume", stdout=io.StringIO())
+        self.assertIsNone(RegradeJob.objects.get(pk=job.pk).finished_at)
+
+        # A claim that is not renewed expires with its worker
+        RegradeJob.objects.filter(pk=job.pk).update(claimed_at=timezone.now() - timedelta(seconds=CLAIM_TIMEOUT + 1))
+        self.assertIsNotNone(run_regrade(RegradeJob.objects.get(pk=job.pk)).finished_at)
+        self.assertFalse(claim_job(job))
+
+    def test_worker_survives_a_failing_job(self):
+        broken, job = start_regrade(self.qset.id, [self.q1.id]), start_regrade(self.qset.id, [self.q2.id])
+
+        def run(job, **kwargs):
+            if job.pk == broken.pk:
+                raise RuntimeError("boom")
+            return run_regrade(job, **kwargs)
+
+        command = "quizzes.management.commands.regrade_attempts"
+        with mock.patch(f"{command}.run_regrade", side_effect=run), \
+                mock.patch(f"{command}.time.sleep", side_effect=KeyboardInterrupt), \
+                self.assertLogs(command, "ERROR"), self.assertRaises(KeyboardInterrupt):
+            call_command("regrade_attempts", "--pending", "--watch", "5", stdout=io.StringIO())
+        self.assertIsNone(RegradeJob.objects.get(pk=broken.pk).finished_at)
+        self.assertIsNotNone(RegradeJob.objects.get(pk=job.pk).finished_at)
+
+    def test_command_resumes_from_cursor(self):
+        self.q1.correct_choice = "B"
+        self.q1.save()
+        job = start_regrade(self.qset.id, [self.q1.id])
+        # Pretend an earlier run committed the first two attempts before stopping
+        job.last_attempt_id = self.attempt_ids[1]
+        job.save()
+        call_command("regrade_attempts", str(self.qset.id), "--resume", stdout=io.StringIO())
+
+        job = RegradeJob.objects.get(pk=job.pk)
+        self.assertIsNotNone(job.finished_at)
+        scores = self.scores()
+        self.assertEqual([scores[pk] for pk in self.attempt_ids], [3, 1, 1, 3])
+        self.assertEqual(scores[self.other], 0)
+
+    def test_admin_queues_jobs_for_the_worker(self):
+        self.q2.correct_choice = "B"
+        self.q2.save()
+        User = get_user_model()
+        self.client.force_login(User.objects.create_superuser(username="root", email="root@example.com", password="pass1234"))
+        resp = self.client.post("/admin/quizzes/questionset/", {"action": "regrade_attempts", "_selected_action": [self.qset.id]})
+        self.assertEqual(resp.status_code, 302)
+        job = RegradeJob.objects.get()
+        self.assertIsNone(job.finished_at)
+        self.assertEqual(self.scores()[self.attempt_ids[1]], 1)
+
+        call_command("regrade_attempts", "--pending", stdout=io.StringIO())
+        self.assertIsNotNone(RegradeJob.objects.get(pk=job.pk).finished_at)
+        self.assertEqual(self.scores()[self.attempt_ids[1]], 3)
@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from courses.models import Subject, Unit
+from quizzes.models import QuestionSet, Question, QuestionStatistics
+from quizzes.sampling import sample_questions
+from quizzes.views import PracticeExamView
+
+
+class PracticeSamplingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        subject = Subject.objects.create(name="Accounting")
+        self.unit = Unit.objects.create(subject=subject, title="Unit 1")
+        self.other_unit = Unit.objects.create(subject=subject, title="Unit 2")
+        self.set_a = QuestionSet.objects.create(unit=self.unit, title="A")
+        self.set_b = QuestionSet.objects.create(unit=self.unit, title="B")
+        self.set_c = QuestionSet.objects.create(unit=self.other_unit, title="C")
+        self.questions = {}
+        for qset in (self.set_a, self.set_b, self.set_c):
+            self.questions[qset.id] = [
+                Question.objects.create(question_set=qset, text=f"{qset.title}{i}", choices=[{"id": "A", "text": "a"}], correct_choice="A")
+                for i in range(30)
+            ]
+
+    def test_same_seed_regenerates_same_exam(self):
+        first, _ = sample_questions(unit_ids=[self.unit.id], count=10, seed=42)
+        second, _ = sample_questions(unit_ids=[self.unit.id], count=10, seed=42)
+        other, _ = sample_questions(unit_ids=[self.unit.id], count=10, seed=43)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(len(set(first)), 10)
+        allowed = {q.id for qset in (self.set_a, self.set_b) for q in self.questions[qset.id]}
+        self.assertTrue(set(first) <= allowed)
+
+    def test_pools_follow_question_and_set_changes(self):
+        ids, _ = sample_questions(question_set_ids=[self.set_a.id], count=100, seed=1)
+        self.assertEqual(len(ids), 30)
+        self.questions[self.set_a.id][0].delete()
+        ids, _ = sample_questions(question_set_ids=[self.set_a.id], count=100, seed=1)
+        self.assertEqual(len(ids), 29)
+
+        self.set_c.unit = self.unit
+        self.set_c.save()
+        ids, _ = sample_questions(unit_ids=[self.unit.id], count=1000, seed=1)
+        self.assertEqual(len(ids), 89)
+
+    def test_hard_weighting_prefers_low_p_values(self):
+        easy, hard = self.questions[self.set_a.id], self.questions[self.set_b.id]
+        QuestionStatistics.objects.bulk_create(
+            [QuestionStatistics(question=q, difficulty=0.95) for q in easy]
+            + [QuestionStatistics(question=q, difficulty=0.1) for q in hard]
+        )
+        hard_ids = {q.id for q in hard}
+        picked = 0
+        for seed in range(20):
+            ids, _ = sample_questions(unit_ids=[self.unit.id], count=10, seed=seed, weighting="hard")
+            picked += len(hard_ids & set(ids))
+        self.assertGreater(picked, 150)
+
+    def test_endpoint_returns_questions_with_seed(self):
+        resp = self.client.get("/api/quizzes/practice/", {"units": self.unit.id, "count": 5, "seed": 7})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["seed"], 7)
+        self.assertEqual(len(resp.data["questions"]), 5)
+        self.assertNotIn("correct_choice", resp.data["questions"][0])
+        again = self.client.get("/api/quizzes/practice/", {"units": self.unit.id, "count": 5, "seed": 7})
+        self.assertEqual([q["id"] for q in resp.data["questions"]], [q["id"] for q in again.data["questions"]])
+
+        self.assertEqual(self.client.get("/api/quizzes/practice/").status_code, 400)
+        self.assertEqual(self.client.get("/api/quizzes/practice/", {"units": "x"}).status_code, 400)
+        too_many = ",".join(str(pk) for pk in range(1, PracticeExamView.MAX_SOURCES + 2))
+        self.assertEqual(self.client.get("/api/quizzes/practice/", {"sets": too_many}).status_code, 400)
+        repeated = ",".join([str(self.unit.id)] * (PracticeExamView.MAX_SOURCES + 1))
+        self.assertEqual(self.client.get("/api/quizzes/practice/", {"units": repeated}).status_code, 200)
+        self.assertEqual(self.client.get("/api/quizzes/practice/", {"units": self.unit.id, "weighting": "weak"}).status_code, 401)
@@ -0,0 +1,72 @@
+import time
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from courses.models import Subject, Unit
+from quizzes.models import QuestionSet, Question, QuizAttempt
+
+
+class QuizSessionTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.user = User.objects.create_user(username="student", password="pass1234")
+        self.other = User.objects.create_user(username="other", password="pass1234")
+        subject = Subject.objects.create(name="Accounting")
+        unit = Unit.objects.create(subject=subject, title="Unit 1")
+        self.qset = QuestionSet.objects.create(unit=unit, title="Timed", time_limit_minutes=10)
+        self.q1, self.q2 = [
+            Question.objects.create(question_set=self.qset, text=f"Q{i}", choices=[{"id": "A", "text": "a"}], correct_choice="A", points=1)
+            for i in range(2)
+        ]
+        self.client.force_authenticate(self.user)
+
+    def start(self):
+        resp = self.client.post("/api/quizzes/sessions/", {"question_set": self.qset.id}, format="json")
+        self.assertIn(resp.status_code, (200, 201))
+        return resp
+
+    def test_start_autosave_resume_submit(self):
+        first = self.start()
+        self.assertEqual(first.status_code, 201)
+        token = first.data["token"]
+        self.assertLessEqual(first.data["remaining_seconds"], 600)
+        self.assertEqual(self.start().data["token"], token)  # starting again resumes
+
+        url = f"/api/quizzes/sessions/{token}/"
+        self.client.patch(url, {"answers": []}, format="json")  # warms the answer key
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.patch(url, {"answers": [{"question_id": self.q1.id, "choice": "A"}]}, format="json")
+        self.assertEqual(resp.data["saved"], 1)
+        self.assertEqual([q["sql"] for q in ctx.captured_queries], [])
+
+        resumed = self.client.get(url).data
+        self.assertEqual(resumed["answers"], [{"question_id": self.q1.id, "choice": "A"}])
+        self.assertEqual(QuizAttempt.objects.count(), 0)
+
+        resp = self.client.post(f"{url}submit/", {"answers": [{"question_id": self.q2.id, "choice": "B"}]}, format="json")
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual((resp.data["score"], resp.data["total"]), (1, 2))
+        self.assertEqual(self.client.post(f"{url}submit/", {}, format="json").status_code, 409)
+        self.assertEqual(QuizAttempt.objects.count(), 1)
+
+    def test_deadline_is_enforced_on_server(self):
+        token = self.start().data["token"]
+        url = f"/api/quizzes/sessions/{token}/"
+        self.client.patch(url, {"answers": [{"question_id": self.q1.id, "choice": "A"}]}, format="json")
+
+        late = time.time() + 11 * 60
+        with mock.patch("quizzes.sessions.time.time", return_value=late):
+            resp = self.client.patch(url, {"answers": [{"question_id": self.q2.id, "choice": "A"}]}, format="json")
+            self.assertEqual(resp.status_code, 409)
+            resp = self.client.post(f"{url}submit/", {"answers": [{"question_id": self.q2.id, "choice": "A"}]}, format="json")
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data["score"], 1)  # only the answer saved in time counts
+
+    def test_sessions_are_private(self):
+        token = self.start().data["token"]
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(f"/api/quizzes/sessions/{token}/").status_code, 404)
@@ -1,9 +1,22 @@
 from django.urls import path
-from .views import QuestionSetListView, QuestionSetDetailView, QuizAttemptCreateView, QuizRootView
+from .views import (
+    QuestionSetListView, QuestionSetDetailView, QuestionSetPayloadView, QuizAttemptCreateView, QuizAttemptBatchView, QuizRootView,
+    QuestionSetStatisticsView, QuestionSetLeaderboardView, PracticeExamView,
+    QuizSessionStartView, QuizSessionDetailView, QuizSessionSubmitView, QuestionImportView,
+)
 
 urlpatterns = [
     path("", QuizRootView.as_view(), name="quiz_root"),
     path("sets/", QuestionSetListView.as_view(), name="questionset_list"),
     path("sets/<int:pk>/", QuestionSetDetailView.as_view(), name="questionset_detail"),
+    path("sets/<int:pk>/v/<str:content_hash>/", QuestionSetPayloadView.as_view(), name="questionset_payload"),
+    path("sets/<int:pk>/statistics/", QuestionSetStatisticsView.as_view(), name="questionset_statistics"),
+    path("sets/<int:pk>/leaderboard/", QuestionSetLeaderboardView.as_view(), name="questionset_leaderboard"),
+    path("practice/", PracticeExamView.as_view(), name="practice_exam"),
+    path("sessions/", QuizSessionStartView.as_view(), name="quiz_session_start"),
+    path("sessions/<str:token>/", QuizSessionDetailView.as_view(), name="quiz_session_detail"),
+    path("sessions/<str:token>/submit/", QuizSessionSubmitView.as_view(), name="quiz_session_submit"),
+    path("import/", QuestionImportView.as_view(), name="question_import"),
     path("attempts/", QuizAttemptCreateView.as_view(), name="quiz_attempt"),
+    path("attempts/batch/", QuizAttemptBatchView.as_view(), name="quiz_attempt_batch"),
 ]
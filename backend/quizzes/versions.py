@@ -0,0 +1,87 @@
+"""
+Version counters for cached quiz data.
+
+Each question set has a version number kept in the shared cache. Anything
+derived from a set's questions (answer keys, sampling pools, ...) embeds the
+version in its cache key, so bumping the counter invalidates every derived
+entry at once, in every worker, without having to enumerate keys.
+
+Bumps from model signals happen before the writer's transaction commits, so
+a request in between can still rebuild an entry from the old rows under the
+new version. bump_version_on_commit() therefore bumps again once the
+transaction commits, which orphans anything built in that window.
+"""
+import time
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_TIMEOUT = None  # never expire; losing a counter only forces a rebuild
+
+
+def _version_key(scope, pk):
+    return f"quizzes:{scope}:{pk}:version"
+
+
+def _initial_version():
+    # Millisecond clock rather than 1, so a counter evicted from the cache can
+    # never come back at a value that old derived entries were stored under.
+    return int(time.time() * 1000)
+
+
+def get_version(scope, pk):
+    key = _version_key(scope, pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(scope, pks):
+    """get_version() for many ids with one cache round trip (plus one per missing counter)."""
+    keys = {_version_key(scope, pk): pk for pk in pks}
+    found = cache.get_many(list(keys))
+    versions = {keys[key]: version for key, version in found.items()}
+    for key, pk in keys.items():
+        if key not in found:
+            versions[pk] = get_version(scope, pk)
+    return versions
+
+
+def bump_version(scope, pk):
+    key = _version_key(scope, pk)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Counter missing (first write or evicted): start a fresh one
+        version = _initial_version()
+        cache.set(key, version, VERSION_TIMEOUT)
+        return version
+
+
+def bump_version_on_commit(scope, pk):
+    """bump_version() now and, inside a transaction, again when it commits."""
+    version = bump_version(scope, pk)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: bump_version(scope, pk))
+    return version
+
+
+def question_set_version(question_set_id):
+    return get_version("questionset", question_set_id)
+
+
+def question_set_versions(question_set_ids):
+    return get_versions("questionset", question_set_ids)
+
+
+def bump_question_set_version(question_set_id):
+    return bump_version_on_commit("questionset", question_set_id)
+
+
+def unit_version(unit_id):
+    return get_version("unit", unit_id)
+
+
+def bump_unit_version(unit_id):
+    return bump_version_on_commit("unit", unit_id)
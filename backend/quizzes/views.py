@@ -1,10 +1,22 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
-from .models import QuestionSet, Question, QuizAttempt
-from .serializers import QuestionSetSerializer, QuizAttemptSerializer
-from django.shortcuts import get_object_or_404
+from .models import QuestionSet, Question, QuestionStatistics, QuestionSetStatistics
+from .serializers import (
+    QuestionSetSummarySerializer, QuizAttemptSerializer,
+    QuestionStatisticsSerializer, QuestionSetStatisticsSerializer, LeaderboardEntrySerializer,
+    PracticeQuestionSerializer, OfflineAttemptSerializer,
+)
+from .answer_keys import get_answer_key
+from .attempts import record_attempt, record_attempts
+from . import leaderboards, sampling, sessions, importing, payloads
+from users.models import UnitProgress
+import secrets
+from django.http import Http404, HttpResponseRedirect
+from django.urls import reverse
+from cpa_academy.db_routers import ReplicaReadMixin
+from cpa_academy.prerendered import prerendered_response
+from cpa_academy.throttling import token_bucket_throttles
 from rest_framework.views import APIView
-from django.utils import timezone
 
 class QuizRootView(APIView):
     permission_classes = [permissions.AllowAny]
@@ -15,37 +27,119 @@ class QuizRootView(APIView):
             "endpoints": {
                 "question_sets": "GET /api/quizzes/sets/",
                 "question_set_detail": "GET /api/quizzes/sets/<id>/",
-                "quiz_attempts": "POST /api/quizzes/attempts/"
+                "question_set_payload": "GET /api/quizzes/sets/<id>/v/<hash>/",
+                "quiz_attempts": "POST /api/quizzes/attempts/",
+                "quiz_attempt_batch": "POST /api/quizzes/attempts/batch/",
+                "question_set_statistics": "GET /api/quizzes/sets/<id>/statistics/",
+                "question_set_leaderboard": "GET /api/quizzes/sets/<id>/leaderboard/",
+                "practice_exam": "GET /api/quizzes/practice/",
+                "quiz_sessions": "POST /api/quizzes/sessions/",
+                "quiz_session_detail": "GET|PATCH /api/quizzes/sessions/<token>/",
+                "quiz_session_submit": "POST /api/quizzes/sessions/<token>/submit/",
+                "question_import": "POST /api/quizzes/import/"
             },
             "usage": {
                 "question_sets": {
                     "method": "GET",
-                    "description": "List all question sets"
+                    "description": "List all question sets with question and attempt statistics"
                 },
                 "question_set_detail": {
                     "method": "GET",
-                    "description": "Get a specific question set with questions"
+                    "description": "Get a specific question set with questions (revalidate with ETag)"
+                },
+                "question_set_payload": {
+                    "method": "GET",
+                    "description": "Immutable, cacheable question set content; the hash comes from the detail ETag/Content-Location"
                 },
                 "quiz_attempts": {
                     "method": "POST",
                     "fields": ["question_set", "answers"],
                     "description": "Submit quiz answers and get score"
+                },
+                "quiz_attempt_batch": {
+                    "method": "POST",
+                    "fields": ["attempts"],
+                    "description": "Sync attempts made offline; each carries a client_id so retries are not stored twice"
+                },
+                "question_set_statistics": {
+                    "method": "GET",
+                    "description": "Item analysis for a question set (staff only)"
+                },
+                "question_set_leaderboard": {
+                    "method": "GET",
+                    "params": ["limit"],
+                    "description": "Top scores for a question set and the caller's rank"
+                },
+                "practice_exam": {
+                    "method": "GET",
+                    "params": ["sets", "units", "count", "weighting", "seed"],
+                    "description": "Random questions drawn from sets/units; the same seed regenerates the same exam"
+                },
+                "quiz_sessions": {
+                    "method": "POST",
+                    "fields": ["question_set"],
+                    "description": "Start (or resume) a server-timed quiz session"
+                },
+                "quiz_session_detail": {
+                    "method": "GET|PATCH",
+                    "fields": ["answers"],
+                    "description": "Resume a session, or autosave answers with PATCH"
+                },
+                "quiz_session_submit": {
+                    "method": "POST",
+                    "fields": ["answers"],
+                    "description": "Grade the session and record the attempt"
+                },
+                "question_import": {
+                    "method": "POST",
+                    "fields": ["file", "question_set", "dry_run"],
+                    "description": "Bulk import questions from a .jsonl or .csv upload (staff only)"
                 }
             }
         })
 
-class QuestionSetListView(generics.ListAPIView):
-    queryset = QuestionSet.objects.select_related("unit").prefetch_related("questions").all()
-    serializer_class = QuestionSetSerializer
+class QuestionSetListView(ReplicaReadMixin, generics.ListAPIView):
+    # Summaries only; full questions are served by QuestionSetDetailView
+    queryset = QuestionSet.objects.with_summary().order_by("id")
+    serializer_class = QuestionSetSummarySerializer
     permission_classes = [permissions.AllowAny]
 
-class QuestionSetDetailView(generics.RetrieveAPIView):
-    queryset = QuestionSet.objects.select_related("unit").prefetch_related("questions").all()
-    serializer_class = QuestionSetSerializer
+def _payload_response(request, payload, cache_control):
+    response = prerendered_response(request, payload.body, payload.compressed, payload.content_hash, cache_control)
+    response["Content-Location"] = reverse("questionset_payload", args=[payload.question_set_id, payload.content_hash])
+    return response
+
+class QuestionSetDetailView(ReplicaReadMixin, APIView):
+    """
+    The current payload of a set. It must be revalidated on every use (ETag);
+    Content-Location names the immutable versioned URL of the same content.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, pk):
+        payload = payloads.current_payload(pk)
+        if payload is None:
+            raise Http404("No QuestionSet matches the given query.")
+        return _payload_response(request, payload, "public, no-cache")
+
+class QuestionSetPayloadView(ReplicaReadMixin, APIView):
+    """A set payload addressed by content hash; the URL never changes meaning, so it is cached forever."""
     permission_classes = [permissions.AllowAny]
 
+    def get(self, request, pk, content_hash):
+        payload = payloads.payload_by_hash(pk, content_hash)
+        if payload is None:
+            if payloads.current_payload(pk) is None:
+                raise Http404("No QuestionSet matches the given query.")
+            # Content no longer available: send the client to the current version
+            response = HttpResponseRedirect(reverse("questionset_detail", args=[pk]))
+            response["Cache-Control"] = "no-cache"
+            return response
+        return _payload_response(request, payload, "public, max-age=31536000, immutable")
+
 class QuizAttemptCreateView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = token_bucket_throttles("quiz_attempts")
 
     def post(self, request, *args, **kwargs):
         """
@@ -56,29 +150,220 @@ class QuizAttemptCreateView(APIView):
         }
         """
         data = request.data
-        question_set_id = data.get("question_set")
+        try:
+            question_set_id = int(data.get("question_set"))
+        except (TypeError, ValueError):
+            raise Http404("No QuestionSet matches the given query.")
         answers = data.get("answers", [])
-        qset = get_object_or_404(QuestionSet, pk=question_set_id)
-        total_possible = 0
-        score = 0
-        # Map questions for quick access
-        qs = {q.id: q for q in qset.questions.all()}
-        for q in qs.values():
-            total_possible += q.points
-        for ans in answers:
-            qid = ans.get("question_id")
-            choice = str(ans.get("choice"))
-            q = qs.get(qid)
-            if not q:
-                continue
-            if str(q.correct_choice) == choice:
-                score += q.points
-        attempt = QuizAttempt.objects.create(
-            user=request.user,
-            question_set=qset,
-            score=score,
-            total=total_possible,
-            finished_at=timezone.now()
-        )
+        # Graded from the cached answer key; the only queries are the INSERTs below
+        answer_key = get_answer_key(question_set_id)
+        if answer_key is None:
+            raise Http404("No QuestionSet matches the given query.")
+        attempt = record_attempt(request.user, answer_key, answers)
         serializer = QuizAttemptSerializer(attempt)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+class QuizAttemptBatchView(APIView):
+    """
+    Expects payload:
+    {
+        "attempts": [
+            {"client_id": "<uuid>", "question_set": <id>, "answers": [...], "started_at": ..., "finished_at": ...},
+            ...
+        ]
+    }
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = token_bucket_throttles("quiz_attempts")
+    MAX_ATTEMPTS = 50
+
+    def throttle_cost(self, request):
+        # A batch draws one token per attempt, like that many single submissions
+        attempts = request.data.get("attempts") if isinstance(request.data, dict) else None
+        return min(len(attempts), self.MAX_ATTEMPTS) if isinstance(attempts, list) else 1
+
+    def post(self, request):
+        attempts = request.data.get("attempts") if isinstance(request.data, dict) else None
+        if not isinstance(attempts, list) or not attempts:
+            return Response({"detail": "attempts must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(attempts) > self.MAX_ATTEMPTS:
+            return Response({"detail": f"Sync at most {self.MAX_ATTEMPTS} attempts per request."}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = OfflineAttemptSerializer(data=attempts, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        results = []
+        for client_id, attempt, created in record_attempts(request.user, serializer.validated_data):
+            if attempt is None:
+                results.append({"client_id": client_id, "status": "error", "detail": "No QuestionSet matches the given query."})
+            else:
+                results.append({
+                    "client_id": client_id,
+                    "status": "created" if created else "duplicate",
+                    "attempt": QuizAttemptSerializer(attempt).data,
+                })
+        any_created = any(row["status"] == "created" for row in results)
+        return Response({"results": results}, status=status.HTTP_201_CREATED if any_created else status.HTTP_200_OK)
+
+class QuestionSetStatisticsView(APIView):
+    """Item statistics computed by the analyze_items command for one question set."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, pk):
+        try:
+            set_stats = QuestionSetStatistics.objects.get(question_set_id=pk)
+        except QuestionSetStatistics.DoesNotExist:
+            if not QuestionSet.objects.filter(pk=pk).exists():
+                raise Http404("No QuestionSet matches the given query.")
+            set_stats = None
+        questions = QuestionStatistics.objects.filter(question__question_set_id=pk).order_by("question_id")
+        return Response({
+            "question_set": QuestionSetStatisticsSerializer(set_stats).data if set_stats else None,
+            "questions": QuestionStatisticsSerializer(questions, many=True).data,
+        })
+
+class QuestionSetLeaderboardView(APIView):
+    """Top N best scores for a question set, plus the caller's own rank when signed in."""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, pk):
+        try:
+            limit = min(int(request.query_params.get("limit", leaderboards.DEFAULT_TOP_N)), leaderboards.MAX_TOP_N)
+        except ValueError:
+            limit = leaderboards.DEFAULT_TOP_N
+        top = leaderboards.top_entries(pk, max(limit, 1))
+        if not top and not QuestionSet.objects.filter(pk=pk).exists():
+            raise Http404("No QuestionSet matches the given query.")
+        for rank, entry in top:
+            entry.rank = rank
+
+        me = None
+        if request.user.is_authenticated:
+            mine = leaderboards.user_rank(pk, request.user)
+            if mine:
+                mine[1].rank = mine[0]
+                me = LeaderboardEntrySerializer(mine[1]).data
+        return Response({
+            "question_set": pk,
+            "top": LeaderboardEntrySerializer([entry for _, entry in top], many=True).data,
+            "me": me,
+        })
+
+class PracticeExamView(APIView):
+    """
+    Draw a random practice exam from question sets and/or units.
+    Query params: sets=1,2 units=3 count=20 weighting=uniform|hard|easy|weak seed=<int>.
+    """
+    permission_classes = [permissions.AllowAny]
+    MAX_QUESTIONS = 200
+    # Each set or unit is a sampling pool to load, so anonymous callers may not name thousands
+    MAX_SOURCES = 20
+
+    @staticmethod
+    def _ids(value):
+        return list(dict.fromkeys(int(pk) for pk in (value or "").split(",") if pk.strip()))
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            set_ids = self._ids(params.get("sets"))
+            unit_ids = self._ids(params.get("units"))
+            count = max(1, min(int(params.get("count", 20)), self.MAX_QUESTIONS))
+            seed = int(params["seed"]) if params.get("seed") else secrets.randbits(32)
+        except ValueError:
+            return Response({"detail": "sets, units, count and seed must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+        weighting = params.get("weighting", "uniform")
+        if weighting not in sampling.WEIGHTINGS:
+            return Response({"detail": f"weighting must be one of {', '.join(sampling.WEIGHTINGS)}."}, status=status.HTTP_400_BAD_REQUEST)
+        if not (set_ids or unit_ids):
+            return Response({"detail": "Give at least one of sets or units."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(set_ids) + len(unit_ids) > self.MAX_SOURCES:
+            return Response({"detail": f"Give at most {self.MAX_SOURCES} sets and units together."}, status=status.HTTP_400_BAD_REQUEST)
+
+        weak_units = None
+        if weighting == "weak":
+            if not request.user.is_authenticated:
+                return Response({"detail": "Sign in to weight by weak areas."}, status=status.HTTP_401_UNAUTHORIZED)
+            weak_units = {
+                unit_id: score / total
+                for unit_id, score, total in UnitProgress.objects.filter(user=request.user, total_sum__gt=0)
+                .values_list("unit_id", "score_sum", "total_sum")
+            }
+
+        ids, versions = sampling.sample_questions(set_ids, unit_ids, count, seed, weighting, weak_units)
+        questions = Question.objects.in_bulk(ids)
+        return Response({
+            "seed": seed,
+            "weighting": weighting,
+            "versions": versions,
+            "questions": PracticeQuestionSerializer([questions[pk] for pk in ids if pk in questions], many=True).data,
+        })
+
+class QuizSessionStartView(APIView):
+    """Start a timed quiz session, or return the caller's active one for the set."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        try:
+            question_set = QuestionSet.objects.only("id", "time_limit_minutes").get(pk=int(request.data.get("question_set")))
+        except (TypeError, ValueError, QuestionSet.DoesNotExist):
+            raise Http404("No QuestionSet matches the given query.")
+        session, created = sessions.start(request.user, question_set)
+        return Response(sessions.describe(session), status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+class QuizSessionDetailView(APIView):
+    """GET resumes a session; PATCH autosaves {"answers": [...]} without touching the database."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, token):
+        try:
+            return Response(sessions.describe(sessions.load(request.user, token)))
+        except sessions.SessionError as e:
+            return Response({"detail": e.detail}, status=e.status)
+
+    def patch(self, request, token):
+        try:
+            saved = sessions.save_answers(request.user, token, request.data.get("answers", []))
+            session = sessions.load(request.user, token)
+        except sessions.SessionError as e:
+            return Response({"detail": e.detail}, status=e.status)
+        return Response({"saved": saved, "remaining_seconds": sessions.remaining_seconds(session)})
+
+
+class QuizSessionSubmitView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, token):
+        try:
+            attempt = sessions.submit(request.user, token, request.data.get("answers"))
+        except sessions.SessionError as e:
+            return Response({"detail": e.detail}, status=e.status)
+        return Response(QuizAttemptSerializer(attempt).data, status=status.HTTP_201_CREATED)
+
+
+class QuestionImportView(APIView):
+    """
+    Stream a .jsonl or .csv question bank upload into the database in chunks.
+    Form fields: file, optional question_set (default set for rows naming none), dry_run.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"detail": "Upload the question bank as 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            fmt = importing.detect_format(upload.name)
+            default_set = int(request.data["question_set"]) if request.data.get("question_set") else None
+        except importing.ImportFormatError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response({"detail": "question_set must be an id."}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run = str(request.data.get("dry_run", "")).lower() in ("1", "true", "yes")
+
+        rows = importing.read_rows(importing.open_text(upload.file), fmt)
+        result = importing.import_questions(rows, default_question_set=default_set, dry_run=dry_run)
+        return Response(
+            dict(result.as_dict(), dry_run=dry_run),
+            status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED,
+        )
@@ -0,0 +1,51 @@
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from users.models import User
+from courses.models import Subject, Unit
+from quizzes.models import QuestionSet, Question, QuizAttempt
+from cpa_academy import paginators
+from cpa_academy.paginators import EstimatedCountPaginator
+
+
+# Admin pages render static URLs; the manifest storage needs collectstatic, which tests do not run
+@override_settings(STORAGES={**settings.STORAGES, "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}})
+class AdminScalabilityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(username="root", email="root@example.com", password="pass1234")
+        self.client.force_login(self.admin)
+        self.unit = Unit.objects.create(subject=Subject.objects.create(name="Audit", slug="audit"), title="Unit 1")
+
+    def add_rows(self, n):
+        for i in range(n):
+            user = User.objects.create_user(username=f"student{User.objects.count()}", password="pass1234")
+            qset = QuestionSet.objects.create(unit=self.unit, title=f"Set {i}")
+            Question.objects.create(question_set=qset, text="2+2=?", choices=[{"id": "A", "text": "4"}], correct_choice="A")
+            QuizAttempt.objects.create(user=user, question_set=qset, score=1, total=1)
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        for url in ("/admin/quizzes/quizattempt/", "/admin/quizzes/questionset/", "/admin/quizzes/question/"):
+            self.add_rows(2)
+            self.client.get(url)  # fills the cached table count
+            before = self.changelist_queries(url)
+            self.add_rows(3)
+            self.assertEqual(self.changelist_queries(url), before, url)
+
+    def test_unfiltered_count_is_cached_on_large_tables(self):
+        self.add_rows(3)
+        with mock.patch.object(paginators, "EXACT_COUNT_BELOW", 0):
+            self.assertEqual(EstimatedCountPaginator(QuizAttempt.objects.order_by("pk"), 10).count, 3)
+            self.add_rows(1)
+            with self.assertNumQueries(0):
+                self.assertEqual(EstimatedCountPaginator(QuizAttempt.objects.order_by("pk"), 10).count, 3)
+            # Filtered changelists keep their exact count
+            self.assertEqual(EstimatedCountPaginator(QuizAttempt.objects.filter(score=1).order_by("pk"), 10).count, 4)
@@ -0,0 +1,101 @@
+import threading
+import time
+from unittest import mock
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from cpa_academy import cache_backends
+from cpa_academy.cache_backends import TwoTierCache
+from users.models import User
+
+
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache_backends._stores.pop("shared", None)
+        self.cache = TwoTierCache("shared", {"OPTIONS": {
+            "LOCAL_MAX_ENTRIES": 2, "LOCAL_TIMEOUT": 30, "LOCAL_KEY_PREFIXES": ["hot:"],
+        }})
+        self.shared = caches["shared"]
+        self.cache.clear()
+
+    def test_hot_keys_are_served_from_process_memory(self):
+        self.cache.set("hot:a", {"n": 1})
+        with mock.patch.object(self.shared, "get") as shared_get:
+            self.assertEqual(self.cache.get("hot:a"), {"n": 1})
+            shared_get.assert_not_called()
+        # Other keys always read the shared tier
+        self.shared.set("cold:a", 1)
+        self.cache.get("cold:a")
+        self.shared.set("cold:a", 2)
+        self.assertEqual(self.cache.get("cold:a"), 2)
+        stats = self.cache.stats()
+        self.assertEqual((stats["local_hits"], stats["shared_hits"]), (1, 2))
+
+    def test_local_entries_expire_and_are_evicted(self):
+        self.shared.set("hot:a", "old")
+        self.assertEqual(self.cache.get("hot:a"), "old")
+        self.shared.set("hot:a", "new")  # written by another worker
+        self.assertEqual(self.cache.get("hot:a"), "old")
+        with mock.patch.object(cache_backends.time, "monotonic", return_value=time.monotonic() + 31):
+            self.assertEqual(self.cache.get("hot:a"), "new")
+
+        for key in ("hot:b", "hot:c", "hot:d"):
+            self.cache.set(key, key)
+        self.assertEqual(self.cache.stats()["entries"], 2)
+        self.assertGreaterEqual(self.cache.stats()["evictions"], 1)
+
+    def test_writes_and_counters_bypass_stale_local_copies(self):
+        self.cache.set("hot:a", 1)
+        self.cache.delete("hot:a")
+        self.assertIsNone(self.cache.get("hot:a"))
+        self.cache.set("hot:n", 1)
+        self.assertEqual(self.cache.incr("hot:n"), 2)
+        self.assertEqual(self.cache.get("hot:n"), 2)
+
+    def test_local_copies_are_not_shared_objects(self):
+        self.cache.set("hot:a", [1])
+        self.cache.get("hot:a").append(2)
+        self.assertEqual(self.cache.get("hot:a"), [1])
+
+    def test_get_or_set_computes_once_per_process(self):
+        calls, barrier = [], threading.Barrier(4)
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return "value"
+
+        def worker():
+            barrier.wait()
+            results.append(self.cache.get_or_set("hot:slow", compute))
+
+        results = []
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["value"] * 4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.cache.stats()["coalesced"], 3)
+
+
+    def test_shared_tier_is_not_culled_at_the_default_size(self):
+        # Quiz sessions, counters and leases live there, not just copies
+        self.assertGreaterEqual(self.shared._max_entries, 100000)
+
+
+class CacheHealthTests(TestCase):
+    def test_staff_only(self):
+        self.assertEqual(self.client.get("/api/health/cache/").status_code, 401)
+        student = User.objects.create_user(username="student", password="pass1234")
+        resp = self.client.get("/api/health/cache/", HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(student)}")
+        self.assertEqual(resp.status_code, 403)
+
+        # Staff reach it with the API's JWTs as well as an admin session
+        staff = User.objects.create_user(username="staff", password="pass1234", is_staff=True)
+        resp = self.client.get("/api/health/cache/", HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(staff)}")
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("local_hits", resp.json()["stats"])
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get("/api/health/cache/").status_code, 200)
@@ -0,0 +1,70 @@
+import gzip
+import json
+import brotli
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponse, JsonResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from cpa_academy.compression import CompressionMiddleware, negotiate
+from cpa_academy.prerendered import prerender, prerendered_response
+
+LARGE = {"results": [{"id": i, "title": f"Material {i}"} for i in range(200)]}
+
+
+class NegotiateTests(SimpleTestCase):
+    def test_q_values_and_preference_order(self):
+        self.assertEqual(negotiate("gzip, deflate, br", ("br", "gzip")), "br")
+        self.assertEqual(negotiate("br;q=0.5, gzip", ("br", "gzip")), "gzip")
+        self.assertEqual(negotiate("br;q=0, gzip;q=0", ("br", "gzip")), None)
+        self.assertEqual(negotiate("*", ("br", "gzip")), "br")
+        self.assertEqual(negotiate("", ("br", "gzip")), None)
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    def respond(self, response, accept="gzip, br"):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_large_json_is_compressed(self):
+        resp = self.respond(JsonResponse(LARGE))
+        self.assertEqual(resp["Content-Encoding"], "br")
+        self.assertEqual(json.loads(brotli.decompress(resp.content)), LARGE)
+        self.assertEqual(resp["Content-Length"], str(len(resp.content)))
+        self.assertIn("Accept-Encoding", resp["Vary"])
+
+        resp = self.respond(JsonResponse(LARGE), accept="gzip")
+        self.assertEqual(resp["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(resp.content)), LARGE)
+
+    def test_strong_etag_is_weakened(self):
+        response = JsonResponse(LARGE)
+        response["ETag"] = '"abc"'
+        self.assertEqual(self.respond(response)["ETag"], 'W/"abc"')
+
+    @override_settings(COMPRESSION_MIN_SIZE=1024)
+    def test_small_streaming_and_non_json_responses_are_left_alone(self):
+        self.assertFalse(self.respond(JsonResponse({"id": 1})).has_header("Content-Encoding"))
+        self.assertFalse(self.respond(HttpResponse("x" * 4096, content_type="text/plain")).has_header("Content-Encoding"))
+        download = FileResponse(ContentFile(b"{}" * 4096, name="notes.json"), content_type="application/json")
+        self.assertFalse(self.respond(download).has_header("Content-Encoding"))
+
+
+class PrerenderedResponseTests(SimpleTestCase):
+    def test_serves_the_stored_variant(self):
+        blob = prerender(LARGE)
+        self.assertEqual(set(blob.compressed), {"br", "gzip"})
+        factory = RequestFactory()
+
+        resp = prerendered_response(factory.get("/", HTTP_ACCEPT_ENCODING="gzip, br"), *blob, "no-cache")
+        self.assertEqual(resp["Content-Encoding"], "br")
+        self.assertEqual(resp.content, blob.compressed["br"])
+        self.assertEqual(resp["ETag"], f'"{blob.etag}-br"')
+
+        resp = prerendered_response(factory.get("/"), *blob, "no-cache")
+        self.assertFalse(resp.has_header("Content-Encoding"))
+        self.assertEqual(resp["ETag"], f'"{blob.etag}"')
+        self.assertEqual(json.loads(resp.content), LARGE)
+
+        # Already encoded, so the middleware passes it through
+        request = factory.get("/", HTTP_ACCEPT_ENCODING="gzip")
+        resp = CompressionMiddleware(lambda r: prerendered_response(r, *blob, "no-cache"))(request)
+        self.assertEqual(gzip.decompress(resp.content), blob.body)
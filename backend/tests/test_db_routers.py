@@ -0,0 +1,96 @@
+from unittest import mock
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from courses.models import Unit
+from users.models import User
+from cpa_academy import db_routers
+from cpa_academy.db_routers import ReplicaPinningMiddleware, ReplicaRouter, replica_reads, use_primary
+
+
+@mock.patch.object(db_routers, "replica_aliases", lambda: ["replica"])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        db_routers._lag.clear()
+        self.router = ReplicaRouter()
+        self.lag = mock.patch.object(db_routers, "measure_lag", return_value=0.0)
+        self.measure_lag = self.lag.start()
+        self.addCleanup(self.lag.stop)
+
+    def request(self, write=False, opted_in=True, ip="10.0.0.1", inner=None, token=None):
+        """Run a request through the middleware; returns the aliases its reads were routed to."""
+        reads = []
+
+        def view(request):
+            if write:
+                self.router.db_for_write(Unit)
+            reads.append(self.router.db_for_read(Unit) or "default")
+            if inner:
+                with inner():
+                    reads.append(self.router.db_for_read(Unit) or "default")
+            return HttpResponse()
+
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+        ReplicaPinningMiddleware(replica_reads(view) if opted_in else view)(RequestFactory().get("/", REMOTE_ADDR=ip, **headers))
+        return reads
+
+    def test_only_opted_in_views_read_from_replicas(self):
+        self.assertEqual(self.request(), ["replica"])
+        self.assertEqual(self.request(opted_in=False), ["default"])
+        self.assertIsNone(self.router.db_for_read(Unit))  # outside requests
+
+    def test_client_is_pinned_to_primary_after_writing(self):
+        self.assertEqual(self.request(write=True), ["default"])
+        self.assertEqual(self.request(), ["default"])
+        self.assertEqual(self.request(ip="10.0.0.2"), ["replica"])
+        cache.clear()  # the pin expired
+        self.assertEqual(self.request(), ["replica"])
+
+    def test_signed_in_users_are_pinned_individually(self):
+        alice, bob = (str(AccessToken.for_user(User(pk=pk))) for pk in (1, 2))
+        self.assertEqual(self.request(write=True, token=alice), ["default"])
+        self.assertEqual(self.request(token=alice, ip="10.0.0.9"), ["default"])
+        # Same address (campus NAT), other user or anonymous: not pinned
+        self.assertEqual(self.request(token=bob), ["replica"])
+        self.assertEqual(self.request(), ["replica"])
+        # A forged token counts as anonymous
+        self.assertEqual(self.request(token=alice[:-2] + "xx", ip="10.0.0.3"), ["replica"])
+
+    def test_forwarded_for_is_not_trusted_without_proxies(self):
+        spoofed = RequestFactory().get("/", HTTP_X_FORWARDED_FOR="10.0.0.1", REMOTE_ADDR="10.0.0.7")
+        self.assertEqual(db_routers._pin_keys(spoofed), db_routers._pin_keys(RequestFactory().get("/", REMOTE_ADDR="10.0.0.7")))
+
+    def test_anonymous_write_pins_the_address_and_the_new_user(self):
+        token = str(AccessToken.for_user(User(pk=3)))
+        # Signing up: anonymous, and the view never sets request.user
+        self.assertEqual(self.request(write=True), ["default"])
+        self.assertEqual(self.request(token=token), ["default"])
+
+        cache.clear()
+
+        def login(request):
+            self.router.db_for_write(Unit)
+            request.user = User(pk=3)
+            return HttpResponse()
+
+        ReplicaPinningMiddleware(login)(RequestFactory().post("/", REMOTE_ADDR="10.0.0.1"))
+        self.assertEqual(self.request(token=token, ip="10.0.0.9"), ["default"])
+        self.assertEqual(self.request(), ["default"])
+
+    def test_lagging_or_unreachable_replica_is_skipped(self):
+        self.measure_lag.return_value = 30.0
+        self.assertEqual(self.request(), ["default"])
+        # Lag is re-measured only after the check interval
+        self.measure_lag.return_value = 0.0
+        self.assertEqual(self.request(), ["default"])
+        db_routers._lag.clear()
+        self.assertEqual(self.request(), ["replica"])
+
+        db_routers._lag.clear()
+        self.measure_lag.side_effect = db_routers.DatabaseError
+        self.assertEqual(self.request(), ["default"])
+
+    def test_use_primary_overrides_the_view(self):
+        self.assertEqual(self.request(inner=use_primary), ["replica", "default"])
@@ -0,0 +1,79 @@
+import threading
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from cpa_academy import singleflight
+from materials.views import shared_presigned_url
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        singleflight._stats.clear()
+
+    def run_threads(self, n, target):
+        threads = [threading.Thread(target=target) for _ in range(n)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_concurrent_misses_compute_once(self):
+        calls, results, barrier = [], [], threading.Barrier(5)
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return "catalog"
+
+        def request():
+            barrier.wait()
+            results.append(singleflight.fetch("k", compute, 60))
+
+        self.run_threads(5, request)
+        self.assertEqual(results, ["catalog"] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(singleflight.stats()["rebuilds_avoided"], 4)
+
+    def test_waits_for_a_rebuild_in_another_worker(self):
+        cache.add("lease:k", True, 30)  # another worker is rebuilding
+
+        def other_worker():
+            time.sleep(0.1)
+            cache.set("k", ("built elsewhere", time.time() + 60), 60)
+            cache.delete("lease:k")
+
+        threading.Thread(target=other_worker).start()
+        compute = mock.Mock(return_value="built here")
+        self.assertEqual(singleflight.fetch("k", compute, 60), "built elsewhere")
+        compute.assert_not_called()
+        self.assertEqual(singleflight.stats()["coalesced"], 1)
+
+    def test_stale_value_is_served_while_another_worker_rebuilds(self):
+        cache.set("k", ("old", time.time() - 1), 60)
+        cache.add("lease:k", True, 30)
+        compute = mock.Mock(return_value="new")
+        self.assertEqual(singleflight.fetch("k", compute, 60, stale_timeout=60), "old")
+        compute.assert_not_called()
+        cache.delete("lease:k")
+        self.assertEqual(singleflight.fetch("k", compute, 60, stale_timeout=60), "new")
+
+    def test_failures_are_not_cached(self):
+        self.assertIsNone(singleflight.fetch("k", lambda: None, 60))
+        with self.assertRaises(ValueError):
+            singleflight.fetch("k", mock.Mock(side_effect=ValueError), 60)
+        self.assertIsNone(cache.get("lease:k"))
+        self.assertEqual(singleflight.fetch("k", lambda: "ok", 60), "ok")
+
+    def test_presigned_urls_are_shared(self):
+        storage = mock.Mock()
+        storage.exists.return_value = True
+        with mock.patch("materials.views.generate_s3_presigned_url", return_value="https://s3/signed") as sign:
+            self.assertEqual(shared_presigned_url(storage, "materials/a.pdf"), "https://s3/signed")
+            self.assertEqual(shared_presigned_url(storage, "materials/a.pdf"), "https://s3/signed")
+        self.assertEqual((storage.exists.call_count, sign.call_count), (1, 1))
+
+        storage.exists.return_value = False
+        with self.assertRaises(FileNotFoundError):
+            shared_presigned_url(storage, "materials/missing.pdf")
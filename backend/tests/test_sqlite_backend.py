@@ -0,0 +1,52 @@
+import os
+import tempfile
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase
+from cpa_academy.sqlite_backend.base import DatabaseWrapper, pragma_statements, write_lock
+
+
+class SQLiteBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "db.sqlite3")
+        self.db = DatabaseWrapper({
+            **connection.settings_dict,
+            "NAME": self.path,
+            "OPTIONS": {"timeout": 0.2, "transaction_mode": "IMMEDIATE", "serialize_writes": True},
+        }, alias="sqlite_backend_test")
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        with self.db.cursor() as cursor:
+            self.assertEqual(cursor.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            self.assertEqual(cursor.execute("PRAGMA synchronous").fetchone()[0], 1)
+            self.assertEqual(cursor.execute("PRAGMA busy_timeout").fetchone()[0], 200)
+
+    def test_pragma_overrides(self):
+        statements = pragma_statements({"synchronous": "FULL", "mmap_size": None}, timeout=20)
+        self.assertIn("PRAGMA synchronous=FULL", statements)
+        self.assertIn("PRAGMA busy_timeout=20000", statements)
+        self.assertFalse(any("mmap_size" in statement for statement in statements))
+
+    def test_writes_queue_on_the_process_lock(self):
+        lock = write_lock(self.path)
+        with self.db.cursor() as cursor:
+            cursor.execute("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+            self.assertFalse(lock.locked())
+
+            self.db._start_transaction_under_autocommit()
+            self.assertTrue(lock.locked())
+            cursor.execute("INSERT INTO t VALUES (1)")
+            self.db._commit()
+            self.assertFalse(lock.locked())
+
+            lock.acquire()
+            try:
+                with self.assertRaises(OperationalError):
+                    cursor.execute("INSERT INTO t VALUES (2)")
+                cursor.execute("SELECT COUNT(*) FROM t")  # reads do not queue
+            finally:
+                lock.release()
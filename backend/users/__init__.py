@@ -1,2 +1,3 @@
 # Users app package
 
+default_app_config = 'users.apps.UsersConfig'
@@ -0,0 +1,52 @@
+"""
+JWT authentication with a short-lived user cache.
+
+SimpleJWT's JWTAuthentication loads the User row on every authenticated
+request. CachedJWTAuthentication keeps the row in the shared cache for
+USER_AUTH_CACHE_TIMEOUT seconds (default 60), so pages that make several
+API calls authenticate without queries. users.signals drops the entry
+whenever the user is saved or deleted, which covers deactivation and
+password changes; updates that bypass save() are picked up when the entry
+expires. The active and revoked-token checks still run on every request.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+DEFAULT_TIMEOUT = 60
+
+
+def user_cache_key(user_id):
+    return f"users:auth-user:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            # Runs the same active / revoked checks before anything is cached
+            user = super().get_user(validated_token)
+            cache.set(key, user, getattr(settings, "USER_AUTH_CACHE_TIMEOUT", DEFAULT_TIMEOUT))
+            return user
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
@@ -0,0 +1,137 @@
+"""
+Local verification of Google ID tokens.
+
+Tokens are checked against Google's published RS256 signing keys (JWKS)
+instead of calling the tokeninfo endpoint on every sign-in. The key set is
+kept in process memory and in the shared cache for as long as Google's
+Cache-Control max-age allows, so sign-ins normally make no outbound request;
+a token signed with an unknown key id triggers one refresh (key rotation).
+
+Where keys come from is pluggable through GOOGLE_ID_TOKEN_KEY_SOURCE, the
+dotted path of a class with fetch() -> (jwks dict, max-age seconds); tests
+point it at a local key set.
+"""
+import re
+import threading
+import time
+import jwt
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+DEFAULT_KEY_SOURCE = "users.google_tokens.GoogleCertsKeySource"
+DEFAULT_MAX_AGE = 60 * 60
+MIN_REFRESH_INTERVAL = 60
+CLOCK_SKEW_SECONDS = 30
+JWKS_CACHE_KEY = "users:google-jwks"
+
+_local = {"keys": {}, "expires": 0.0, "fetched": None}
+_lock = threading.Lock()
+
+
+class GoogleTokenError(Exception):
+    """The ID token is malformed, not signed by Google, expired or not meant for us."""
+
+
+class GoogleCertsKeySource:
+    """Google's public JWKS endpoint; the max-age comes from its Cache-Control header."""
+
+    def fetch(self):
+        resp = requests.get(GOOGLE_CERTS_URL, timeout=5)
+        resp.raise_for_status()
+        match = re.search(r"max-age=(\d+)", resp.headers.get("Cache-Control", ""))
+        return resp.json(), int(match.group(1)) if match else DEFAULT_MAX_AGE
+
+
+class StaticKeySource:
+    """A fixed key set (default: the GOOGLE_ID_TOKEN_JWKS setting), for tests and offline development."""
+
+    def __init__(self, jwks=None, max_age=DEFAULT_MAX_AGE):
+        self.jwks = jwks if jwks is not None else settings.GOOGLE_ID_TOKEN_JWKS
+        self.max_age = max_age
+
+    def fetch(self):
+        return self.jwks, self.max_age
+
+
+def _key_source():
+    return import_string(getattr(settings, "GOOGLE_ID_TOKEN_KEY_SOURCE", DEFAULT_KEY_SOURCE))()
+
+
+def _parse(jwks):
+    return {jwk["kid"]: jwt.PyJWK.from_dict(jwk).key for jwk in jwks.get("keys", []) if jwk.get("kid")}
+
+
+def _install(jwks, max_age):
+    with _lock:
+        _local["keys"] = _parse(jwks)
+        _local["expires"] = time.monotonic() + max_age
+
+
+def _refresh(force=False):
+    """Load keys from the shared cache, or from the key source when it has none (or force)."""
+    if not force:
+        cached = cache.get(JWKS_CACHE_KEY)
+        if cached is not None:
+            _install(cached["jwks"], max(cached["expires"] - time.time(), 1))
+            return
+    now = time.monotonic()
+    if force and _local["fetched"] is not None and now - _local["fetched"] < MIN_REFRESH_INTERVAL:
+        return  # unknown key ids must not turn into a request per sign-in attempt
+    jwks, max_age = _key_source().fetch()
+    _local["fetched"] = now
+    cache.set(JWKS_CACHE_KEY, {"jwks": jwks, "expires": time.time() + max_age}, max_age)
+    _install(jwks, max_age)
+
+
+def signing_key(kid):
+    if time.monotonic() >= _local["expires"]:
+        _refresh()
+    key = _local["keys"].get(kid)
+    if key is None:
+        _refresh(force=True)
+        key = _local["keys"].get(kid)
+    if key is None:
+        raise GoogleTokenError("Unknown Google signing key")
+    return key
+
+
+def clear_key_cache():
+    with _lock:
+        _local.update(keys={}, expires=0.0, fetched=None)
+    cache.delete(JWKS_CACHE_KEY)
+
+
+def verify_id_token(token, client_id=None):
+    """Return the claims of a valid Google ID token for our client id, or raise GoogleTokenError."""
+    client_id = client_id or settings.SOCIALACCOUNT_PROVIDERS["google"]["APP"]["client_id"]
+    try:
+        header = jwt.get_unverified_header(token)
+    except jwt.PyJWTError:
+        raise GoogleTokenError("Invalid Google token")
+    if header.get("alg") != "RS256":
+        raise GoogleTokenError("Invalid Google token")
+    try:
+        key = signing_key(header.get("kid"))
+    except (requests.RequestException, ValueError, jwt.PyJWTError):
+        raise GoogleTokenError("Could not load Google signing keys")
+
+    try:
+        # Signature only; the claims are checked below so each failure has its own message
+        claims = jwt.decode(token, key, algorithms=["RS256"], options={"verify_aud": False, "verify_exp": False, "verify_iat": False})
+    except jwt.PyJWTError:
+        raise GoogleTokenError("Invalid Google token")
+    if not client_id or claims.get("aud") != client_id:
+        raise GoogleTokenError("Token audience mismatch")
+    if claims.get("iss") not in GOOGLE_ISSUERS:
+        raise GoogleTokenError("Token issuer mismatch")
+    if not isinstance(claims.get("exp"), (int, float)) or claims["exp"] < time.time() - CLOCK_SKEW_SECONDS:
+        raise GoogleTokenError("Google token has expired")
+    if not claims.get("email"):
+        raise GoogleTokenError("No email in Google token")
+    if claims.get("email_verified") not in (True, "true"):
+        raise GoogleTokenError("Google email address is not verified")
+    return claims
@@ -0,0 +1,22 @@
+"""
+Management command to correct drift in the materialized per-user progress
+summaries. Intended to run periodically (e.g. a nightly cron job).
+"""
+from django.core.management.base import BaseCommand
+from users.progress import reconcile_progress
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-user quiz progress summaries from stored attempts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of summary rows upserted per statement',
+        )
+
+    def handle(self, *args, **options):
+        written = reconcile_progress(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Reconciled {written} user/unit progress rows'))
@@ -6,3 +6,32 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.username
+
+
+class UnitProgress(models.Model):
+    """
+    Materialized quiz and download activity of one user in one unit, kept up to
+    date by users.progress on every attempt and download. Subject totals are
+    summed from these rows, so the dashboard is one indexed read per user.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="unit_progress")
+    unit = models.ForeignKey("courses.Unit", on_delete=models.CASCADE, related_name="user_progress")
+    attempts = models.IntegerField(default=0)
+    score_sum = models.IntegerField(default=0)
+    total_sum = models.IntegerField(default=0)
+    best_percent = models.FloatField(default=0)
+    downloads = models.IntegerField(default=0)
+    downloaded_materials = models.JSONField(default=list, blank=True)
+    last_activity = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "unit"], name="unitprogress_unique_user_unit"),
+        ]
+
+    @property
+    def average_percent(self):
+        return round(100.0 * self.score_sum / self.total_sum, 2) if self.total_sum else None
+
+    def __str__(self):
+        return f"{self.user_id} in unit {self.unit_id}"
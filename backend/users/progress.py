@@ -0,0 +1,176 @@
+"""
+Per-user progress summaries.
+
+UnitProgress rows are updated incrementally: record_attempt() from quiz
+submission and record_download() from material downloads. Both touch a
+single (user, unit) row; a download is one INSERT ... ON CONFLICT statement
+on SQLite and PostgreSQL. reconcile_progress() recomputes the
+attempt-derived columns from QuizAttempt with set-based SQL to correct any
+drift.
+"""
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Count, F, FloatField, Max, Sum, Value
+from django.db.models.functions import Cast, Greatest, NullIf
+from django.utils import timezone
+from .models import UnitProgress
+
+ATTEMPT_FIELDS = ["attempts", "score_sum", "total_sum", "best_percent"]
+
+# Add a download to the (user, unit) row, creating it, and the material id
+# to downloaded_materials unless it is already listed
+_DOWNLOAD_UPSERT = """
+INSERT INTO {table} (user_id, unit_id, attempts, score_sum, total_sum, best_percent, downloads, downloaded_materials, last_activity)
+VALUES (%s, %s, 0, 0, 0, 0, 1, {new_list}, %s)
+ON CONFLICT (user_id, unit_id) DO UPDATE SET
+    downloads = {table}.downloads + 1,
+    downloaded_materials = CASE WHEN {contains} THEN {table}.downloaded_materials ELSE {append} END,
+    last_activity = excluded.last_activity
+"""
+_DOWNLOAD_UPSERT_SQL = {
+    "sqlite": dict(
+        new_list="json_array(%s)",
+        contains="EXISTS (SELECT 1 FROM json_each({table}.downloaded_materials) WHERE value = %s)",
+        append="json_insert({table}.downloaded_materials, '$[#]', %s)",
+    ),
+    "postgresql": dict(
+        new_list="jsonb_build_array(%s::integer)",
+        contains="{table}.downloaded_materials @> jsonb_build_array(%s::integer)",
+        append="{table}.downloaded_materials || jsonb_build_array(%s::integer)",
+    ),
+}
+
+
+def _percent(score, total):
+    return 100.0 * score / total if total else 0.0
+
+
+def record_attempt(attempt, unit_id):
+    """Fold a finished attempt into the user's progress for the set's unit."""
+    percent = _percent(attempt.score, attempt.total)
+    now = attempt.finished_at or timezone.now()
+    rows = UnitProgress.objects.filter(user_id=attempt.user_id, unit_id=unit_id)
+    updated = rows.update(
+        attempts=F("attempts") + 1,
+        score_sum=F("score_sum") + attempt.score,
+        total_sum=F("total_sum") + attempt.total,
+        best_percent=Greatest(F("best_percent"), Value(percent)),
+        last_activity=now,
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            UnitProgress.objects.create(
+                user_id=attempt.user_id, unit_id=unit_id, attempts=1,
+                score_sum=attempt.score, total_sum=attempt.total,
+                best_percent=percent, last_activity=now,
+            )
+    except IntegrityError:
+        # Created concurrently; apply as an update instead
+        record_attempt(attempt, unit_id)
+
+
+def record_download(user, material):
+    """Count a download and remember which material it was."""
+    now = timezone.now()
+    connection = connections[router.db_for_write(UnitProgress)]
+    parts = _DOWNLOAD_UPSERT_SQL.get(connection.vendor)
+    if parts is not None:
+        table = connection.ops.quote_name(UnitProgress._meta.db_table)
+        sql = _DOWNLOAD_UPSERT.format(table=table, **{k: v.format(table=table) for k, v in parts.items()})
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [
+                user.pk, material.unit_id, material.pk,
+                connection.ops.adapt_datetimefield_value(now), material.pk, material.pk,
+            ])
+        return
+
+    with transaction.atomic():
+        progress, _ = UnitProgress.objects.select_for_update().get_or_create(user=user, unit_id=material.unit_id)
+        progress.downloads += 1
+        if material.pk not in progress.downloaded_materials:
+            progress.downloaded_materials = progress.downloaded_materials + [material.pk]
+        progress.last_activity = now
+        progress.save(update_fields=["downloads", "downloaded_materials", "last_activity"])
+
+
+def reconcile_progress(batch_size=1000, unit_id=None):
+    """
+    Rebuild the attempt columns of every UnitProgress row (or only the rows
+    of one unit) from QuizAttempt. Download columns are kept: downloads are
+    not recorded anywhere else. Returns the number of (user, unit) rows written.
+    """
+    from quizzes.models import QuizAttempt
+
+    attempts, rows = QuizAttempt.objects.all(), UnitProgress.objects.all()
+    if unit_id is not None:
+        attempts, rows = attempts.filter(question_set__unit_id=unit_id), rows.filter(unit_id=unit_id)
+    aggregates = (
+        attempts.values("user_id", "question_set__unit_id")
+        .annotate(
+            n=Count("id"),
+            score_sum=Sum("score"),
+            total_sum=Sum("total"),
+            best=Max(100.0 * Cast("score", FloatField()) / NullIf("total", 0)),
+            last=Max("finished_at"),
+        )
+        .order_by()
+    )
+    written = 0
+    with transaction.atomic():
+        # Rows whose attempts all disappeared (e.g. deleted sets) go back to zero
+        rows.filter(attempts__gt=0).update(attempts=0, score_sum=0, total_sum=0, best_percent=0)
+        batch = []
+        for row in aggregates.iterator(chunk_size=batch_size):
+            batch.append(UnitProgress(
+                user_id=row["user_id"], unit_id=row["question_set__unit_id"],
+                attempts=row["n"], score_sum=row["score_sum"] or 0, total_sum=row["total_sum"] or 0,
+                best_percent=row["best"] or 0, last_activity=row["last"],
+            ))
+            if len(batch) >= batch_size:
+                written += _upsert(batch)
+                batch = []
+        if batch:
+            written += _upsert(batch)
+    return written
+
+
+def _upsert(rows):
+    UnitProgress.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["user", "unit"],
+        update_fields=ATTEMPT_FIELDS,
+    )
+    return len(rows)
+
+
+def progress_summary(user):
+    """Dashboard payload for a user, built from one indexed read of UnitProgress."""
+    rows = UnitProgress.objects.filter(user=user).select_related("unit__subject").order_by("unit__subject_id", "unit__order")
+    units, subjects = [], {}
+    for row in rows:
+        unit = row.unit
+        units.append({
+            "unit": {"id": unit.id, "title": unit.title, "code": unit.code},
+            "subject": {"id": unit.subject_id, "name": unit.subject.name},
+            "attempts": row.attempts,
+            "average_percent": row.average_percent,
+            "best_percent": round(row.best_percent, 2),
+            "downloads": row.downloads,
+            "downloaded_materials": row.downloaded_materials,
+            "last_activity": row.last_activity,
+        })
+        subject = subjects.setdefault(unit.subject_id, {
+            "id": unit.subject_id, "name": unit.subject.name, "attempts": 0,
+            "score_sum": 0, "total_sum": 0, "best_percent": 0.0, "downloads": 0,
+        })
+        subject["attempts"] += row.attempts
+        subject["score_sum"] += row.score_sum
+        subject["total_sum"] += row.total_sum
+        subject["best_percent"] = max(subject["best_percent"], round(row.best_percent, 2))
+        subject["downloads"] += row.downloads
+    for subject in subjects.values():
+        score_sum, total_sum = subject.pop("score_sum"), subject.pop("total_sum")
+        subject["average_percent"] = round(100.0 * score_sum / total_sum, 2) if total_sum else None
+    return {"units": units, "subjects": list(subjects.values())}
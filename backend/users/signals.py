@@ -0,0 +1,14 @@
+"""
+Signal handlers for the users app.
+Drop cached authentication rows when a user changes.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import User
+from .authentication import invalidate_cached_user
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
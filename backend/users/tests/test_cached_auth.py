@@ -0,0 +1,28 @@
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from users.models import User
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="student@example.com", email="student@example.com", password="pass1234")
+        access = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def test_repeat_requests_authenticate_without_queries(self):
+        self.assertEqual(self.client.get("/api/auth/user/").status_code, 200)
+        with self.assertNumQueries(0):
+            resp = self.client.get("/api/auth/user/")
+        self.assertEqual(resp.data["email"], "student@example.com")
+
+    def test_saving_the_user_invalidates_the_cache(self):
+        self.client.get("/api/auth/user/")
+        self.user.first_name = "Sam"
+        self.user.save()
+        self.assertEqual(self.client.get("/api/auth/user/").data["first_name"], "Sam")
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/auth/user/").status_code, 401)
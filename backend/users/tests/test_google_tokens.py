@@ -0,0 +1,61 @@
+import json
+import time
+from unittest import mock
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from users.google_tokens import clear_key_cache, GoogleCertsKeySource
+from users.models import User
+
+CLIENT_ID = "test-client.apps.googleusercontent.com"
+PRIVATE_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+JWK = dict(json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(PRIVATE_KEY.public_key())), kid="k1", alg="RS256", use="sig")
+
+
+def id_token(**overrides):
+    claims = {
+        "iss": "https://accounts.google.com", "aud": CLIENT_ID, "exp": int(time.time()) + 600,
+        "email": "student@example.com", "email_verified": True, "given_name": "Sam",
+    }
+    claims.update(overrides)
+    return jwt.encode(claims, PRIVATE_KEY, algorithm="RS256", headers={"kid": "k1"})
+
+
+@override_settings(
+    GOOGLE_ID_TOKEN_KEY_SOURCE="users.google_tokens.StaticKeySource",
+    GOOGLE_ID_TOKEN_JWKS={"keys": [JWK]},
+    SOCIALACCOUNT_PROVIDERS={"google": {"APP": {"client_id": CLIENT_ID, "secret": ""}}},
+)
+class GoogleIdTokenTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        clear_key_cache()
+
+    def test_both_endpoints_verify_locally(self):
+        with mock.patch("requests.get") as remote:
+            for url in ("/api/auth/google/", "/api/auth/google/id-token/"):
+                resp = self.client.post(url, {"id_token": id_token()}, format="json")
+                self.assertEqual(resp.status_code, 200, resp.data)
+                self.assertIn("access", resp.data)
+        remote.assert_not_called()
+        self.assertEqual(User.objects.get(email="student@example.com").first_name, "Sam")
+
+    def test_rejects_bad_claims_and_signatures(self):
+        cases = [
+            (id_token(aud="someone-else"), "Token audience mismatch"),
+            (id_token(iss="https://evil.example.com"), "Token issuer mismatch"),
+            (id_token(exp=int(time.time()) - 3600), "Google token has expired"),
+            (id_token(email_verified=False), "Google email address is not verified"),
+            (id_token()[:-4] + "AAAA", "Invalid Google token"),
+        ]
+        for token, detail in cases:
+            resp = self.client.post("/api/auth/google/id-token/", {"id_token": token}, format="json")
+            self.assertEqual((resp.status_code, resp.data["detail"]), (400, detail))
+
+    def test_google_key_source_honours_cache_control(self):
+        response = mock.Mock(headers={"Cache-Control": "public, max-age=21600, must-revalidate"})
+        response.json.return_value = {"keys": [JWK]}
+        with mock.patch("requests.get", return_value=response):
+            self.assertEqual(GoogleCertsKeySource().fetch(), ({"keys": [JWK]}, 21600))
@@ -0,0 +1,92 @@
+import io
+import shutil
+import tempfile
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from users import progress
+from users.models import User, UnitProgress
+from courses.models import Subject, Unit
+from materials.models import Material
+from quizzes.models import QuestionSet, Question, QuizAttempt
+
+
+class UserProgressTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media, USE_S3=False)
+        self.override.enable()
+        self.user = User.objects.create_user(username="student", password="pass1234")
+        subject = Subject.objects.create(name="Accounting")
+        self.unit1 = Unit.objects.create(subject=subject, title="Unit 1", order=1)
+        self.unit2 = Unit.objects.create(subject=subject, title="Unit 2", order=2)
+        self.sets = {}
+        for unit in (self.unit1, self.unit2):
+            qset = QuestionSet.objects.create(unit=unit, title=f"{unit.title} quiz")
+            questions = [
+                Question.objects.create(question_set=qset, text=f"Q{i}", choices=[{"id": "A", "text": "a"}], correct_choice="A")
+                for i in range(4)
+            ]
+            self.sets[unit.id] = (qset, questions)
+        self.material = Material.objects.create(
+            unit=self.unit1, title="Notes",
+            file=SimpleUploadedFile("notes.pdf", b"%PDF-1.4 test", content_type="application/pdf"),
+        )
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media, ignore_errors=True)
+
+    def submit(self, unit, correct):
+        qset, questions = self.sets[unit.id]
+        answers = [{"question_id": q.id, "choice": "A" if i < correct else "X"} for i, q in enumerate(questions)]
+        self.client.post("/api/quizzes/attempts/", {"question_set": qset.id, "answers": answers}, format="json")
+
+    def test_progress_is_maintained_incrementally(self):
+        self.submit(self.unit1, 2)
+        self.submit(self.unit1, 4)
+        self.submit(self.unit2, 1)
+        self.client.get(f"/api/materials/{self.material.id}/download/")
+        self.client.get(f"/api/materials/{self.material.id}/download/")
+
+        with self.assertNumQueries(1):
+            resp = self.client.get("/api/auth/user/progress/")
+        self.assertEqual(resp.status_code, 200)
+        units = {row["unit"]["id"]: row for row in resp.data["units"]}
+        self.assertEqual(units[self.unit1.id]["attempts"], 2)
+        self.assertEqual(units[self.unit1.id]["average_percent"], 75.0)
+        self.assertEqual(units[self.unit1.id]["best_percent"], 100.0)
+        self.assertEqual(units[self.unit1.id]["downloads"], 2)
+        self.assertEqual(units[self.unit1.id]["downloaded_materials"], [self.material.id])
+        self.assertEqual(units[self.unit2.id]["best_percent"], 25.0)
+        subject = resp.data["subjects"][0]
+        self.assertEqual((subject["attempts"], subject["average_percent"], subject["downloads"]), (3, 58.33, 2))
+
+    def test_download_is_one_statement(self):
+        other = Material.objects.create(unit=self.unit1, title="Slides", file="materials/slides.pdf")
+        for material in (self.material, other, self.material):
+            with self.assertNumQueries(1):
+                progress.record_download(self.user, material)
+        row = UnitProgress.objects.get(user=self.user, unit=self.unit1)
+        self.assertEqual((row.downloads, row.downloaded_materials), (3, [self.material.id, other.id]))
+        self.assertIsNotNone(row.last_activity)
+
+    def test_reconcile_repairs_drift(self):
+        self.submit(self.unit1, 2)
+        qset, _ = self.sets[self.unit2.id]
+        # An attempt written without going through the API is not in the summary
+        QuizAttempt.objects.create(user=self.user, question_set=qset, score=3, total=4)
+        UnitProgress.objects.filter(unit=self.unit1).update(attempts=7, best_percent=1)
+        call_command("reconcile_progress", stdout=io.StringIO())
+
+        rows = {p.unit_id: p for p in UnitProgress.objects.filter(user=self.user)}
+        self.assertEqual((rows[self.unit1.id].attempts, rows[self.unit1.id].best_percent), (1, 50.0))
+        self.assertEqual((rows[self.unit2.id].attempts, rows[self.unit2.id].best_percent), (1, 75.0))
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get("/api/auth/user/progress/").status_code, 401)
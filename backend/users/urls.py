@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import RegisterView, CustomTokenObtainPairView, AuthRootView, UserProfileView, GoogleLogin, google_id_token_login
+from .views import RegisterView, CustomTokenObtainPairView, AuthRootView, UserProfileView, UserProgressView, GoogleLogin, google_id_token_login
 from rest_framework_simplejwt.views import TokenRefreshView
 
 urlpatterns = [
@@ -8,6 +8,7 @@ urlpatterns = [
     path("login/", CustomTokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("user/", UserProfileView.as_view(), name="user_profile"),
+    path("user/progress/", UserProgressView.as_view(), name="user_progress"),
     # Social login endpoint for Google. Frontend should POST an id_token to /api/auth/google/
     # (handled by GoogleLogin.post which accepts {'id_token': '...'})
     path("google/", GoogleLogin.as_view(), name="google_login"),
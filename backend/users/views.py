@@ -1,37 +1,35 @@
 from django.contrib.auth import get_user_model
-from django.conf import settings
-import requests
 from rest_framework import status
 from rest_framework.permissions import AllowAny
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from cpa_academy.throttling import token_bucket_throttles
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework_simplejwt.tokens import RefreshToken
+from .google_tokens import verify_id_token, GoogleTokenError
 
 @csrf_exempt
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes(token_bucket_throttles("google_login"))
 def google_id_token_login(request):
     """
-    Accepts POST with {"id_token": ...}, verifies with Google, logs in/creates user, returns JWT tokens.
+    Accepts POST with {"id_token": ...}, verifies it against Google's keys, logs in/creates user, returns JWT tokens.
     """
     id_token = request.data.get("id_token")
     if not id_token:
         return Response({"detail": "Missing id_token"}, status=400)
 
-    # Verify id_token with Google
-    google_client_id = settings.SOCIALACCOUNT_PROVIDERS['google']['APP']['client_id']
-    token_info_url = f"https://oauth2.googleapis.com/tokeninfo?id_token={id_token}"
-    resp = requests.get(token_info_url, timeout=5)
-    if resp.status_code != 200:
-        return Response({"detail": "Invalid Google token"}, status=400)
-    token_info = resp.json()
-    if token_info.get("aud") != google_client_id:
-        return Response({"detail": "Token audience mismatch"}, status=400)
+    return google_id_token_response(id_token)
 
-    email = token_info.get("email")
-    if not email:
-        return Response({"detail": "No email in Google token"}, status=400)
 
+def google_id_token_response(id_token):
+    """Verify a Google ID token locally, get or create its user and return JWT tokens."""
+    try:
+        token_info = verify_id_token(id_token)
+    except GoogleTokenError as e:
+        return Response({"detail": str(e)}, status=400)
+
+    email = token_info["email"]
     User = get_user_model()
     user, created = User.objects.get_or_create(email=email, defaults={
         "username": email,
@@ -61,6 +59,7 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
+from .progress import progress_summary
 from allauth.socialaccount.providers.oauth2.client import OAuth2Client
 from dj_rest_auth.registration.views import SocialLoginView
 import os
@@ -74,7 +73,8 @@ class AuthRootView(APIView):
             "endpoints": {
                 "register": "POST /api/auth/register/",
                 "login": "POST /api/auth/login/",
-                "refresh": "POST /api/auth/refresh/"
+                "refresh": "POST /api/auth/refresh/",
+                "progress": "GET /api/auth/user/progress/"
             },
             "usage": {
                 "register": {
@@ -133,18 +133,26 @@ class UserProfileView(APIView):
         serializer = UserSerializer(request.user)
         return Response(serializer.data)
 
+class UserProgressView(APIView):
+    """Per-unit and per-subject quiz and download progress of the current user."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response(progress_summary(request.user))
+
 class GoogleLogin(SocialLoginView):
     """
     Social login view for Google.
 
     Additionally, accept a POST with {'id_token': '...'} so the frontend can send
     a Google ID token (from the client-side One Tap / OAuth SDK). When an
-    'id_token' is present we verify it with Google's tokeninfo endpoint, create
+    'id_token' is present we verify it locally against Google's signing keys, create
     or get the user, and return JWT access/refresh tokens (SimpleJWT).
     If no 'id_token' is provided, fall back to the normal SocialLoginView
     behavior which supports code/access_token flows via allauth/dj-rest-auth.
     """
     adapter_class = GoogleOAuth2Adapter
+    throttle_classes = token_bucket_throttles("google_login")
     callback_url = os.environ.get('GOOGLE_CALLBACK_URL', 'http://localhost:3000/google-callback')
     client_class = OAuth2Client
 
@@ -152,39 +160,7 @@ class GoogleLogin(SocialLoginView):
         # If frontend sends an id_token (One Tap / @react-oauth/google), handle it here.
         id_token = request.data.get('id_token')
         if id_token:
-            # Verify id_token with Google
-            google_client_id = settings.SOCIALACCOUNT_PROVIDERS['google']['APP']['client_id']
-            token_info_url = f"https://oauth2.googleapis.com/tokeninfo?id_token={id_token}"
-            resp = requests.get(token_info_url, timeout=5)
-            if resp.status_code != 200:
-                return Response({"detail": "Invalid Google token"}, status=400)
-            token_info = resp.json()
-            if token_info.get("aud") != google_client_id:
-                return Response({"detail": "Token audience mismatch"}, status=400)
-
-            email = token_info.get("email")
-            if not email:
-                return Response({"detail": "No email in Google token"}, status=400)
-
-            User = get_user_model()
-            user, created = User.objects.get_or_create(email=email, defaults={
-                "username": email,
-                "first_name": token_info.get("given_name", ""),
-                "last_name": token_info.get("family_name", ""),
-            })
-            if created:
-                user.set_unusable_password()
-                user.save()
-
-            # Issue JWT tokens
-            refresh = RefreshToken.for_user(user)
-            access = str(refresh.access_token)
-            user_data = UserSerializer(user).data
-            return Response({
-                "user": user_data,
-                "access": access,
-                "refresh": str(refresh),
-            })
+            return google_id_token_response(id_token)
 
         # Otherwise fall back to default behavior (code/access_token via allauth)
         return super().post(request, *args, **kwargs)
\ No newline at end of file